@@ -0,0 +1,119 @@
+"""
+Deterministic generator of realistic address books.
+
+Contacts get first name + surname names, Ukrainian mobile numbers, emails derived
+from the name, birthdays spread over the whole calendar, street addresses and
+tagged notes built from a small vocabulary (so note search has real matches).
+The same count and seed always give the same book.
+
+    python -m benchmarks.datagen 100000 [--seed 1] [--out book.pkl]
+
+With --out the book is written through storage.save_data, so the extension picks
+the format (.pkl, .db, .abk, .shards).
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from string import ascii_lowercase
+
+from models.contact import Record
+from services.address_book import AddressBook
+
+FIRST_NAMES = [
+    "olena", "ivan", "andrii", "oksana", "mykola", "iryna", "taras", "natalia", "serhii", "yulia",
+    "dmytro", "kateryna", "oleksandr", "svitlana", "volodymyr", "maria", "petro", "halyna", "yurii", "anna",
+    "vasyl", "tetiana", "bohdan", "liudmyla", "roman", "olha", "maksym", "viktoriia", "artem", "sofiia",
+    "denys", "daryna", "pavlo", "khrystyna", "stepan", "zoriana", "ostap", "solomiia", "yaroslav", "marta",
+]
+SURNAMES = [
+    "shevchenko", "kovalenko", "bondarenko", "tkachenko", "kravchenko", "melnyk", "boiko", "koval",
+    "oliinyk", "shevchuk", "polishchuk", "lysenko", "marchenko", "savchenko", "rudenko", "moroz",
+    "pavlenko", "petrenko", "kuzmenko", "levchenko", "ponomarenko", "savchuk", "vasylenko", "kharchenko",
+    "karpenko", "tkachuk", "hrytsenko", "klymenko", "romanenko", "zinchenko", "holub", "kushnir",
+]
+OPERATORS = ["050", "066", "095", "099", "067", "068", "096", "097", "098", "063", "073", "093"]
+DOMAINS = ["gmail.com", "ukr.net", "i.ua", "outlook.com", "meta.ua", "example.com"]
+CITIES = ["Kyiv", "Lviv", "Odesa", "Kharkiv", "Dnipro", "Vinnytsia", "Poltava", "Uzhhorod"]
+STREETS = ["Khreshchatyk", "Shevchenka", "Franka", "Lesi Ukrainky", "Sahaidachnoho", "Hrushevskoho", "Bandery"]
+TAGS = ["work", "family", "friends", "gym", "school", "urgent", "birthday", "travel", "books", "music",
+        "doctor", "project", "neighbours", "football", "recipes"]
+NOTE_TOPICS = ["meeting", "project", "birthday party", "trip", "invoice", "dentist", "football match",
+               "concert", "book club", "renovation", "conference", "wedding"]
+NOTE_ACTIONS = ["call about", "remind about", "send photos from", "buy tickets for", "discuss the budget of",
+                "bring documents to", "ask for feedback on"]
+NOTE_TIMES = ["on monday", "next week", "before friday", "after the holidays", "in the evening", "tomorrow"]
+FIRST_BIRTHDAY = date(1950, 1, 1)
+BIRTHDAY_DAYS = (date(2010, 12, 31) - FIRST_BIRTHDAY).days
+
+
+def suffix(number: int) -> str:
+    # Імена мають бути алфавітними, тож повтори розрізняються літерним суфіксом: "", "b", "c", ..., "ba", ...
+    letters = ""
+    while number:
+        number, digit = divmod(number, len(ascii_lowercase))
+        letters = ascii_lowercase[digit] + letters
+    return letters
+
+
+def contact_names(count: int, rng: random.Random):
+    repeats = {}
+    used = set()
+    for _ in range(count):
+        base = rng.choice(FIRST_NAMES) + rng.choice(SURNAMES)
+        repeat = repeats.get(base, 0)
+        # Суфікс може збігтися з кінцем іншого прізвища ("koval" + "enko"), тож перевіряється сам результат
+        while (name := base + suffix(repeat)) in used:
+            repeat += 1
+        repeats[base] = repeat + 1
+        used.add(name)
+        yield name
+
+
+def generate_record(name: str, rng: random.Random) -> Record:
+    record = Record(name)
+    for _ in range(1 + (rng.random() < 0.3)):
+        record.add_phone(rng.choice(OPERATORS) + f"{rng.randrange(10**7):07d}")
+    if rng.random() < 0.7:
+        first = next(first for first in FIRST_NAMES if name.startswith(first))
+        record.add_email(f"{first}.{name[len(first):]}{rng.randint(1, 99)}@{rng.choice(DOMAINS)}")
+    if rng.random() < 0.8:
+        birthday = FIRST_BIRTHDAY + timedelta(days=rng.randrange(BIRTHDAY_DAYS))
+        record.add_birthday(birthday.strftime("%d.%m.%Y"))
+    if rng.random() < 0.5:
+        record.add_address(f"{rng.choice(CITIES)}, {rng.choice(STREETS)} {rng.randint(1, 200)}, apt {rng.randint(1, 120)}")
+    if rng.random() < 0.4:
+        topic = rng.choice(NOTE_TOPICS)
+        record.add_note(topic.capitalize(), f"{rng.choice(NOTE_ACTIONS)} the {topic} {rng.choice(NOTE_TIMES)}",
+                        rng.sample(TAGS, rng.randint(1, 3)))
+    return record
+
+
+def generate_book(count: int, seed: int = 1) -> AddressBook:
+    """
+    Builds a book of `count` contacts through the Record API; deterministic for a given seed.
+    """
+    rng = random.Random(seed)
+    book = AddressBook()
+    for name in contact_names(count, rng):
+        book.add_record(generate_record(name, rng))
+    return book
+
+
+def main(args) -> None:
+    start = time.perf_counter()
+    book = generate_book(args.count, args.seed)
+    print(f"generated {len(book.data)} contacts in {time.perf_counter() - start:.2f} s")
+    if args.out:
+        from storage import save_data
+        start = time.perf_counter()
+        save_data(book, args.out)
+        print(f"saved to {args.out} in {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("count", type=int, nargs="?", default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="save the book to this file (format by extension)")
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""
+Memory report for a synthetic address book.
+
+Builds a book of N contacts through the Record API, then reports the memory held
+by the book (tracemalloc), bytes per contact and the size of its pickle.
+
+    python -m benchmarks.memory_report [contacts] [--seed 15]
+"""
+import argparse
+import pickle
+import random
+import time
+import tracemalloc
+from itertools import product
+from string import ascii_lowercase
+
+from benchmarks.datagen import CITIES, DOMAINS, STREETS, TAGS
+from models.contact import Record
+from services.address_book import AddressBook
+
+
+def names(count: int):
+    # Унікальні алфавітні імена: aaaa, aaab, ...
+    for letters in product(ascii_lowercase, repeat=5):
+        if count == 0:
+            return
+        yield "".join(letters)
+        count -= 1
+
+
+def build_book(count: int, seed: int = 15) -> AddressBook:
+    rng = random.Random(seed)
+    book = AddressBook()
+    for name in names(count):
+        record = Record(name)
+        for _ in range(rng.randint(1, 2)):
+            record.add_phone("0" + "".join(rng.choice("0123456789") for _ in range(9)))
+        if rng.random() < 0.7:
+            record.add_email(f"{name}.{rng.randint(1, 99)}@{rng.choice(DOMAINS)}")
+        if rng.random() < 0.8:
+            record.add_birthday(f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1950, 2010)}")
+        if rng.random() < 0.5:
+            record.add_address(f"{rng.choice(CITIES)}, {rng.choice(STREETS)} {rng.randint(1, 200)}")
+        if rng.random() < 0.3:
+            record.add_note(f"note {name}", f"call {name} about the meeting", rng.sample(TAGS, rng.randint(1, 3)))
+        book.add_record(record)
+    return book
+
+
+def main(args) -> None:
+    count = args.contacts
+    tracemalloc.start()
+    start = time.perf_counter()
+    book = build_book(count, args.seed)
+    build_time = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    data = pickle.dumps(book)
+    start = time.perf_counter()
+    pickle.loads(data)
+    load_time = time.perf_counter() - start
+
+    print(f"contacts:          {count}")
+    print(f"book memory:       {used / 2**20:.1f} MiB ({used / count:.0f} bytes per contact)")
+    print(f"pickle size:       {len(data) / 2**20:.1f} MiB")
+    print(f"build / unpickle:  {build_time:.2f} s / {load_time:.2f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("contacts", type=int, nargs="?", default=200_000)
+    parser.add_argument("--seed", type=int, default=15)
+    main(parser.parse_args())
@@ -0,0 +1,99 @@
+"""
+Load generator for the server mode (python main.py --serve).
+
+Opens several connections, fills the book with contacts, then sends a mix of
+reads (phone, search, names) and writes (change-address) and reports requests
+per second and latency percentiles.
+
+    python -m benchmarks.server_client [--address 127.0.0.1:8765] [--connections 16]
+                                       [--requests 2000] [--contacts 5000] [--write-ratio 0.1]
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.memory_report import names
+
+# Відповіді на пошук можуть містити сотні контактів в одному рядку
+RESPONSE_LIMIT = 2**24
+
+
+async def connect(address: str):
+    if address.startswith("unix:"):
+        return await asyncio.open_unix_connection(address[len("unix:"):], limit=RESPONSE_LIMIT)
+    host, _, port = address.rpartition(":")
+    return await asyncio.open_connection(host or "127.0.0.1", int(port), limit=RESPONSE_LIMIT)
+
+
+async def call(reader, writer, op: str, **args) -> dict:
+    writer.write(json.dumps({"op": op, "args": args}).encode("utf-8") + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def populate(address: str, contacts: list[str]) -> None:
+    reader, writer = await connect(address)
+    for i, name in enumerate(contacts):
+        await call(reader, writer, "add", name=name, phone=f"0{i:09d}")
+    writer.close()
+
+
+async def client(address: str, contacts: list[str], requests: int, write_ratio: float, seed: int) -> tuple[list[float], int]:
+    rng = random.Random(seed)
+    reader, writer = await connect(address)
+    latencies = []
+    errors = 0
+    for _ in range(requests):
+        name = rng.choice(contacts)
+        roll = rng.random()
+        if roll < write_ratio:
+            op, args = "change-address", {"name": name, "address": f"Kyiv, Street {rng.randint(1, 999)}"}
+        elif roll < write_ratio + (1 - write_ratio) / 2:
+            op, args = "phone", {"name": name}
+        elif roll < write_ratio + (1 - write_ratio) * 3 / 4:
+            op, args = "search", {"query": name[:4]}
+        else:
+            op, args = "names", {"prefix": name[:2], "limit": 20}
+        start = time.perf_counter()
+        response = await call(reader, writer, op, **args)
+        latencies.append(time.perf_counter() - start)
+        errors += not response["ok"]
+    writer.close()
+    return latencies, errors
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def main(args) -> None:
+    contacts = list(names(args.contacts))
+    start = time.perf_counter()
+    await populate(args.address, contacts)
+    print(f"populated {len(contacts)} contacts in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        client(args.address, contacts, args.requests, args.write_ratio, seed)
+        for seed in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for client_latencies, _ in results for latency in client_latencies)
+    errors = sum(client_errors for _, client_errors in results)
+
+    print(f"connections:  {args.connections}, write ratio {args.write_ratio:.0%}")
+    print(f"requests:     {len(latencies)} in {elapsed:.2f} s ({len(latencies) / elapsed:.0f} req/s), errors: {errors}")
+    print(f"latency:      p50 {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--address", default="127.0.0.1:8765")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per connection")
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,254 @@
+"""
+Consistency test for copy-on-write snapshots (AddressBook.snapshot).
+
+Writer threads keep changing their own contacts (phones, notes) and adding and
+deleting temporary contacts, while a snapshot thread takes snapshots, reads them
+concurrently with the writers and pickles some of them (as the journal compaction
+does). Every writer logs, for each change, when it started and ended and a digest
+of the writer's data after it. A snapshot is consistent if, for every writer, its
+data in the snapshot equals the state after some prefix of its changes that
+includes every change finished before snapshot() was called and none started
+after it returned. Snapshots must also stay the same until they are released.
+
+    python -m benchmarks.snapshot_stress [--contacts 5000] [--writers 4]
+                                         [--operations 20000] [--open 3]
+
+Exits with status 1 if a snapshot is inconsistent or changed.
+"""
+import argparse
+import pickle
+import random
+import statistics
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from benchmarks.datagen import generate_book, TAGS
+from benchmarks.thread_stress import letters
+from models.contact import Record
+from services.address_book import AddressBook
+
+OWNED = 40  # контактів у кожного потоку-записувача
+MASK = (1 << 64) - 1
+
+
+def owned_name(writer: int, i: int) -> str:
+    return "own" + letters(writer, 2) + letters(i, 3)
+
+
+def temporary_name(writer: int, i: int) -> str:
+    return "tmp" + letters(writer, 2) + letters(i, 5)
+
+
+def writer_of(name: str) -> int | None:
+    # Ім'я записано з великої літери: "Ownab..." / "Tmpab..."
+    if name.startswith(("Own", "Tmp")):
+        return (ord(name[3]) - 97) * 26 + ord(name[4]) - 97
+    return None
+
+
+def element(kind: str, name: str, value: str = "") -> int:
+    return hash((kind, name, value)) & MASK
+
+
+def record_digest(record: Record) -> int:
+    name = record.name.value
+    if name.startswith("Tmp"):
+        return element("t", name)
+    digest = sum(element("p", name, phone.value) for phone in record.phones)
+    if record.note is not None:
+        digest += element("n", name, record.note.text)
+    return digest & MASK
+
+
+def digests(records, writers: int) -> list[int]:
+    # Дайджест даних кожного записувача: сума дайджестів його контактів
+    result = [0] * writers
+    for name in records:
+        writer = writer_of(name)
+        if writer is not None and writer < writers:
+            result[writer] = (result[writer] + record_digest(records[name])) & MASK
+    return result
+
+
+class Writer:
+    def __init__(self, book: AddressBook, writer_id: int, operations: int, seed: int) -> None:
+        self.book = book
+        self.id = writer_id
+        self.operations = operations
+        self.rng = random.Random(seed)
+        self.names = [owned_name(writer_id, i).capitalize() for i in range(OWNED)]
+        self.added = {name: [] for name in self.names}  # телефони, додані цим потоком
+        self.temporary = []
+        self.created = 0
+        self.digest = 0
+        # Журнал змін: початок, кінець і дайджест після кожної зміни; history[0] - до змін
+        self.starts = []
+        self.ends = []
+        self.history = []
+        self.errors = []
+
+    def setup(self) -> None:
+        for i, name in enumerate(self.names):
+            record = Record(name)
+            record.add_phone(f"+39{self.id:03d}{i:07d}")
+            self.book.add_record(record)
+            self.digest = (self.digest + record_digest(record)) & MASK
+        self.history.append(self.digest)
+
+    def change(self, seq: int) -> int:
+        # Виконує одну зміну й повертає, на скільки змінився дайджест
+        roll = self.rng.random()
+        name = self.rng.choice(self.names)
+        if roll < 0.4 or (roll < 0.6 and not self.added[name]):
+            phone = f"+38{self.id:03d}{seq:07d}"
+            self.book.find(name).add_phone(phone)
+            self.added[name].append(phone)
+            return element("p", name, phone)
+        if roll < 0.6:
+            phone = self.added[name].pop(self.rng.randrange(len(self.added[name])))
+            self.book.find(name).remove_phone(phone)
+            return -element("p", name, phone)
+        if roll < 0.8:
+            record = self.book.find(name)
+            old = element("n", name, record.note.text) if record.note else 0
+            record.add_note(f"note {self.id}", f"version {seq}", self.rng.sample(TAGS, 2))
+            return element("n", name, f"version {seq}") - old
+        if roll < 0.9 or not self.temporary:
+            record = Record(temporary_name(self.id, self.created))
+            self.created += 1
+            record.add_phone(f"+37{self.id:03d}{seq:07d}")
+            self.book.add_record(record)
+            self.temporary.append(record.name.value)
+            return element("t", record.name.value)
+        name = self.temporary.pop(self.rng.randrange(len(self.temporary)))
+        self.book.delete(name)
+        return -element("t", name)
+
+    def run(self) -> "Writer":
+        try:
+            for seq in range(self.operations):
+                start = time.perf_counter_ns()
+                delta = self.change(seq)
+                end = time.perf_counter_ns()
+                self.digest = (self.digest + delta) & MASK
+                self.starts.append(start)
+                self.ends.append(end)
+                self.history.append(self.digest)
+        except Exception as e:
+            self.errors.append(f"writer {self.id}: {type(e).__name__}: {e}")
+        return self
+
+
+class Observation:
+    def __init__(self, snapshot, before: int, after: int, writers: int) -> None:
+        self.snapshot = snapshot
+        self.before = before
+        self.after = after
+        self.digests = digests(snapshot, writers)
+
+
+def check_observation(observation: Observation, writers: list[Writer]) -> list[str]:
+    errors = []
+    for writer in writers:
+        # Зміни, що завершилися до snapshot(), мають бути видні; ті, що почалися після, - ні
+        required = bisect_left(writer.ends, observation.before)
+        allowed = bisect_left(writer.starts, observation.after)
+        digest = observation.digests[writer.id]
+        if not any(writer.history[k] == digest for k in range(required, allowed + 1)):
+            matches = [k for k, value in enumerate(writer.history) if value == digest]
+            errors.append(f"writer {writer.id}: snapshot matches prefixes {matches[:5]}, "
+                          f"expected one within {required}..{allowed}")
+    return errors
+
+
+def observe(book: AddressBook, writers: list[Writer], done: threading.Event, keep_open: int,
+            observations: list, errors: list, durations: list) -> None:
+    opened = deque()
+    count = 0
+    try:
+        while not done.is_set() or opened:
+            if not done.is_set():
+                before = time.perf_counter_ns()
+                snapshot = book.snapshot()
+                after = time.perf_counter_ns()
+                durations.append(after - before)
+                opened.append(Observation(snapshot, before, after, len(writers)))
+                count += 1
+                if count % 5 == 0:
+                    # Серіалізований знімок має збігатися з тим, що з нього читається
+                    restored = pickle.loads(pickle.dumps(snapshot.to_book()))
+                    if digests(restored.data, len(writers)) != opened[-1].digests:
+                        errors.append(f"snapshot {count}: pickled copy differs from the snapshot")
+            if len(opened) > keep_open or (done.is_set() and opened):
+                observation = opened.popleft()
+                # Поки знімок відкритий, записувачі продовжують працювати; він не має змінитися
+                if digests(observation.snapshot, len(writers)) != observation.digests:
+                    errors.append("a snapshot changed before it was released")
+                observation.snapshot.release()
+                observation.snapshot = None
+                observations.append(observation)
+    except Exception as e:
+        errors.append(f"snapshot thread: {type(e).__name__}: {e}")
+
+
+def stress(contacts: int, writers: int, operations: int, keep_open: int):
+    """
+    Runs the writers and the snapshot thread against a fresh book; returns the book,
+    the checked observations, the problems found and snapshot() durations in ns, and
+    the elapsed time in seconds. tests/test_snapshot.py runs a small configuration of it.
+    """
+    book = generate_book(contacts)
+    writers = [Writer(book, writer_id, operations, seed=writer_id) for writer_id in range(writers)]
+    for writer in writers:
+        writer.setup()
+
+    observations, errors, durations = [], [], []
+    done = threading.Event()
+    observer = threading.Thread(target=observe, args=(book, writers, done, keep_open, observations, errors, durations))
+    threads = [threading.Thread(target=writer.run) for writer in writers]
+    start = time.perf_counter()
+    observer.start()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    observer.join()
+    elapsed = time.perf_counter() - start
+
+    errors += [error for writer in writers for error in writer.errors]
+    for observation in observations:
+        errors += check_observation(observation, writers)
+    # Жива книга після всіх змін має збігатися з журналами записувачів
+    final = digests(book.data, len(writers))
+    errors += [f"writer {writer.id}: the book lost changes" for writer in writers if final[writer.id] != writer.history[-1]]
+    if book._snapshots:
+        errors.append(f"{len(book._snapshots)} snapshot(s) left registered")
+    changes = sum(len(writer.starts) for writer in writers)
+    return book, observations, errors, durations, changes, elapsed
+
+
+def main(args) -> int:
+    book, observations, errors, durations, changes, elapsed = stress(args.contacts, args.writers, args.operations, args.open)
+    print(f"writers:     {args.writers}, contacts: {len(book.data)}, {changes} changes in {elapsed:.2f} s")
+    print(f"snapshots:   {len(observations)} checked, up to {args.open + 1} open at once, "
+          f"snapshot() median {statistics.median(durations) / 1000:.0f} us")
+    if errors:
+        print(f"FAILED: {len(errors)} problems", file=sys.stderr)
+        for error in errors[:20]:
+            print(f"  {error}", file=sys.stderr)
+        return 1
+    print("consistency: ok")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--operations", type=int, default=20000, help="changes per writer")
+    parser.add_argument("--open", type=int, default=3, help="snapshots kept open while new ones are taken")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""
+Cold start of the interactive CLI.
+
+Reports, as medians over several runs of fresh interpreters:
+  - import time of the cli module (python -X importtime), in milliseconds
+  - time until the prompt is shown
+  - time until the first command that needs the book ('phone <name>') answers
+
+The CLI is run in a pseudo-terminal with a generated book of N contacts, so
+loading the book overlaps with the prompt the way it does for a user.
+
+    python -m benchmarks.startup [--contacts 100000] [--runs 5] [--file book.pkl]
+"""
+import argparse
+import os
+import pty
+import re
+import select
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.memory_report import build_book
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROMPT = b"Enter a command: "
+
+
+def import_time_ms() -> float:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import cli"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    # Останній рядок - сам модуль cli: "import time: self | cumulative | cli"
+    cumulative = re.findall(r"\|\s*(\d+)\s*\|\s*cli$", result.stderr, re.MULTILINE)
+    return int(cumulative[-1]) / 1000
+
+
+def read_until(fd: int, marker: bytes, start: float, timeout: float = 60.0) -> float:
+    buffer = b""
+    while marker not in buffer:
+        ready, _, _ = select.select([fd], [], [], timeout)
+        if not ready:
+            raise TimeoutError(f"no {marker!r} within {timeout} s")
+        buffer += os.read(fd, 65536)
+    return (time.perf_counter() - start) * 1000
+
+
+def interactive_run(book_file: str, name: str) -> tuple[float, float]:
+    env = {**os.environ, "PYTHONPATH": ROOT, "ADDRESSBOOK_FILE": book_file, "TERM": "dumb"}
+    master, slave = pty.openpty()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "main.py")],
+        stdin=slave, stdout=slave, stderr=slave, env=env, cwd=os.path.dirname(book_file),
+    )
+    os.close(slave)
+    try:
+        prompt = read_until(master, PROMPT, start)
+        os.write(master, f"phone {name}\n".encode())
+        answer = read_until(master, b"Phone records", start)
+        os.write(master, b"exit\n")
+        read_until(master, b"Goodbye", start)
+    finally:
+        process.wait(timeout=60)
+        os.close(master)
+    return prompt, answer
+
+
+def main(args) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        book_file = args.file
+        if book_file is None:
+            # Книга генерується заздалегідь, щоб вимірювався лише запуск
+            from storage import save_data
+            book_file = os.path.join(directory, "addressbook.pkl")
+            start = time.perf_counter()
+            book = build_book(args.contacts)
+            save_data(book, book_file)
+            print(f"generated {args.contacts} contacts in {time.perf_counter() - start:.2f} s")
+            name = next(iter(book.data))
+        else:
+            from storage import load_data
+            name = next(iter(load_data(book_file).data))
+
+        imports = [import_time_ms() for _ in range(args.runs)]
+        runs = [interactive_run(os.path.abspath(book_file), name) for _ in range(args.runs)]
+
+    print(f"import cli:      {statistics.median(imports):8.1f} ms")
+    print(f"prompt shown:    {statistics.median(prompt for prompt, _ in runs):8.1f} ms")
+    print(f"first answer:    {statistics.median(answer for _, answer in runs):8.1f} ms  ('phone {name}')")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--file", help="measure with an existing book instead of a generated one")
+    main(parser.parse_args())
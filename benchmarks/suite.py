@@ -0,0 +1,193 @@
+"""
+Benchmark suite for the address book operations.
+
+For every book size (generated by benchmarks.datagen) measures, per operation:
+find, search_by_name, find_by_note, find_by_tags (any / all), get_upcoming_birthdays,
+pagination by name and by birthday (first page + 10 next pages), and save_data /
+load_data for each storage format. Lookups run on warm indexes; every case is
+repeated and the median time per operation is reported. SQLite (.db) and binary
+(.abk) books are opened lazily, so their load_data is the time to open the book.
+
+    python -m benchmarks.suite [--contacts 1000,10000] [--repeat 5]
+                               [--formats .pkl,.db] [--only find,search_by_name]
+                               [--baseline FILE] [--save-baseline] [--threshold 0.25]
+
+With --save-baseline the results are written to the baseline file
+(benchmarks/baseline.json by default). Otherwise, if the baseline file exists,
+every case is compared with it and the run exits with status 1 when a case is
+slower than the baseline by more than the threshold (25% by default).
+Baselines only make sense on the machine that recorded them.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+from benchmarks.datagen import generate_book, NOTE_TOPICS, TAGS
+from birthday import get_upcoming_birthdays
+from services.pagination import PageSession
+from storage import load_data, save_data
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+QUERIES = 200
+TODAY = date(2025, 3, 14)
+
+
+def lookup_cases(book, rng: random.Random) -> dict:
+    """
+    Case name -> (function, arguments for every call). Queries are picked from the book
+    itself, so lookups hit real contacts.
+    """
+    names = rng.sample(sorted(book.data), min(QUERIES, len(book.data)))
+    fragments = [name[start:start + 4] for name in names for start in [rng.randrange(max(1, len(name) - 3))]]
+    words = [rng.choice(NOTE_TOPICS).split()[0] for _ in range(QUERIES)]
+    tag_pairs = [rng.sample(TAGS, 2) for _ in range(QUERIES)]
+    days = [TODAY.fromordinal(TODAY.toordinal() + offset) for offset in range(0, 365, 365 // 20)]
+
+    def pages(order: str):
+        session = PageSession(book, order, today=TODAY)
+        session.first_page()
+        for _ in range(10):
+            session.next_page()
+
+    return {
+        "find": (book.find, [(name,) for name in names]),
+        "search_by_name": (book.search_by_name, [(fragment,) for fragment in fragments]),
+        "find_by_note": (book.find_by_note, [(word,) for word in words]),
+        "find_by_tags[any]": (book.find_by_tags, [(pair,) for pair in tag_pairs]),
+        "find_by_tags[all]": (lambda tags: book.find_by_tags(tags, match_all=True), [(pair,) for pair in tag_pairs]),
+        "get_upcoming_birthdays": (lambda today: get_upcoming_birthdays(book, 7, today), [(day,) for day in days]),
+        "pagination[name]": (pages, [("name",)] * 20),
+        "pagination[birthday]": (pages, [("birthday",)] * 20),
+    }
+
+
+def time_calls(function, calls: list[tuple], repeat: int) -> float:
+    # Перший прохід будує індекси й не враховується
+    for args in calls:
+        function(*args)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in calls:
+            function(*args)
+        times.append((time.perf_counter() - start) / len(calls))
+    return statistics.median(times)
+
+
+def time_storage(book, extension: str, directory: str, repeat: int) -> dict[str, float]:
+    path = os.path.join(directory, f"book{extension}")
+    saves, loads = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        save_data(book, path)
+        saves.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        load_data(path)
+        loads.append(time.perf_counter() - start)
+    return {f"save_data[{extension}]": statistics.median(saves), f"load_data[{extension}]": statistics.median(loads)}
+
+
+def run(sizes: list[int], formats: list[str], repeat: int, only: set[str] | None, seed: int) -> dict[str, float]:
+    results = {}
+    for size in sizes:
+        start = time.perf_counter()
+        book = generate_book(size, seed)
+        print(f"{size} contacts generated in {time.perf_counter() - start:.1f} s", file=sys.stderr)
+        for case, (function, calls) in lookup_cases(book, random.Random(seed)).items():
+            if only is None or case.split("[")[0] in only:
+                results[f"{case}@{size}"] = time_calls(function, calls, repeat)
+        if only is None or only & {"save_data", "load_data"}:
+            with tempfile.TemporaryDirectory() as directory:
+                for extension in formats:
+                    timings = time_storage(book, extension, directory, repeat)
+                    results.update({f"{case}@{size}": value for case, value in timings.items()
+                                    if only is None or case.split("[")[0] in only})
+    return results
+
+
+def format_time(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} us"
+
+
+def compare(results: dict[str, float], baseline: dict[str, float], threshold: float) -> list[str]:
+    """
+    Prints every case next to its baseline; returns the cases slower than baseline * (1 + threshold).
+    """
+    regressions = []
+    print(f"{'case':<36}{'time':>12}{'baseline':>12}{'change':>9}")
+    for case, seconds in results.items():
+        before = baseline.get(case)
+        if before is None:
+            print(f"{case:<36}{format_time(seconds):>12}{'-':>12}{'new':>9}")
+            continue
+        change = seconds / before - 1
+        marker = ""
+        if change > threshold:
+            regressions.append(case)
+            marker = "  REGRESSION"
+        print(f"{case:<36}{format_time(seconds):>12}{format_time(before):>12}{change:>+9.0%}{marker}")
+    return regressions
+
+
+def main(args) -> int:
+    sizes = [int(size) for size in args.contacts.split(",")]
+    formats = args.formats.split(",")
+    only = set(args.only.split(",")) if args.only else None
+    results = run(sizes, formats, args.repeat, only, args.seed)
+
+    if args.save_baseline:
+        meta = {
+            "recorded": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        for case, seconds in results.items():
+            print(f"{case:<36}{format_time(seconds):>12}")
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        for case, seconds in results.items():
+            print(f"{case:<36}{format_time(seconds):>12}")
+        print(f"no baseline at {args.baseline}; record one with --save-baseline", file=sys.stderr)
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("seed") != args.seed:
+        print("baseline was recorded with another seed; the books differ", file=sys.stderr)
+        return 2
+    regressions = compare(results, baseline["results"], args.threshold)
+    if regressions:
+        print(f"FAILED: {len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}",
+              file=sys.stderr)
+        return 1
+    print(f"no regressions (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", default="1000,10000", help="comma-separated book sizes (1000 to 1000000)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--formats", default=".pkl,.db,.abk", help="storage formats for save_data / load_data")
+    parser.add_argument("--only", help="comma-separated operations to run, e.g. find,save_data")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="record the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,201 @@
+"""
+Stress test for sharing one address book between threads.
+
+Worker threads run a mix of lookups (find, search_by_name, find_by_phone,
+names_with_prefix, find_by_tags) and changes (phones and notes of shared
+contacts, temporary contacts added and deleted) against one book. Every worker
+records what it changed; afterwards the book and its indexes are checked
+against that record and against indexes rebuilt from scratch.
+
+    python -m benchmarks.thread_stress [--contacts 5000] [--threads 8]
+                                       [--operations 20000] [--write-ratio 0.1]
+
+Exits with status 1 if a lookup failed or an invariant does not hold.
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from string import ascii_lowercase
+
+from benchmarks.datagen import TAGS
+from benchmarks.memory_report import build_book
+from models.contact import Record
+from services.address_book import AddressBook
+from services.indexes import TrigramIndex, ValueIndex, normalize_phone
+
+
+def letters(number: int, width: int) -> str:
+    # Імена мають бути алфавітними: число у "системі числення" з літер
+    result = []
+    for _ in range(width):
+        number, digit = divmod(number, len(ascii_lowercase))
+        result.append(ascii_lowercase[digit])
+    return "".join(reversed(result))
+
+
+class Worker:
+    def __init__(self, book: AddressBook, names: list[str], worker_id: int, seed: int) -> None:
+        self.book = book
+        self.names = names
+        self.id = worker_id
+        self.rng = random.Random(seed)
+        self.added_phones = defaultdict(set)  # ім'я -> телефони, додані цим потоком
+        self.temporary = []  # тимчасові контакти цього потоку, ще не видалені
+        self.created = 0
+        self.mutations = 0
+        self.reads = 0
+        self.errors = []
+
+    def check(self, condition: bool, message: str) -> None:
+        if not condition:
+            self.errors.append(message)
+
+    def read(self) -> None:
+        name = self.rng.choice(self.names)
+        roll = self.rng.random()
+        if roll < 0.4:
+            record = self.book.find(name)
+            self.check(record is not None and record.name.value == name.capitalize(), f"find({name!r}) -> {record}")
+        elif roll < 0.6:
+            found = [str(record.name) for record in self.book.search_by_name(name[:4])]
+            self.check(name.capitalize() in found, f"search_by_name({name[:4]!r}) misses {name}")
+        elif roll < 0.8:
+            record = self.book.find(name)
+            # Перший телефон кожного постійного контакту ніколи не видаляється
+            phone = record.phones[0].value
+            self.check(record in self.book.find_by_phone(phone), f"find_by_phone({phone!r}) misses {name}")
+        elif roll < 0.9:
+            with self.book.lock.read():
+                found = list(islice(self.book.names_with_prefix(name[:3]), 50))
+            self.check(all(found_name.casefold().startswith(name[:3]) for found_name in found), f"names_with_prefix({name[:3]!r})")
+        else:
+            # Нотатка могла змінитися після того, як індекс знайшов запис, тож перевіряється лише
+            # сама відповідь; узгодженість індексу з нотатками перевіряється після навантаження
+            tag = self.rng.choice(TAGS)
+            for record, tags in self.book.find_by_tags([tag]):
+                self.check(tags == [tag] and str(record.name) in self.book.data, f"find_by_tags({tag!r}) -> {record.name}")
+        self.reads += 1
+
+    def write(self) -> None:
+        roll = self.rng.random()
+        if roll < 0.4 or not any(self.added_phones.values()):
+            name = self.rng.choice(self.names)
+            # Телефони різних потоків не перетинаються: +38, номер потоку, лічильник
+            phone = f"+38{self.id:03d}{self.mutations:09d}"
+            self.book.find(name).add_phone(phone)
+            self.added_phones[name].add(phone)
+        elif roll < 0.7:
+            name = self.rng.choice([name for name, phones in self.added_phones.items() if phones])
+            phone = self.added_phones[name].pop()
+            self.book.find(name).remove_phone(phone)
+        elif roll < 0.8:
+            name = self.rng.choice(self.names)
+            self.book.find(name).add_note(f"note {name}", f"edited by worker {self.id}", self.rng.sample(TAGS, 2))
+        elif roll < 0.9 or not self.temporary:
+            name = "tmp" + letters(self.id, 2) + letters(self.created, 5)
+            self.created += 1
+            record = Record(name)
+            record.add_phone(f"+39{self.id:03d}{self.created:09d}")
+            self.book.add_record(record)
+            self.temporary.append(record.name.value)
+        else:
+            self.book.delete(self.temporary.pop(self.rng.randrange(len(self.temporary))))
+        self.mutations += 1
+
+    def run(self, operations: int, write_ratio: float) -> "Worker":
+        for _ in range(operations):
+            try:
+                if self.rng.random() < write_ratio:
+                    self.write()
+                else:
+                    self.read()
+            except Exception as e:
+                self.errors.append(f"{type(e).__name__}: {e}")
+        return self
+
+
+def check_book(book: AddressBook, workers: list[Worker], base_phones: dict[str, set[str]], contacts: int,
+               generation: int) -> list[str]:
+    errors = []
+
+    def check(condition: bool, message: str) -> None:
+        if not condition:
+            errors.append(message)
+
+    added = defaultdict(set)
+    for worker in workers:
+        for name, phones in worker.added_phones.items():
+            added[name.capitalize()] |= phones
+    for name, phones in base_phones.items():
+        actual = [phone.value for phone in book.data[name].phones]
+        check(len(actual) == len(set(actual)), f"{name}: duplicated phones")
+        check(set(actual) == phones | added[name], f"{name}: phones lost or left over")
+
+    temporary = {name for worker in workers for name in worker.temporary}
+    check(len(book.data) == contacts + len(temporary), f"book has {len(book.data)} contacts")
+    check(temporary <= book.data.keys(), "temporary contacts missing")
+    check(book.generation - generation == sum(worker.mutations for worker in workers), "generation does not match the number of changes")
+
+    # Індекси, оновлені під навантаженням, мають збігатися з побудованими заново
+    fresh_phones = ValueIndex(lambda record: [phone.value for phone in record.phones], normalize_phone, book.data.items())
+    check(book._phone_index()._values == fresh_phones._values, "phone index differs from a rebuilt one")
+    check(book._trigrams._postings == TrigramIndex(book.data)._postings, "trigram index differs from a rebuilt one")
+    check(list(book.names_with_prefix("")) == sorted(book.data, key=str.casefold), "prefix trie differs from the book")
+    tag_counts = Counter(tag for record in book.data.values() if record.note for tag in record.note.tags)
+    check(dict(book.tag_counts()) == dict(tag_counts), "tag index differs from the notes")
+    return errors
+
+
+def stress(contacts: int, threads: int, operations: int, write_ratio: float) -> tuple[list[Worker], list[str], float]:
+    """
+    Runs the workers against a fresh book; returns the workers, the problems found
+    (failed lookups and broken invariants) and the elapsed time in seconds.
+    tests/test_locks.py runs a small configuration of it.
+    """
+    book = build_book(contacts)
+    names = [name.casefold() for name in book.data]
+    base_phones = {name: {phone.value for phone in record.phones} for name, record in book.data.items()}
+    # Індекси будуються заздалегідь, щоб вимірювати роботу з ними, а не їхню побудову
+    book.search_by_name(names[0][:4])
+    book.find_by_phone("0")
+    list(islice(book.names_with_prefix(""), 1))
+    book.tag_counts()
+    generation = book.generation
+
+    workers = [Worker(book, names, worker_id, seed=worker_id) for worker_id in range(threads)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        workers = list(pool.map(lambda worker: worker.run(operations, write_ratio), workers))
+    elapsed = time.perf_counter() - start
+
+    errors = [error for worker in workers for error in worker.errors]
+    errors += check_book(book, workers, base_phones, contacts, generation)
+    return workers, errors, elapsed
+
+
+def main(args) -> int:
+    workers, errors, elapsed = stress(args.contacts, args.threads, args.operations, args.write_ratio)
+    reads = sum(worker.reads for worker in workers)
+    mutations = sum(worker.mutations for worker in workers)
+    print(f"threads:     {args.threads}, contacts: {args.contacts}, write ratio {args.write_ratio:.0%}")
+    print(f"operations:  {reads} reads, {mutations} changes in {elapsed:.2f} s ({(reads + mutations) / elapsed:.0f} ops/s)")
+    if errors:
+        print(f"FAILED: {len(errors)} problems", file=sys.stderr)
+        for error in errors[:20]:
+            print(f"  {error}", file=sys.stderr)
+        return 1
+    print("invariants:  ok")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=20000, help="operations per thread")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    sys.exit(main(parser.parse_args()))
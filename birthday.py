@@ -1,22 +1,61 @@
-from datetime import datetime, date, timedelta
+import calendar
+from datetime import date, timedelta
+from typing import NamedTuple
 
-def get_upcoming_birthdays(book, days=7):
+
+class UpcomingBirthday(NamedTuple):
+    name: str
+    birthday: date
+    congratulation_date: date
+
+
+def birthday_in_year(birthday: date, year: int) -> date:
+    # 29 лютого в невисокосний рік відзначаємо 28 лютого
+    try:
+        return birthday.replace(year=year)
+    except ValueError:
+        return date(year, 2, 28)
+
+
+def _calendar_ranges(today: date, end: date) -> list[tuple[tuple[int, int], tuple[int, int]]]:
+    """
+    Splits the period from today to end into (month, day) ranges of the calendar,
+    wrapping over the new year.
+    """
+    if end - today >= timedelta(days=365):
+        return [((1, 1), (12, 31))]
+    end_key = (end.month, end.day)
+    # Іменинники 29 лютого потрапляють у період, що закінчується 28 лютого невисокосного року
+    if end_key == (2, 28) and not calendar.isleap(end.year):
+        end_key = (2, 29)
+    if end.year == today.year:
+        return [((today.month, today.day), end_key)]
+    return [((today.month, today.day), (12, 31)), ((1, 1), end_key)]
+
+
+def get_upcoming_birthdays(book, days=7, today: date | None = None) -> list[UpcomingBirthday]:
+    """
+    Returns birthdays from today to `days` days ahead, soonest first. A congratulation
+    that falls on a weekend is moved to the following Monday.
+    """
     if days < 1:
         raise ValueError("Number of days must be positive")
+    today = today or date.today()
+    end = today + timedelta(days=days)
     congratulate_users = []
-    today = date.today()
-    for name, record in book.items():
-        if not record.birthday:
-            continue
-        birthday = datetime.strptime(str(record.birthday), "%d.%m.%Y").date()
-        birthday_this_year = date(today.year, birthday.month, birthday.day)
-        if birthday_this_year - today <= timedelta(days=days):
+    for start_key, end_key in _calendar_ranges(today, end):
+        for record in book.birthdays_between(start_key, end_key):
+            birthday = record.birthday.date
+            birthday_this_year = birthday_in_year(birthday, today.year)
             if birthday_this_year < today:
-                birthday_this_year = date(birthday_this_year.year + 1, birthday.month, birthday.day)
-            if birthday_this_year.weekday() == 5:
-                birthday_this_year = birthday_this_year + timedelta(days=2)
-            elif birthday_this_year.weekday() == 6:
-                birthday_this_year = birthday_this_year + timedelta(days=1)
-            birthday_this_year = birthday_this_year.strftime("%d.%m.%Y")
-            congratulate_users.append({name: birthday_this_year})
+                birthday_this_year = birthday_in_year(birthday, today.year + 1)
+            if birthday_this_year > end:
+                continue
+            congratulation_date = birthday_this_year
+            if congratulation_date.weekday() == 5:
+                congratulation_date = congratulation_date + timedelta(days=2)
+            elif congratulation_date.weekday() == 6:
+                congratulation_date = congratulation_date + timedelta(days=1)
+            congratulate_users.append(UpcomingBirthday(str(record.name), birthday_this_year, congratulation_date))
+    congratulate_users.sort(key=lambda item: (item.birthday, item.name))
     return congratulate_users
@@ -1,106 +1,317 @@
-from storage import load_data, save_data
-from services.commands import (
-    add_contact, add_note, edit_note, find_note, find_by_tags, remove_note, show_note,
-    change_contact, show_phone, remove_phone, add_birthday,
-    change_birthday, show_birthday, birthdays, add_email, change_email,
-    show_email, remove_email, emails, add_address, change_address,
-    show_address, search_contact, delete_record, show_all_with_pagination, 
-    next_page, prev_page
-)
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import nullcontext
+from functools import cache
+from importlib import import_module
+from services.completion import setup_completion
 from parser import parse_input
 from colorama import Fore
+from services import render
 
-HELP_MESSAGE = f"""The following commands are available:
-    * {Fore.GREEN + 'add <username> <phone_number>':<60}{Fore.RESET} - add a contact to the contact list. note: phone number must consist of 10 digits
-    * {Fore.GREEN + 'change <username> <old_phone_number> <new_phone_number>':<60}{Fore.RESET} - change an already existing contact
-    * {Fore.GREEN + 'phone <username>':<60}{Fore.RESET} - get to know a phone number by the contact's username
-    * {Fore.GREEN + 'remove <username> <phone_number>':<60}{Fore.RESET} - remove phone number from a person's record
-    * {Fore.GREEN + 'add-birthday <username> <birthday>':<60}{Fore.RESET} - set a birthday date for a contact
-    * {Fore.GREEN + 'change-birthday <username> <new_birthday>':<60}{Fore.RESET} - change birthday date for a contact
-    * {Fore.GREEN + 'show-birthday <username>':<60}{Fore.RESET} - get to know the birthday date of the contact
-    * {Fore.GREEN + 'birthdays *days*':<60}{Fore.RESET} - get to know birthdays from your address book for a given number of days (week by default)
-    * {Fore.GREEN + 'add-email <username> <email>':<60}{Fore.RESET} - add an email address to a contact record
-    * {Fore.GREEN + 'change-email <username> <old_email> <new_email>':<60}{Fore.RESET} - change given email address of a contact
-    * {Fore.GREEN + 'remove-email <username> <email>':<60}{Fore.RESET} - remove an already existing email address from a contact record
-    * {Fore.GREEN + 'show-email <username>':<60}{Fore.RESET} - get to know an email address for a given contact
-    * {Fore.GREEN + 'emails':<60}{Fore.RESET} - get to know all the emails saved in your contact book   
-    * {Fore.GREEN + 'add-note <username> <title> <text> [tags...]':<60}{Fore.RESET} - add a note to a contact (tags can be individual words or ["tag1", "tag2"] format)
-    * {Fore.GREEN + 'show-note <username>':<60}{Fore.RESET} - show a contact's note
-    * {Fore.GREEN + 'edit-note <username> <title> <text> [tags...]':<60}{Fore.RESET} - edit a contact's note (tags are optional)
-    * {Fore.GREEN + 'remove-note <username>':<60}{Fore.RESET} - remove a contact's note
-    * {Fore.GREEN + 'find-note <query>':<60}{Fore.RESET} - search for notes containing the query text
-    * {Fore.GREEN + 'add-address <name> <address>':<60}{Fore.RESET} - add a residential address to a contact record 
-    * {Fore.GREEN + 'change-address <name> <new_address>':<60}{Fore.RESET} - change the residential address for a contact record 
-    * {Fore.GREEN + 'show-address <name>':<60}{Fore.RESET} - get to know the residential address of a contact
-    * {Fore.GREEN + 'find-by-tags <tag1> <tag2> ...':<60}{Fore.RESET} - search for notes with specific tags
-    * {Fore.GREEN + 'search <name>':<60}{Fore.RESET} - search for contacts by name (partial match)
-    * {Fore.GREEN + 'delete <name>':<60}{Fore.RESET} - delete a record
-    * {Fore.GREEN + 'all':<60}{Fore.RESET} - get all contacts from the contact list (5 per page; use 'next'/'prev' for pagination)
-    * {Fore.GREEN + 'exit':<60}{Fore.RESET} - close the program
-    * {Fore.GREEN + 'close':<60}{Fore.RESET} - close the program"""
-
-COMMANDS = {
-    "hello": lambda args, book: print(f"{Fore.YELLOW}How can I help you?{Fore.RESET}"),
-    "add": add_contact,
-    "change": change_contact,
-    "phone": show_phone,
-    "remove": remove_phone,
-    "add-birthday": add_birthday,
-    "change-birthday": change_birthday,
-    "show-birthday": show_birthday,
-    "birthdays": birthdays,
-    "add-email": add_email,
-    "change-email": change_email,
-    "show-email": show_email,
-    "remove-email": remove_email,
-    "emails": lambda args, book: emails(book),
-    "add-note": add_note,
-    "show-note": show_note,
-    "edit-note": edit_note,
-    "remove-note": remove_note,
-    "find-note": remove_note,
-    "find-note": find_note,
-    "find-by-tags": find_by_tags,
-    "add-address": add_address,
-    "change-address": change_address,
-    "show-address": show_address,
-    "delete": delete_record,
-    "search": search_contact,
-    "all": lambda args, book: show_all_with_pagination(book),
-    "next": lambda args, book: next_page(book),
-    "prev": lambda args, book: prev_page(book),
-    "help": lambda args, book: print(HELP_MESSAGE)
+# Довідка: (синтаксис, опис); текст з кольорами формується лише під час першої команди help
+HELP = [
+    ('add <username> <phone_number>', 'add a contact to the contact list. note: phone number must consist of 10 digits'),
+    ('change <username> <old_phone_number> <new_phone_number>', 'change an already existing contact'),
+    ('phone <username>', "get to know a phone number by the contact's username"),
+    ('remove <username> <phone_number>', "remove phone number from a person's record"),
+    ('who-phone <phone_number>', 'find out which contacts a phone number belongs to'),
+    ('add-birthday <username> <birthday>', 'set a birthday date for a contact'),
+    ('change-birthday <username> <new_birthday>', 'change birthday date for a contact'),
+    ('show-birthday <username>', 'get to know the birthday date of the contact'),
+    ('birthdays *days*', 'get to know birthdays from your address book for a given number of days (week by default)'),
+    ('add-email <username> <email>', 'add an email address to a contact record'),
+    ('change-email <username> <old_email> <new_email>', 'change given email address of a contact'),
+    ('remove-email <username> <email>', 'remove an already existing email address from a contact record'),
+    ('show-email <username>', 'get to know an email address for a given contact'),
+    ('emails', 'get to know all the emails saved in your contact book'),
+    ('who-email <email>', 'find out which contacts an email address belongs to'),
+    ('duplicates', 'list phone numbers and emails saved for more than one contact'),
+    ('add-note <username> <title> <text> [tags...]', 'add a note to a contact (tags can be individual words or ["tag1", "tag2"] format)'),
+    ('show-note <username>', "show a contact's note"),
+    ('edit-note <username> <title> <text> [tags...]', "edit a contact's note (tags are optional)"),
+    ('remove-note <username>', "remove a contact's note"),
+    ('find-note <words> ["phrase"]', 'search notes by words, best 10 matches first ("quoted words" must appear together)'),
+    ('add-address <name> <address>', 'add a residential address to a contact record'),
+    ('change-address <name> <new_address>', 'change the residential address for a contact record'),
+    ('show-address <name>', 'get to know the residential address of a contact'),
+    ('find-by-tags [--any|--all] <tag1> <tag2> ...', 'search for notes with any (default) or all of the given tags'),
+    ('tags', 'list all tags with the number of notes using each'),
+    ('search <name>', 'search for contacts by name (partial match)'),
+    ('fuzzy <name> [max_distance]', 'search for contacts by name allowing typos (2 by default)'),
+    ('names [prefix]', 'list contact names starting with the prefix in alphabetical order'),
+    ('query <condition> [AND <condition> ...]', 'find contacts matching all conditions: name:ann, name~an, name^an, tag:work, birthday<30d, birthday:3, phone:..., email:..., note:word, address~kyiv, has:email; NOT negates'),
+    ('explain <condition> [AND <condition> ...]', 'show how a query is run: the index it starts from and how many contacts each step scanned'),
+    ('delete <name>', 'delete a record'),
+    ('import <file>', 'import contacts from a .csv, .vcf or .jsonl file'),
+    ('migrate <file>', 'copy the address book into another storage file (.pkl, .db, .sqlite, .abk or .shards)'),
+    ('rebalance <shards>', 'redistribute a sharded address book across the given number of shard files'),
+    ('report', 'show statistics for the whole address book (requires NumPy)'),
+    ('autosave', 'show background autosave statistics (latency, bytes written)'),
+    ('stats', 'show calls, errors and p50/p95/p99 latency per command (run with --metrics)'),
+    ('all [name|birthday] [page_size]', "browse contacts by name or by upcoming birthday (5 per page; use 'next'/'prev' for pagination)"),
+    ('exit', 'close the program'),
+    ('close', 'close the program'),
+]
+
+@cache
+def help_message() -> str:
+    lines = [f"    * {Fore.GREEN + usage:<60}{Fore.RESET} - {description}" for usage, description in HELP]
+    return "The following commands are available:\n" + "\n".join(lines)
+
+def say_hello(args, book) -> None:
+    render.echo(f"{Fore.YELLOW}How can I help you?{Fore.RESET}")
+
+def show_help(args, book) -> None:
+    render.echo(help_message())
+
+def show_stats(args, book) -> None:
+    metrics = COMMANDS.metrics
+    if metrics is None:
+        render.echo(f"{Fore.YELLOW}Metrics are off.{Fore.RESET} Start the assistant with {Fore.GREEN}--metrics{Fore.RESET} to collect them.")
+        return
+    rows = metrics.snapshot()
+    if not rows:
+        render.echo(f"{Fore.YELLOW}No commands have run yet.{Fore.RESET}")
+        return
+    render.echo(f"{'command':<20}{'calls':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for row in rows:
+        render.echo(f"{Fore.GREEN}{row['command']:<20}{Fore.RESET}{row['count']:>8}{row['errors']:>8}"
+              f"{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}")
+
+# Команди, яким не потрібна книга: виконуються, навіть поки вона ще завантажується
+BUILTIN_COMMANDS = {"hello": say_hello, "help": show_help, "?": show_help, "commands": show_help, "stats": show_stats}
+
+# Команда -> назва обробника в services.commands
+COMMAND_HANDLERS = {
+    "add": "add_contact",
+    "change": "change_contact",
+    "phone": "show_phone",
+    "remove": "remove_phone",
+    "who-phone": "who_phone",
+    "add-birthday": "add_birthday",
+    "change-birthday": "change_birthday",
+    "show-birthday": "show_birthday",
+    "birthdays": "birthdays",
+    "add-email": "add_email",
+    "change-email": "change_email",
+    "show-email": "show_email",
+    "remove-email": "remove_email",
+    "emails": "emails",
+    "who-email": "who_email",
+    "duplicates": "show_duplicates",
+    "add-note": "add_note",
+    "show-note": "show_note",
+    "edit-note": "edit_note",
+    "remove-note": "remove_note",
+    "find-note": "find_note",
+    "find-by-tags": "find_by_tags",
+    "tags": "show_tags",
+    "add-address": "add_address",
+    "change-address": "change_address",
+    "show-address": "show_address",
+    "delete": "delete_record",
+    "search": "search_contact",
+    "fuzzy": "fuzzy_contact",
+    "names": "show_names",
+    "query": "query_contacts",
+    "explain": "explain_query",
+    "all": "show_all_with_pagination",
+    "next": "next_page",
+    "prev": "prev_page",
+    "import": "import_contacts",
+    "migrate": "migrate",
+    "rebalance": "rebalance_shards",
+    "autosave": "autosave_stats",
+    "report": "show_report",
 }
+# Обробники, які приймають лише книгу, без аргументів
+BOOK_ONLY_HANDLERS = {"emails", "show_duplicates", "show_tags", "next_page", "prev_page", "autosave_stats", "show_report"}
+# Команди, що блокують книгу самі й частинами: імпорт звільняє її між пакетами,
+# щоб автозбереження встигало записувати вже імпортовані контакти
+SELF_LOCKING_COMMANDS = {"import"}
+# Команди, аргументи яких - шляхи до файлів: передаються як є, решта аргументів - малими літерами
+PATH_COMMANDS = {"import", "migrate"}
+
+class CommandRegistry(Mapping):
+    """
+    Command name -> handler(args, book). services.commands (and everything it
+    imports: storage backends, indexes, birthdays) is imported when the first
+    such command runs, not at startup; built-in commands work without it.
+    """
+
+    def __init__(self, builtins: dict, handlers: dict[str, str], module: str = "services.commands") -> None:
+        self._builtins = builtins
+        self._names = handlers
+        self._module = module
+        self._handlers = dict(builtins)
+        # services.metrics.Metrics, якщо main.py увімкнув метрики; None - команди не вимірюються
+        self.metrics = None
+
+    def _resolve(self, command: str):
+        function_name = self._names[command]
+        function = getattr(import_module(self._module), function_name)
+        if function_name in BOOK_ONLY_HANDLERS:
+            return lambda args, book: function(book)
+        return function
 
+    def __getitem__(self, command: str):
+        handler = self._handlers.get(command)
+        if handler is None:
+            handler = self._handlers[command] = self._resolve(command)
+        return handler
 
-COMMANDS["?"] = COMMANDS["help"]
-COMMANDS["commands"] = COMMANDS["help"]
+    def __contains__(self, command) -> bool:
+        return command in self._builtins or command in self._names
+
+    def __iter__(self):
+        yield from self._builtins
+        yield from self._names
+
+    def __len__(self) -> int:
+        return len(self._builtins) + len(self._names)
+
+    @property
+    def failed(self):
+        # Значення, яке повертає обробник, що завершився помилкою (services.commands.FAILED)
+        return import_module(self._module).FAILED
+
+COMMANDS = CommandRegistry(BUILTIN_COMMANDS, COMMAND_HANDLERS)
 
 EXIT_COMMANDS = {"exit", "close"}
 
+class BookLoader:
+    """
+    Loads the address book (and starts autosave) in a background thread, so the
+    prompt appears at once and only the first command that needs the book waits.
+    """
+
+    def __init__(self) -> None:
+        self._book = None
+        self._error = None
+        self._thread = threading.Thread(target=self._load, name="load-book", daemon=True)
+        self._thread.start()
+
+    def _load(self) -> None:
+        try:
+            from storage import load_data, start_autosave
+            book = load_data()
+            start_autosave(book)
+            self._book = book
+        except BaseException as e:
+            self._error = e
+
+    def peek(self):
+        """
+        Returns the book if it has been loaded already, otherwise None.
+        """
+        return self._book
+
+    def get(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._book
+
+def execute(user_input: str, book) -> bool | None:
+    """
+    Runs one command line through COMMANDS. Returns None for an exit command,
+    False when the command is unknown or failed, True otherwise.
+    `book` may be a BookLoader: it is waited for only if the command needs the book.
+    """
+    command, args = parse_input(user_input.strip())
+    command = command.casefold()
+    if command not in PATH_COMMANDS:
+        args = [arg.casefold() for arg in args]
+    if command in EXIT_COMMANDS:
+        return None
+
+    handler = COMMANDS.get(command)
+    if not handler:
+        render.echo(f"{Fore.RED}Unknown command was given.{Fore.RESET} Use {Fore.GREEN}'help'{Fore.RESET} for additional info.")
+        return False
+    if command in BUILTIN_COMMANDS:
+        handler(args, None)
+        return True
+    if isinstance(book, BookLoader):
+        book = book.get()
+    if COMMANDS.metrics is not None:
+        return execute_measured(command, handler, args, book)
+    # Автозбереження серіалізує записи під тим самим блокуванням
+    with command_lock(command, book):
+        return handler(args, book) is not COMMANDS.failed
+
+def command_lock(command: str, book):
+    return nullcontext() if command in SELF_LOCKING_COMMANDS else book.lock
+
+def execute_measured(command: str, handler, args, book) -> bool:
+    # Затримка включає очікування блокування книги - саме її бачить користувач чи клієнт сервера
+    succeeded = False
+    start = time.perf_counter_ns()
+    try:
+        with command_lock(command, book):
+            succeeded = handler(args, book) is not COMMANDS.failed
+        return succeeded
+    finally:
+        COMMANDS.metrics.record(command, time.perf_counter_ns() - start, not succeeded)
+
 def run_cli():
-    book = load_data()
+    # Книга завантажується, поки виводиться запрошення та користувач набирає першу команду
+    loader = BookLoader()
+    setup_completion(loader.peek, [*COMMANDS, *EXIT_COMMANDS])
     print("Welcome to the assistant bot!")
     try:
         while True:
 
-            user_input = input("Enter a command: ").strip().casefold()
+            user_input = input("Enter a command: ").strip()
             if len(user_input) < 1:
                 print(f"{Fore.RED}Too few arguments were given.{Fore.RESET} Use {Fore.GREEN}'help'{Fore.RESET} for additional info.")
                 continue
 
-            command, args = parse_input(user_input)
-
-            if command in EXIT_COMMANDS:
-                save_data(book)
+            if execute(user_input, loader) is None:
+                save(loader)
                 print(f"{Fore.YELLOW}Goodbye!{Fore.RESET}")
                 break
-            
-            handler = COMMANDS.get(command)
-
-            if handler:
-                handler(args, book)
-            else:
-                print(f"{Fore.RED}Unknown command was given.{Fore.RESET} Use {Fore.GREEN}'help'{Fore.RESET} for additional info.")
     except KeyboardInterrupt:
+        save(loader)
+
+def save(loader: BookLoader) -> None:
+    from storage import save_data
+    save_data(loader.get())
+
+def run_batch(lines, save_every: int = 0) -> int:
+    """
+    Runs commands from an iterable of lines without prompts: blank lines and
+    lines starting with '#' are skipped, an exit command stops the script.
+    Changes are saved every `save_every` mutations and once at the end.
+    Prints a summary to stderr and returns the number of failed commands.
+    """
+    from storage import load_data, save_data, start_batch_save
+    book = load_data()
+    saver = start_batch_save(book, save_every)
+    processed = 0
+    failed_lines = []
+    start = time.perf_counter()
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            result = execute(line, book)
+            if result is None:
+                break
+            processed += 1
+            if not result:
+                failed_lines.append(line_number)
+    finally:
         save_data(book)
+    elapsed = time.perf_counter() - start
+
+    rate = processed / elapsed if elapsed else 0.0
+    summary = f"Processed {processed} command(s) in {elapsed:.2f} s ({rate:.0f}/s), saves: {saver.saves}, errors: {len(failed_lines)}"
+    if failed_lines:
+        shown = ", ".join(map(str, failed_lines[:10]))
+        summary += f" (line{'s' if len(failed_lines) > 1 else ''} {shown}{', ...' if len(failed_lines) > 10 else ''})"
+    print(summary, file=sys.stderr)
+    return len(failed_lines)
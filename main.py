@@ -1,4 +1,77 @@
-from cli import run_cli
+import argparse
+import os
+import sys
+import colorama
+from cli import run_cli, run_batch, COMMANDS
+from services import render
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Personal assistant: address book and notes")
+    parser.add_argument(
+        "--batch", metavar="FILE", nargs="?", const="-",
+        help="run commands from FILE (or from stdin with '-' or no FILE) without prompts",
+    )
+    parser.add_argument(
+        "--save-every", metavar="N", type=int, default=0,
+        help="in batch mode, save after every N changes (default: once at the end)",
+    )
+    parser.add_argument(
+        "--serve", metavar="ADDRESS", nargs="?", const="",
+        help="share the address book over a socket: HOST:PORT or unix:PATH (default: $ADDRESSBOOK_SERVER or 127.0.0.1:8765)",
+    )
+    parser.add_argument(
+        "--pager", action="store_true",
+        help="show long listings through $PAGER (less by default) when running in a terminal",
+    )
+    parser.add_argument(
+        "--no-color", action="store_true",
+        help="print without colors (also when NO_COLOR is set)",
+    )
+    parser.add_argument(
+        "--metrics", action="store_true",
+        help="measure calls, errors and latency of every command (see 'stats'; also when ADDRESSBOOK_METRICS is set)",
+    )
+    parser.add_argument(
+        "--metrics-file", metavar="FILE",
+        help="collect metrics and append them to FILE as JSON Lines on exit",
+    )
+    parser.add_argument(
+        "--metrics-socket", metavar="ADDRESS",
+        help="collect metrics and serve them as JSON Lines on HOST:PORT or unix:PATH",
+    )
+    return parser.parse_args()
+
+def run(args, batch) -> None:
+    if args.serve is not None:
+        # asyncio та серверні операції потрібні лише серверному режиму
+        from server import run_server, DEFAULT_ADDRESS
+        run_server(args.serve or DEFAULT_ADDRESS, COMMANDS.metrics)
+    elif batch is None:
+        run_cli()
+    elif batch == "-":
+        sys.exit(1 if run_batch(sys.stdin, args.save_every) else 0)
+    else:
+        with open(batch, encoding="utf-8") as f:
+            sys.exit(1 if run_batch(f, args.save_every) else 0)
 
 if __name__ == "__main__":
-    run_cli()
+    args = parse_args()
+    # Без кольорів, якщо вивід іде у файл або інший процес
+    color = sys.stdout.isatty() and render.Settings.color and not args.no_color
+    colorama.init(strip=not color)
+    render.configure(pager=args.pager or None, color=color)
+    batch = args.batch if args.batch is not None else (None if sys.stdin.isatty() else "-")
+    metrics_enabled = os.environ.get("ADDRESSBOOK_METRICS", "") not in ("", "0")
+    if not (args.metrics or args.metrics_file or args.metrics_socket or metrics_enabled):
+        run(args, batch)
+    else:
+        from services.metrics import Metrics, MetricsExporter
+        COMMANDS.metrics = Metrics()
+        exporter = MetricsExporter(COMMANDS.metrics, args.metrics_socket).start() if args.metrics_socket else None
+        try:
+            run(args, batch)
+        finally:
+            if exporter is not None:
+                exporter.stop()
+            if args.metrics_file:
+                COMMANDS.metrics.dump(args.metrics_file)
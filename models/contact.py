@@ -1,15 +1,39 @@
 from services.exceptions import PhoneAlreadyExistsError, EmailAlreadyExistsError
-from datetime import datetime
+from datetime import datetime, date
+from functools import wraps
 import re
+import sys
+import threading
+
+# Моделі використовують __slots__: у великій книзі накладні витрати на __dict__
+# кожного поля займали більше пам'яті, ніж самі дані.
+# __setstate__ приймає і старі збереження, де стан полів був словником __dict__.
 
 class Field:
+    __slots__ = ("value",)
+
     def __init__(self, value: str) -> None:
         self.value = value
 
     def __str__(self) -> str:
         return self.value
 
+    def __getstate__(self) -> dict:
+        return {key: getattr(self, key) for key in _slots(type(self)) if hasattr(self, key)}
+
+    def __setstate__(self, state) -> None:
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = {**(dict_state or {}), **(slots_state or {})}
+        for key, value in state.items():
+            setattr(self, key, value)
+
+def _slots(cls) -> list[str]:
+    return [key for klass in cls.__mro__ for key in getattr(klass, "__slots__", ())]
+
 class Name(Field):
+    __slots__ = ()
+
     def __init__(self, name: str) -> None:
         if not name.isalpha():
             raise ValueError("Name must be alphabetic")
@@ -22,6 +46,8 @@ class Name(Field):
         return self.value
 
 class Phone(Field):
+    __slots__ = ()
+
     def __init__(self, phone: str) -> None:
         match_phone = re.fullmatch(r"\+?\d{10,15}", phone)
         if match_phone:
@@ -38,17 +64,44 @@ class Phone(Field):
         return self.value
 
 class Birthday(Field):
+    # Дата зберігається як порядковий номер дня (date.toordinal), рядок і datetime обчислюються
+    __slots__ = ("ordinal",)
+
     def __init__(self, birthday: str) -> None:
         try:
-            self.birthday = datetime.strptime(birthday, "%d.%m.%Y")
-            super().__init__(birthday)
+            self.ordinal = datetime.strptime(birthday, "%d.%m.%Y").toordinal()
         except ValueError:
             raise ValueError("Invalid date format. Use DD.MM.YYYY")
 
+    @property
+    def value(self) -> str:
+        day = self.date
+        return f"{day.day:02d}.{day.month:02d}.{day.year:04d}"
+
+    @property
+    def date(self) -> date:
+        return date.fromordinal(self.ordinal)
+
+    @property
+    def birthday(self) -> datetime:
+        return datetime.fromordinal(self.ordinal)
+
+    def __getstate__(self) -> dict:
+        return {"ordinal": self.ordinal}
+
+    def __setstate__(self, state) -> None:
+        # Старі збереження: {"birthday": datetime, "value": "DD.MM.YYYY"}
+        if "ordinal" in state:
+            self.ordinal = state["ordinal"]
+        else:
+            self.ordinal = state["birthday"].toordinal()
+
     def __str__(self):
         return self.value
     
 class Email(Field):
+    __slots__ = ()
+
     def __init__(self, email: str) -> None:
         valid_email = re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email)
         if valid_email:
@@ -60,13 +113,45 @@ class Email(Field):
         return self.value
     
 class Address(Field):
+    __slots__ = ()
+
     def __init__(self, address: str) -> None:
         super().__init__(address.title())
     
     def __str__(self) -> str:
         return self.value
 
+# Блокування записів: окремий Lock у кожному записі коштував би більше пам'яті, ніж сам запис,
+# тож записи ділять невеликий набір блокувань за хешем імені (ім'я запису не змінюється)
+RECORD_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+def mutator(field: str):
+    """
+    Runs a Record method under the record's lock, then tells the owning book which field changed.
+    Before the change the book may keep the record's current state for its open snapshots.
+    The book is notified after the record lock is released, so the two locks never nest.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.lock:
+                owner = self._owner
+                if owner is not None and owner._snapshots:
+                    owner._preserve(self)
+                result = method(self, *args, **kwargs)
+            self._changed(field)
+            return result
+        return wrapper
+    return decorator
+
 class Record:
+    # _owner - книга, якій належить запис; отримує сповіщення про зміни (не серіалізується).
+    # Списки phones / emails і нотатка не змінюються на місці, а замінюються новими:
+    # потік, що читає запис без блокування, бачить або старий, або новий стан.
+    # __weakref__ потрібен кешу SQLite-книги, щоб один контакт не мав двох об'єктів Record
+    __slots__ = ("name", "phones", "birthday", "emails", "address", "note", "_owner", "__weakref__")
+    _transient = ("_owner", "__weakref__")
+
     def __init__(self, name: str) -> None:
         self.name = Name(name)
         self.phones = []
@@ -74,26 +159,36 @@ class Record:
         self.emails = []
         self.address = None
         self.note = None
-      
+        self._owner = None
+
+    @property
+    def lock(self) -> threading.Lock:
+        return RECORD_LOCKS[hash(self.name.value) % len(RECORD_LOCKS)]
+
+    @mutator("birthday")
     def add_birthday(self, birthday: str) -> None:
         self.birthday = Birthday(birthday)
 
+    @mutator("birthday")
     def change_birthday(self, birthday: str) -> None:
         self.birthday = Birthday(birthday)
 
+    @mutator("phones")
     def add_phone(self, phone: str) -> None:
         if self.find_phone(phone):
             raise PhoneAlreadyExistsError(self.name.value)
         phone_obj = Phone(phone)
-        self.phones.append(phone_obj)
+        self.phones = [*self.phones, phone_obj]
 
+    @mutator("phones")
     def remove_phone(self, phone: str) -> None:
         phone_obj = self.find_phone(phone)
         if phone_obj:
-            self.phones.remove(phone_obj)
+            self.phones = [p for p in self.phones if p is not phone_obj]
         else:
             raise ValueError("Phone number not found.")
 
+    @mutator("phones")
     def change_phone(self, old_phone: str, new_phone: str) -> None:
         old_phone_obj = self.find_phone(old_phone)
         new_phone_exists = self.find_phone(new_phone)
@@ -103,9 +198,8 @@ class Record:
         elif new_phone_exists:
             raise PhoneAlreadyExistsError(self.name.value)
         else:
-            self.phones.remove(old_phone_obj)
             new_phone_obj = Phone(new_phone)
-            self.phones.append(new_phone_obj)
+            self.phones = [p for p in self.phones if p is not old_phone_obj] + [new_phone_obj]
 
     def find_phone(self, phone: str) -> Phone | None:
         for p in self.phones:
@@ -114,15 +208,18 @@ class Record:
         return None
     
 
+    @mutator("note")
     def add_note(self, title: str, text: str, tags: list[str] | None = None) -> None:
         note = Note(title, text, tags or [])
         self.note = note
 
+    @mutator("emails")
     def add_email(self, email: str) -> None:
         if self.find_email(email):
             raise EmailAlreadyExistsError(self.name.value)
-        self.emails.append(Email(email))
+        self.emails = [*self.emails, Email(email)]
 
+    @mutator("emails")
     def change_email(self, old_email: str, new_email: str) -> None:
         old_email_obj = self.find_email(old_email)
         new_email_obj = self.find_email(new_email)
@@ -132,16 +229,16 @@ class Record:
         elif new_email_obj:
             raise EmailAlreadyExistsError(self.name.value)
         else:
-            self.emails.remove(old_email_obj)
             new_email_obj = Email(new_email)
-            self.emails.append(new_email_obj)
+            self.emails = [e for e in self.emails if e is not old_email_obj] + [new_email_obj]
 
+    @mutator("emails")
     def remove_email(self, email: str) -> None:
         email_obj = self.find_email(email)
         if email_obj is None:
             raise ValueError("Email not found.")
         else:
-            self.emails.remove(email_obj)
+            self.emails = [e for e in self.emails if e is not email_obj]
 
     def find_email(self, email: str) -> Email | None:
         for el in self.emails:
@@ -149,47 +246,124 @@ class Record:
                 return el
         return None
     
+    @mutator("address")
     def add_address(self, address: str) -> None:
         self.address = Address(address)
 
+    @mutator("address")
     def change_address(self, address: str) -> None:
         self.address = Address(address)
 
+    @mutator("note")
     def remove_note(self) -> None:
         if self.note:
             self.note = None
         else:
             raise ValueError("No note to remove.")
 
+    @mutator("note")
     def edit_note(self, title: str, text: str, tags: list[str] | None = None) -> None:
         if self.note:
-            self.note.title = title
-            self.note.text = text
-            if tags is not None:
-                self.note.tags = tags
+            self.note = Note(title, text, self.note.tags if tags is None else tags)
         else:
             raise ValueError("No note to edit.")
     
+    def copy(self) -> "Record":
+        """
+        Returns a detached shallow copy. Fields are never changed in place, so the copy
+        keeps the record's current state however the record changes later.
+        """
+        clone = Record.__new__(Record)
+        clone.name = self.name
+        clone.phones = self.phones
+        clone.birthday = self.birthday
+        clone.emails = self.emails
+        clone.address = self.address
+        clone.note = self.note
+        clone._owner = None
+        return clone
+
+    def _changed(self, field: str) -> None:
+        if self._owner is not None:
+            self._owner._record_changed(self, field)
+
+    def __getstate__(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__ if key not in self._transient}
+
+    def __setstate__(self, state) -> None:
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = {**(dict_state or {}), **(slots_state or {})}
+        self.phones = []
+        self.birthday = None
+        self.emails = []
+        self.address = None
+        self.note = None
+        for key, value in state.items():
+            if key not in self._transient:
+                setattr(self, key, value)
+        self._owner = None
+
     def __str__(self) -> str:
-        info = [
-            f"Contact name: {str(self.name).capitalize()}",
-            f"Phones: {', '.join(p.value for p in self.phones) if self.phones else '—'}",
-            f"Birthday: {self.birthday if self.birthday else '—'}",
-            f"Emails: {', '.join(e.value for e in self.emails) if self.emails else '—'}",
-            f"Address: {self.address if self.address else '—'}",
+        # Одне форматування замість списку рядків: у великих списках __str__ викликається для кожного запису
+        phones = ", ".join([p.value for p in self.phones]) or "—"
+        emails = ", ".join([e.value for e in self.emails]) or "—"
+        return (
+            f"Contact name: {self.name.value}\n"
+            f"Phones: {phones}\n"
+            f"Birthday: {self.birthday if self.birthday else '—'}\n"
+            f"Emails: {emails}\n"
+            f"Address: {self.address if self.address else '—'}\n"
             f"Note: {self.note if self.note else '—'}"
-        ]
-        return "\n".join(info)
+        )
+
+def normalize_tags(tags) -> frozenset[str]:
+    """
+    Brings tags to one canonical form: a frozenset of casefolded tags.
+    Accepts every shape tags were stored in before: a list of tags, a list holding
+    one comma-joined string (["tag1,tag2"]) and a bracketed string ('["tag1,tag2"]').
+    """
+    if not tags:
+        return frozenset()
+    if isinstance(tags, str):
+        tags = [tags]
+    result = set()
+    for item in tags:
+        for tag in str(item).split(","):
+            tag = tag.strip().strip('[]"\'').strip().casefold()
+            if tag:
+                # Одні й ті самі теги повторюються в тисячах нотаток
+                result.add(sys.intern(tag))
+    return frozenset(result)
 
 class Note(Field):
+    __slots__ = ("title", "text", "_tags")
+
     def __init__(self, title: str, text: str, tags: list[str] | None = None) -> None:
         if not title.strip():
             raise ValueError("Note title cannot be empty.")
         self.title = title.strip()
         self.text = text.strip()
-        self.tags = tags or []
+        self.tags = tags
+
+    @property
+    def tags(self) -> frozenset[str]:
+        return self._tags
+
+    @tags.setter
+    def tags(self, tags) -> None:
+        self._tags = normalize_tags(tags)
+
+    def __setstate__(self, state) -> None:
+        # Нотатки зі старих збережень містять теги у "сирому" вигляді
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = {**(dict_state or {}), **(slots_state or {})}
+        self.title = state["title"]
+        self.text = state["text"]
+        self.tags = state.get("_tags", state.get("tags"))
 
     def __str__(self) -> str:
-        tags_str = f" [Tags: {', '.join(self.tags)}]" if self.tags else ""
+        tags_str = f" [Tags: {', '.join(sorted(self.tags))}]" if self.tags else ""
         return f"{self.title}: {self.text}{tags_str}"
 
@@ -0,0 +1,141 @@
+import asyncio
+import contextlib
+import json
+import os
+import re
+import signal
+import sys
+import time
+from storage import load_data, save_data, start_autosave
+from services import render
+from services.api import OPERATIONS, check_arguments
+from services.commands import save_changes
+from services.pagination import Viewer, current_viewer
+
+# Серверний режим: одна книга в пам'яті спільна для багатьох клієнтів.
+# Протокол: по одному JSON-об'єкту в рядку в обидва боки.
+#   запит:     {"id": 1, "op": "phone", "args": {"name": "ann"}}
+#   відповідь: {"id": 1, "ok": true, "result": {...}} або {"id": 1, "ok": false, "error": "..."}
+# Операція "command" виконує будь-яку команду CLI ({"line": "add ann 0501234567"})
+# і повертає її текстовий вивід, крім команд, що читають чи пишуть файли сервера.
+DEFAULT_ADDRESS = os.environ.get("ADDRESSBOOK_SERVER", "127.0.0.1:8765")
+ANSI_CODES = re.compile(r"\x1b\[[0-9;]*m")
+# Команди з доступом до файлової системи сервера: через мережу не виконуються
+LOCAL_COMMANDS = {"import", "migrate", "rebalance"}
+
+
+def run_command(book, line: str) -> dict:
+    # Імпорт тут, бо cli імпортує всі команди та readline
+    from cli import execute
+    command = line.strip().split(" ")[0].casefold()
+    if command in LOCAL_COMMANDS:
+        raise ValueError(f"Command '{command}' is only available in the local command line.")
+    # Вивід збирається в буфер лише цього виклику; sys.stdout не підміняється
+    with render.capture() as output:
+        result = execute(line, book)
+    if result is None:
+        raise ValueError("Exit commands are not available over the network.")
+    return {"success": result, "output": ANSI_CODES.sub("", output.getvalue())}
+
+
+class BookServer:
+    def __init__(self, book, metrics=None) -> None:
+        self.book = book
+        # Операції API записуються як "api:<op>"; op "command" вимірює сам cli.execute
+        self.metrics = metrics
+
+    def _execute(self, handler, args: dict, write: bool):
+        # Виконується в пулі потоків під блокуванням самої книги: читання - спільно, зміни - по одній.
+        # Команда CLI блокує книгу й зберігає зміни сама (cli.execute), як і в командному рядку
+        if handler is run_command:
+            return handler(self.book, **args)
+        with self.book.lock.write() if write else self.book.lock.read():
+            result = handler(self.book, **args)
+        if write:
+            save_changes(self.book)
+        return result
+
+    async def dispatch(self, request) -> dict:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be a JSON object."}
+        response = {"id": request.get("id")}
+        op = request.get("op")
+        args = request.get("args", {})
+        if op == "command":
+            handler, write = run_command, True
+        elif op in OPERATIONS:
+            handler, write = OPERATIONS[op]
+        else:
+            return {**response, "ok": False, "error": f"Unknown operation '{op}'."}
+        # Аргументи перевіряються тут один раз, обробники вже не розбирають словник
+        try:
+            check_arguments(handler, args)
+        except ValueError as e:
+            return {**response, "ok": False, "error": str(e)}
+        # SQLite-з'єднання не можна використовувати з кількох потоків одночасно
+        write = write or not self.book.concurrent_reads
+        measured = self.metrics is not None and op != "command"
+        if measured:
+            start = time.perf_counter_ns()
+        try:
+            result = await asyncio.to_thread(self._execute, handler, args, write)
+        except Exception as e:
+            response = {**response, "ok": False, "error": ANSI_CODES.sub("", str(e))}
+        else:
+            response = {**response, "ok": True, "result": result}
+        if measured:
+            self.metrics.record(f"api:{op}", time.perf_counter_ns() - start, not response["ok"])
+        return response
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Запити одного з'єднання виконуються по черзі, різні з'єднання - паралельно.
+        # Кожне з'єднання має власну сесію перегляду для команд all / next / prev
+        current_viewer.set(Viewer())
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as e:
+                    response = {"ok": False, "error": f"Invalid JSON: {e.msg}"}
+                else:
+                    response = await self.dispatch(request)
+                writer.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(book, address: str = DEFAULT_ADDRESS, metrics=None) -> None:
+    server = BookServer(book, metrics)
+    if address.startswith("unix:"):
+        path = address[len("unix:"):]
+        listener = await asyncio.start_unix_server(server.handle, path=path)
+    else:
+        path = None
+        host, _, port = address.rpartition(":")
+        listener = await asyncio.start_server(server.handle, host or "127.0.0.1", int(port))
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+    print(f"Serving the address book on {address}", file=sys.stderr)
+    async with listener:
+        await stop.wait()
+    if path is not None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def run_server(address: str = DEFAULT_ADDRESS, metrics=None) -> None:
+    book = load_data()
+    start_autosave(book)
+    try:
+        asyncio.run(serve(book, address, metrics))
+    finally:
+        save_data(book)
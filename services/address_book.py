@@ -1,94 +1,364 @@
+import threading
 from collections import UserDict
 from services.exceptions import ArgumentInstanceError
-from models.contact import Record
+from models.contact import Record, RECORD_LOCKS, normalize_tags
+from services.locks import ReadWriteLock, reading, writing
+from services.snapshot import BookSnapshot
+from services.indexes import (
+    TrigramIndex, BKTree, PrefixTrie, NameOrder, NoteIndex, TagIndex, ValueIndex, BirthdayIndex, SortedKeys,
+    normalize_phone, normalize_email
+)
+
+# Захищає список відкритих знімків; знімок звільняється без блокування книги,
+# тож фоновий потік збереження не чекає на команду, яка саме виконується
+SNAPSHOTS_LOCK = threading.Lock()
 
 
 class AddressBook(UserDict):
+    """
+    Contacts by name with lazily built search indexes.
+
+    The book can be shared between threads: find and the search methods run under
+    the shared side of `lock` (services.locks.ReadWriteLock), add_record, delete and
+    index updates after a record change under its exclusive side. Record mutators
+    lock the record itself (models.contact.mutator) and update the indexes right after,
+    so a lookup running at that moment may still find the record by its previous value.
+    Code that walks `data` directly or iterates names_with_prefix should hold
+    `lock.read()` while doing so.
+    """
+    # Сховище для поступового збереження змінених записів (storage.journal.Journal,
+    # storage.shard_backend.ShardStore) та автозбереження (storage.autosave.AutoSaver),
+    # не зберігаються разом із книгою
+    store = None
+    autosave = None
+    # Сесія посторінкового перегляду команд all / next / prev (services.pagination.PageSession)
+    pages = None
+    # Індекси будуються під час першого запиту, який їх потребує:
+    # триграми імен для search_by_name, BK-дерево імен для fuzzy_search / suggest,
+    # префіксне дерево імен для names_with_prefix (автодоповнення), повнотекстовий індекс нотаток для find_by_note,
+    # теги нотаток для find_by_tags, телефони та email для find_by_phone / find_by_email,
+    # календар днів народження для birthdays_between, впорядковані імена та календар для посторінкового перегляду
+    _trigrams = None
+    _fuzzy = None
+    _prefixes = None
+    _name_order = None
+    _notes = None
+    _tags = None
+    _phones = None
+    _emails = None
+    _birthdays = None
+    # Індекси імен, які залежать лише від складу книги
+    _name_indexes = ("_trigrams", "_fuzzy", "_prefixes", "_name_order")
+    # Індекс записів -> поле Record, від якого він залежить
+    _record_indexes = {"_notes": "note", "_tags": "note", "_phones": "phones", "_emails": "emails", "_birthdays": "birthday"}
+    # Чи можуть запити на читання виконуватися з кількох потоків одночасно (серверний режим)
+    concurrent_reads = True
+    # Стовпцевий знімок книги для аналітики (services.columns), перебудовується після змін
+    _columns = None
+    # Чи можна взяти знімок із копіюванням під час запису (потрібен звичайний словник записів)
+    supports_snapshots = True
+    # Відкриті знімки (services.snapshot.BookSnapshot); кортеж замінюється цілком, тож читається без блокування
+    _snapshots = ()
+    # Чи ділить книга поточний словник записів зі знімком
+    _data_shared = False
+    # Атрибути, які не серіалізуються разом із книгою
+    _transient = ("store", "autosave", "pages", "dirty", "lock", "generation", "_columns", "_snapshots", "_data_shared",
+                  *_name_indexes, *_record_indexes)
+
+    def __init__(self, *args, **kwargs) -> None:
+        # Імена записів, змінених або видалених після останнього збереження
+        self.dirty = set()
+        self.lock = ReadWriteLock()
+        # Лічильник змін книги: за ним похідні знімки визначають, що застаріли
+        self.generation = 0
+        super().__init__(*args, **kwargs)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for key in self._transient:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.dirty = set()
+        self.lock = ReadWriteLock()
+        self.generation = 0
+        for record in self.data.values():
+            record._owner = self
+
+    def _built_indexes(self, field: str | None = None):
+        for attr, index_field in self._record_indexes.items():
+            index = getattr(self, attr)
+            if index is not None and field in (None, index_field):
+                yield index
+
+    def _index(self, attr: str, factory):
+        index = getattr(self, attr)
+        if index is None:
+            index = factory(self.data.items())
+            setattr(self, attr, index)
+        return index
+
+    @writing
+    def _record_changed(self, record: Record, field: str) -> None:
+        name = str(record.name)
+        self.dirty.add(name)
+        self.generation += 1
+        for index in self._built_indexes(field):
+            index.discard(name)
+            index.add(name, record)
+
+    def _index_add(self, record: Record) -> None:
+        name = str(record.name)
+        for attr in self._name_indexes:
+            if getattr(self, attr) is not None:
+                getattr(self, attr).add(name)
+        for index in self._built_indexes():
+            index.add(name, record)
+
+    def _index_discard(self, record: Record) -> None:
+        name = str(record.name)
+        for attr in self._name_indexes:
+            if getattr(self, attr) is not None:
+                getattr(self, attr).discard(name)
+        for index in self._built_indexes():
+            index.discard(name)
+
+    def take_dirty(self) -> set[str]:
+        dirty, self.dirty = self.dirty, set()
+        return dirty
+
+    @writing
+    def snapshot(self) -> BookSnapshot:
+        """
+        Returns a frozen view of the book in O(1): the snapshot shares the records and
+        copy-on-write keeps its state while the book changes. Release it when done.
+
+        While the snapshot is open, the first add_record() or delete() copies the
+        book's dict once (O(n), about 2 ms per 100k contacts); later ones and record
+        changes are not affected, and nothing is copied after release().
+        """
+        if not self.supports_snapshots:
+            raise TypeError(f"{type(self).__name__} does not support snapshots")
+        # Усі блокування записів: жодна зміна запису не виконується, поки знімок реєструється
+        for lock in RECORD_LOCKS:
+            lock.acquire()
+        try:
+            snapshot = BookSnapshot(self, self.data, self.generation)
+            with SNAPSHOTS_LOCK:
+                self._snapshots = (*self._snapshots, snapshot)
+            self._data_shared = True
+        finally:
+            for lock in reversed(RECORD_LOCKS):
+                lock.release()
+        return snapshot
+
+    def _release(self, snapshot: BookSnapshot) -> None:
+        with SNAPSHOTS_LOCK:
+            self._snapshots = tuple(open_snapshot for open_snapshot in self._snapshots if open_snapshot is not snapshot)
+
+    def _preserve(self, record: Record) -> None:
+        # Викликається під блокуванням запису перед його зміною (models.contact.mutator)
+        name = record.name.value
+        image = None
+        for snapshot in self._snapshots:
+            if snapshot._data.get(name) is record and name not in snapshot._saved:
+                if image is None:
+                    image = record.copy()
+                snapshot._saved[name] = image
+
+    def _unshare(self) -> None:
+        # Перед зміною складу книги словник, спільний із відкритим знімком, замінюється копією.
+        # Копія - O(n), але лише одна на знімок: знімок читають без блокування книги, тож
+        # ітерувати його словник, поки книга додає чи видаляє контакти, не можна. Якщо знімок
+        # уже звільнено (компактизація встигла серіалізувати), словник не копіюється зовсім
+        if self._data_shared:
+            if self._snapshots:
+                self.data = dict(self.data)
+            self._data_shared = False
+
+    @writing
     def add_record(self, record: Record) -> None:
         if not isinstance(record, Record):
             raise ArgumentInstanceError("The argument must be a record")
         elif str(record.name) in self.data.keys():
             raise ValueError("Name is already in address book")
+        self._unshare()
         self.data[str(record.name)] = record
+        record._owner = self
+        self.dirty.add(str(record.name))
+        self.generation += 1
+        self._index_add(record)
 
+    @reading
     def find(self, name: str) -> Record | None:
         try:
             return self.data[name.casefold().capitalize()]
         except KeyError:
             return None
 
+    @reading
     def search_by_name(self, query: str) -> list[Record]:
         """
-        Returns a list of Records where the name contains the query string (case-insensitive).
+        Returns a list of Records where the name contains the query string (case-insensitive),
+        sorted by casefolded name. Queries of three or more characters go through the trigram index.
         """
-        results = []
         query_lower = query.casefold()
-        
-        for record in self.data.values():
-            if query_lower in str(record.name).casefold():
-                results.append(record)
-        
-        return results
+        if len(query_lower) < 3:
+            names = sorted((name for name in self.data if query_lower in name.casefold()), key=str.casefold)
+        else:
+            if self._trigrams is None:
+                self._trigrams = TrigramIndex(self.data)
+            names = self._trigrams.search(query_lower)
+        return [self.data[name] for name in names]
 
-    def delete(self, name: str) -> None:
-        try:
-            self.data.pop(name.casefold().capitalize())
-        except KeyError:
+    @reading
+    def fuzzy_search(self, query: str, max_distance: int = 2) -> list[tuple[Record, int]]:
+        """
+        Returns (Record, edit distance) pairs for names within max_distance edits of the query
+        (case-insensitive), closest first.
+        """
+        if max_distance < 0:
+            raise ValueError("Maximum distance must not be negative")
+        matches = self._index("_fuzzy", lambda _: BKTree(self.data)).search(query, max_distance)
+        return [(self.data[name], distance) for name, distance in matches]
+
+    def names_with_prefix(self, prefix: str):
+        """
+        Yields contact names starting with the prefix (case-insensitive) in sorted order.
+        """
+        return self._index("_prefixes", lambda _: PrefixTrie(self.data)).iter_prefix(prefix)
+
+    @reading
+    def suggest(self, name: str, limit: int = 3) -> list[str]:
+        """
+        Returns up to `limit` names close to a name that was not found, for "did you mean" hints.
+        """
+        # Для коротких імен допускаємо лише одну помилку, інакше підказки випадкові
+        max_distance = 1 if len(name) <= 4 else 2
+        return [str(record.name) for record, _ in self.fuzzy_search(name, max_distance)[:limit]]
+
+    @writing
+    def delete(self, name: str) -> Record | None:
+        name = name.casefold().capitalize()
+        if name not in self.data:
             return None
-        
-    def find_by_note(self, query: str):
+        self._unshare()
+        record = self.data.pop(name)
+        if self._snapshots:
+            # Від'єднаний запис ще можуть змінити, а знімки мають зберегти його стан на момент знімка
+            with record.lock:
+                self._preserve(record)
+        record._owner = None
+        self.dirty.add(str(record.name))
+        self.generation += 1
+        self._index_discard(record)
+        return record
+
+    @reading
+    def find_by_note(self, query: str, limit: int = 10) -> list[Record]:
         """
-        Returns a list of Records where the note title or text contains the query string (case-insensitive).
+        Returns up to `limit` Records whose note title or text matches the query words,
+        best matches first (BM25). Words in double quotes must appear as a phrase.
         """
-        results = []
-        for record in self.data.values():
-            try:
-                if record.note and hasattr(record.note, 'title') and hasattr(record.note, 'text'):
-                    title_match = query.casefold() in record.note.title.casefold()
-                    text_match = query.casefold() in record.note.text.casefold()
-                    if title_match or text_match:
-                        results.append(record)
-            except AttributeError:
-                continue
-        return results
-
-    def find_by_tags(self, tags: list[str]):
-        results = []
-        for record in self.data.values():
-            try:
-                if record.note and hasattr(record.note, 'tags') and record.note.tags:
-                    # Handle both list format and comma-separated string format
-                    note_tags = record.note.tags
-                    if isinstance(note_tags, list):
-                        # If tags are already in list format
-                        # Check if it's a list of individual tags or a list with one comma-separated string
-                        if len(note_tags) == 1 and ',' in note_tags[0]:
-                            # Handle case like ["tag1,tag2"] - list with one comma-separated string
-                            note_tags_str = note_tags[0]
-                            note_tags_lower = [tag.strip().casefold() for tag in note_tags_str.split(',')]
-                        else:
-                            # Handle case like ["tag1", "tag2"] - list of individual tags
-                            note_tags_lower = [tag.casefold() for tag in note_tags]
-                    else:
-                        # If tags are stored as a comma-separated string, split them
-                        note_tags_str = str(note_tags)
-                        if note_tags_str.startswith('"') and note_tags_str.endswith('"'):
-                            note_tags_str = note_tags_str[1:-1]  
- 
-                        if note_tags_str.startswith('[') and note_tags_str.endswith(']'):
-                            note_tags_str = note_tags_str[1:-1]  
-                        note_tags_lower = [tag.strip().casefold() for tag in note_tags_str.split(',')]
-                    
-                    search_tags_lower = [tag.casefold() for tag in tags]
-                    
-                    matching_tags = [tag for tag in search_tags_lower if tag in note_tags_lower]
-                    
-                    if matching_tags:
-                        results.append((record, matching_tags))
-            except AttributeError:
-                continue
-        return results     
+        index = self._index("_notes", NoteIndex)
+        return [self.data[name] for name in index.search(query, limit)]
+
+    @reading
+    def find_by_tags(self, tags: list[str], match_all: bool = False) -> list[tuple[Record, list[str]]]:
+        """
+        Returns (Record, matching tags) pairs sorted by name for notes having any of the tags,
+        or all of them when match_all is set.
+        """
+        search_tags = sorted(normalize_tags(tags))
+        index = self._index("_tags", TagIndex)
+        return [
+            (self.data[name], [tag for tag in search_tags if tag in index.tags_of(name)])
+            for name in sorted(index.search(search_tags, match_all))
+        ]
+
+    @reading
+    def tag_counts(self) -> list[tuple[str, int]]:
+        """
+        Returns (tag, number of notes) pairs, most used tags first.
+        """
+        return self._index("_tags", TagIndex).counts()
+
+    def _phone_index(self) -> ValueIndex:
+        return self._index("_phones", lambda records: ValueIndex(
+            lambda record: [phone.value for phone in record.phones], normalize_phone, records))
+
+    def _email_index(self) -> ValueIndex:
+        return self._index("_emails", lambda records: ValueIndex(
+            lambda record: [email.value for email in record.emails], normalize_email, records))
+
+    @reading
+    def find_by_phone(self, phone: str) -> list[Record]:
+        """
+        Returns the Records that have the given phone number, sorted by name.
+        """
+        return [self.data[name] for name in sorted(self._phone_index().owners(phone))]
+
+    @reading
+    def find_by_email(self, email: str) -> list[Record]:
+        """
+        Returns the Records that have the given email address (case-insensitive), sorted by name.
+        """
+        return [self.data[name] for name in sorted(self._email_index().owners(email))]
+
+    @reading
+    def duplicates(self) -> dict[str, dict[str, list[str]]]:
+        """
+        Returns phone numbers and emails saved for more than one contact, with the contacts' names.
+        """
+        return {
+            "phones": {value: sorted(names) for value, names in self._phone_index().duplicates().items()},
+            "emails": {value: sorted(names) for value, names in self._email_index().duplicates().items()},
+        }
+
+    @reading
+    def birthdays_between(self, start: tuple[int, int], end: tuple[int, int]) -> list[Record]:
+        """
+        Returns Records with a birthday from start to end inclusive, both given as (month, day),
+        in calendar order.
+        """
+        return [self.data[name] for name in self._index("_birthdays", BirthdayIndex).between(start, end)]
+
+    def order_index(self, order: str) -> SortedKeys:
+        """
+        Returns the sorted index behind a page order: names for "name",
+        (month, day, name) keys of contacts with a birthday for "birthday".
+        Hold lock.read() while reading from it.
+        """
+        if order == "name":
+            return self._index("_name_order", lambda _: NameOrder(self.data))
+        if order == "birthday":
+            return self._index("_birthdays", BirthdayIndex)
+        raise ValueError(f"Unknown order '{order}'. Use 'name' or 'birthday'.")
+
+    def to_columns(self) -> "BookColumns":
+        """
+        Returns a columnar NumPy view of the book for aggregate queries.
+        The view is cached and rebuilt on the next call after the book changes.
+        """
+        # NumPy завантажується лише для аналітики, а не під час запуску програми
+        from services.columns import BookColumns
+        with self.lock.read():
+            if self._columns is None or self._columns.generation != self.generation:
+                self._columns = BookColumns(self)
+            return self._columns
+
+    def import_file(self, path: str, batch_size: int | None = None, workers: int | None = None, on_batch=None):
+        """
+        Streams contacts from a CSV, vCard or JSON Lines file into the book.
+        Returns an ImportReport; rejected rows are written next to the input file.
+        """
+        # Імпортер тягне за собою пул процесів, тож завантажується лише для імпорту
+        from services import importer
+        return importer.import_file(self, path, batch_size or importer.BATCH_SIZE, workers, on_batch)
 
+    @reading
     def __str__(self) -> str:
         result = "Your contact list:\n" + "\n".join([f"{record}" for record in self.data.values()]) 
         return result
@@ -0,0 +1,189 @@
+import inspect
+import types
+import typing
+from functools import wraps
+from itertools import islice
+from models.contact import Record
+from services.address_book import AddressBook
+from services.pagination import PageSession
+from services import changes
+from services.changes import clean_phone, not_found
+from birthday import get_upcoming_birthdays
+
+# Операції для серверного режиму. Аргументи передаються словником і один раз перевіряються
+# за сигнатурою обробника (check_arguments), а результат повертається як дані, придатні для JSON.
+# Сервер викликає обробники вже під блокуванням книги (читання чи зміна - за OPERATIONS).
+# Зміни виконуються тими самими функціями services/changes.py, що й команди CLI,
+# тож правила (наприклад, "нотатка вже існує") однакові для обох. Помилки передаються винятками.
+
+
+def record_to_dict(record: Record) -> dict:
+    note = record.note
+    return {
+        "name": str(record.name),
+        "phones": [phone.value for phone in record.phones],
+        "emails": [email.value for email in record.emails],
+        "birthday": record.birthday.value if record.birthday else None,
+        "address": record.address.value if record.address else None,
+        "note": {"title": note.title, "text": note.text, "tags": sorted(note.tags)} if note else None,
+    }
+
+
+def _record(book: AddressBook, name: str) -> Record:
+    record = book.find(name)
+    if record is None:
+        raise not_found(name, book)
+    return record
+
+
+def _accepts(annotation, value) -> bool:
+    if annotation is inspect.Parameter.empty:
+        return True
+    options = typing.get_args(annotation) if isinstance(annotation, types.UnionType) else (annotation,)
+    for option in options:
+        kind = typing.get_origin(option) or option
+        if option is type(None):
+            if value is None:
+                return True
+        elif kind is int and isinstance(value, bool):
+            continue
+        elif isinstance(value, kind):
+            item_types = typing.get_args(option)
+            if not item_types or all(isinstance(item, item_types[0]) for item in value):
+                return True
+    return False
+
+
+def check_arguments(handler, args) -> None:
+    """
+    Checks request arguments against the handler's keyword parameters (everything
+    after `book`): args must be a JSON object with known names, every required
+    name present and every value of the annotated type. Raises ValueError.
+    """
+    if not isinstance(args, dict):
+        raise ValueError("Arguments must be a JSON object.")
+    parameters = dict(list(inspect.signature(handler).parameters.items())[1:])
+    for name, value in args.items():
+        parameter = parameters.get(name)
+        if parameter is None:
+            raise ValueError(f"Unknown argument '{name}'.")
+        if not _accepts(parameter.annotation, value):
+            raise ValueError(f"Argument '{name}' has the wrong type.")
+    for name, parameter in parameters.items():
+        if parameter.default is inspect.Parameter.empty and name not in args:
+            raise ValueError(f"Missing argument '{name}'.")
+
+
+# Читання
+
+def show_contact(book: AddressBook, name: str) -> dict:
+    return record_to_dict(_record(book, name))
+
+
+def show_phone(book: AddressBook, name: str) -> dict:
+    record = _record(book, name)
+    return {"name": str(record.name), "phones": [phone.value for phone in record.phones]}
+
+
+def search(book: AddressBook, query: str) -> list[dict]:
+    return [record_to_dict(record) for record in book.search_by_name(query)]
+
+
+def fuzzy(book: AddressBook, query: str, max_distance: int = 2) -> list[dict]:
+    matches = book.fuzzy_search(query, max_distance)
+    return [{"distance": distance, **record_to_dict(record)} for record, distance in matches]
+
+
+def names(book: AddressBook, prefix: str = "", limit: int = 100) -> list[str]:
+    return list(islice(book.names_with_prefix(prefix), limit))
+
+
+def page(book: AddressBook, order: str = "name", limit: int = 5, after: str | list | None = None) -> dict:
+    # Курсор - ключ останнього запису попередньої сторінки: ім'я або [місяць, день, ім'я]
+    session = PageSession(book, order, limit)
+    if after is None:
+        records = session.first_page()
+    else:
+        session.last = tuple(after) if isinstance(after, list) else after
+        records = session.next_page()
+    more = bool(records) and not session.position()[3]
+    return {
+        "total": len(book.data),
+        "contacts": [record_to_dict(record) for record in records],
+        "next": session.last if more else None,
+    }
+
+
+def find_note(book: AddressBook, query: str, limit: int = 10) -> list[dict]:
+    return [record_to_dict(record) for record in book.find_by_note(query, limit)]
+
+
+def find_by_tags(book: AddressBook, tags: list[str], match_all: bool = False) -> list[dict]:
+    matches = book.find_by_tags(tags, match_all)
+    return [{"matched_tags": tags, **record_to_dict(record)} for record, tags in matches]
+
+
+def tags(book: AddressBook) -> list[dict]:
+    return [{"tag": tag, "count": count} for tag, count in book.tag_counts()]
+
+
+def birthdays(book: AddressBook, days: int = 7) -> list[dict]:
+    return [
+        {
+            "name": item.name,
+            "birthday": item.birthday.isoformat(),
+            "congratulation_date": item.congratulation_date.isoformat(),
+        }
+        for item in get_upcoming_birthdays(book, days)
+    ]
+
+
+def who_phone(book: AddressBook, phone: str) -> list[str]:
+    return [str(record.name) for record in book.find_by_phone(clean_phone(phone))]
+
+
+def who_email(book: AddressBook, email: str) -> list[str]:
+    return [str(record.name) for record in book.find_by_email(email)]
+
+
+# Зміни
+
+def changed_record(change_function):
+    """
+    Wraps a services.changes function into an operation that returns the changed record.
+    """
+    @wraps(change_function)
+    def operation(book: AddressBook, **args) -> dict:
+        return record_to_dict(change_function(book, **args).record)
+    return operation
+
+
+# Назва операції -> (обробник(book, **args), чи змінює книгу)
+OPERATIONS = {
+    "show": (show_contact, False),
+    "phone": (show_phone, False),
+    "search": (search, False),
+    "fuzzy": (fuzzy, False),
+    "names": (names, False),
+    "all": (page, False),
+    "find-note": (find_note, False),
+    "find-by-tags": (find_by_tags, False),
+    "tags": (tags, False),
+    "birthdays": (birthdays, False),
+    "who-phone": (who_phone, False),
+    "who-email": (who_email, False),
+    "add": (changed_record(changes.add_phone), True),
+    "change": (changed_record(changes.change_phone), True),
+    "remove": (changed_record(changes.remove_phone), True),
+    "add-birthday": (changed_record(changes.add_birthday), True),
+    "change-birthday": (changed_record(changes.change_birthday), True),
+    "add-email": (changed_record(changes.add_email), True),
+    "change-email": (changed_record(changes.change_email), True),
+    "remove-email": (changed_record(changes.remove_email), True),
+    "add-address": (changed_record(changes.add_address), True),
+    "change-address": (changed_record(changes.change_address), True),
+    "add-note": (changed_record(changes.add_note), True),
+    "edit-note": (changed_record(changes.edit_note), True),
+    "remove-note": (changed_record(changes.remove_note), True),
+    "delete": (changed_record(changes.delete), True),
+}
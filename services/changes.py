@@ -0,0 +1,180 @@
+import re
+from colorama import Fore
+from models.contact import Record
+from services.address_book import AddressBook
+from services.exceptions import (
+    ContactNotFoundError,
+    BirthdayAlreadyExistsError,
+    BirthdayNotSetError,
+    EmailNotSetError,
+)
+
+# Зміни контактів, спільні для команд CLI (services/commands.py) і операцій сервера (services/api.py).
+# Перевірки живуть лише тут, тож обидва входи поводяться однаково. Кожна зміна повертає Change:
+# CLI виводить його повідомлення, сервер повертає змінений запис як дані. Помилки - винятками.
+
+
+class Change:
+    """
+    Result of a change: the affected Record and the messages for the user,
+    the outcome first, then notes such as a phone number shared with other contacts.
+    """
+
+    def __init__(self, record: Record, *messages: str) -> None:
+        self.record = record
+        self.messages = list(messages)
+
+
+def clean_phone(phone: str) -> str:
+    return re.sub(r"[^\d+]", "", phone)
+
+
+def not_found(name: str, book: AddressBook) -> ContactNotFoundError:
+    return ContactNotFoundError(name, book.suggest(name))
+
+
+def _record(book: AddressBook, name: str) -> Record:
+    record = book.find(name)
+    if record is None:
+        raise not_found(name, book)
+    return record
+
+
+def _display(name: str) -> str:
+    return name.casefold().capitalize()
+
+
+def _shared(change: Change, owners: list[Record], value: str) -> Change:
+    others = [str(record.name) for record in owners if record.name.value != change.record.name.value]
+    if others:
+        change.messages.append(f"{Fore.BLUE}Note: {value} is also saved for {', '.join(others)}.{Fore.RESET}")
+    return change
+
+
+# Телефони
+
+def add_phone(book: AddressBook, name: str, phone: str) -> Change:
+    phone = clean_phone(phone)
+    record = book.find(name)
+    if record is None:
+        record = Record(name)
+        record.add_phone(phone)
+        book.add_record(record)
+        change = Change(record, f"{Fore.YELLOW}Contact added.{Fore.RESET}")
+    else:
+        record.add_phone(phone)
+        change = Change(record, f"{Fore.YELLOW}Contact updated.{Fore.RESET}")
+    return _shared(change, book.find_by_phone(phone), phone)
+
+
+def change_phone(book: AddressBook, name: str, old_phone: str, new_phone: str) -> Change:
+    new_phone = clean_phone(new_phone)
+    record = _record(book, name)
+    if old_phone == new_phone:
+        raise ValueError("Phone numbers must be different.")
+    record.change_phone(old_phone, new_phone)
+    return _shared(Change(record, f"{Fore.YELLOW}Contact updated.{Fore.RESET}"), book.find_by_phone(new_phone), new_phone)
+
+
+def remove_phone(book: AddressBook, name: str, phone: str) -> Change:
+    record = _record(book, name)
+    record.remove_phone(clean_phone(phone))
+    return Change(record, f"{Fore.YELLOW}Phone number removed from the record.{Fore.RESET}")
+
+
+# День народження
+
+def add_birthday(book: AddressBook, name: str, birthday: str) -> Change:
+    record = _record(book, name)
+    if record.birthday is not None:
+        raise BirthdayAlreadyExistsError(name)
+    record.add_birthday(birthday)
+    return Change(record, f"{Fore.YELLOW}Birthday added to {_display(name)}'s record.{Fore.RESET}")
+
+
+def change_birthday(book: AddressBook, name: str, birthday: str) -> Change:
+    record = _record(book, name)
+    if record.birthday is None:
+        raise BirthdayNotSetError(name)
+    if birthday == record.birthday.value:
+        raise ValueError("New birthday date must differ from the old one.")
+    record.change_birthday(birthday)
+    return Change(record, f"{Fore.YELLOW}Birthday date updated.{Fore.RESET}")
+
+
+# Email
+
+def add_email(book: AddressBook, name: str, email: str) -> Change:
+    record = _record(book, name)
+    record.add_email(email)
+    change = Change(record, f"{Fore.YELLOW}Email added to {_display(name)}'s record.{Fore.RESET}")
+    return _shared(change, book.find_by_email(email), email)
+
+
+def change_email(book: AddressBook, name: str, old_email: str, new_email: str) -> Change:
+    record = _record(book, name)
+    if old_email == new_email:
+        raise ValueError("Emails must be different.")
+    record.change_email(old_email, new_email)
+    return _shared(Change(record, f"{Fore.YELLOW}Email updated.{Fore.RESET}"), book.find_by_email(new_email), new_email)
+
+
+def remove_email(book: AddressBook, name: str, email: str) -> Change:
+    record = _record(book, name)
+    if not record.emails:
+        raise EmailNotSetError(name)
+    record.remove_email(email)
+    return Change(record, f"{Fore.YELLOW}Email {email} was removed from {_display(name)}'s record.{Fore.RESET}")
+
+
+# Адреса
+
+def add_address(book: AddressBook, name: str, address: str) -> Change:
+    record = _record(book, name)
+    if record.address:
+        raise ValueError(f"Residential address is already set for {_display(name)}.{Fore.RESET} "
+                         f"Use {Fore.GREEN}'change-address'{Fore.RESET} to change it.")
+    record.add_address(address)
+    return Change(record, f"{Fore.YELLOW}Residential address added to {_display(name)}'s record.{Fore.RESET}")
+
+
+def change_address(book: AddressBook, name: str, address: str) -> Change:
+    record = _record(book, name)
+    record.change_address(address)
+    return Change(record, f"{Fore.YELLOW}Residential address updated.{Fore.RESET}")
+
+
+# Нотатки
+
+def add_note(book: AddressBook, name: str, title: str, text: str = "", tags: list[str] | None = None) -> Change:
+    record = _record(book, name)
+    if record.note is not None:
+        raise ValueError(f"Note already exists for {_display(name)}.{Fore.RESET} "
+                         f"Use {Fore.GREEN}'edit-note'{Fore.RESET} to modify it.")
+    record.add_note(title, text, tags)
+    return Change(record, f"{Fore.YELLOW}Note added to {_display(name)}'s record.{Fore.RESET}")
+
+
+def edit_note(book: AddressBook, name: str, title: str, text: str = "", tags: list[str] | None = None) -> Change:
+    """
+    Replaces the note's title and text; tags=None keeps the current tags.
+    """
+    record = _record(book, name)
+    if record.note is None:
+        raise ValueError(f"{_display(name)} has no note to edit.{Fore.RESET} "
+                         f"Use {Fore.GREEN}'add-note'{Fore.RESET} to create one.")
+    record.edit_note(title, text, tags)
+    return Change(record, f"{Fore.YELLOW}Note updated for {_display(name)}'s record.{Fore.RESET}")
+
+
+def remove_note(book: AddressBook, name: str) -> Change:
+    record = _record(book, name)
+    record.remove_note()
+    return Change(record, f"{Fore.YELLOW}Note  removed from {name.capitalize()}'s record.{Fore.RESET}")
+
+
+def delete(book: AddressBook, name: str) -> Change:
+    record = book.delete(name)
+    if record is None:
+        raise not_found(name, book)
+    return Change(record, f"{Fore.YELLOW}{_display(name)}'s record deleted.{Fore.RESET}")
@@ -0,0 +1,98 @@
+from datetime import date
+from birthday import UpcomingBirthday
+
+try:
+    import numpy as np
+except ImportError:  # NumPy потрібен лише для аналітики
+    np = None
+
+# Стовпцеве представлення книги: одне значення на контакт у кожному масиві NumPy,
+# тож агрегати рахуються векторно, без обходу об'єктів Record.
+# 1970-01-01 як порядковий номер дня (date.toordinal) для переходу до datetime64[D]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# 1970-01-01 був четвергом; weekday() понеділка = 0
+EPOCH_WEEKDAY = 3
+
+
+class BookColumns:
+    """
+    Columnar snapshot of an address book, tied to the book's mutation generation.
+
+    names             — contact names (object array)
+    birthday_ordinal  — date.toordinal() of the birthday, 0 when not set
+    birth_month, birth_day — parts of the birthday, 0 when not set
+    phone_count, email_count — number of phones / emails
+    has_address, has_note   — flags
+    """
+
+    def __init__(self, book) -> None:
+        if np is None:
+            raise ImportError("NumPy is required for column analytics. Install it with 'pip install numpy'.")
+        with book.lock.read():
+            self.generation = book.generation
+            count = len(book.data)
+            names = []
+            ordinals = np.zeros(count, dtype=np.int32)
+            self.phone_count = np.zeros(count, dtype=np.int16)
+            self.email_count = np.zeros(count, dtype=np.int16)
+            self.has_address = np.zeros(count, dtype=bool)
+            self.has_note = np.zeros(count, dtype=bool)
+            for i, (name, record) in enumerate(book.data.items()):
+                names.append(name)
+                if record.birthday is not None:
+                    ordinals[i] = record.birthday.ordinal
+                self.phone_count[i] = len(record.phones)
+                self.email_count[i] = len(record.emails)
+                self.has_address[i] = record.address is not None
+                self.has_note[i] = record.note is not None
+        self.names = np.array(names, dtype=object)
+        self.birthday_ordinal = ordinals
+        self.has_birthday = ordinals > 0
+        days = (ordinals - EPOCH_ORDINAL).astype("datetime64[D]")
+        months = days.astype("datetime64[M]")
+        self.birth_month = np.where(self.has_birthday, months.astype(np.int64) % 12 + 1, 0).astype(np.int8)
+        self.birth_day = np.where(self.has_birthday, (days - months).astype(np.int64) + 1, 0).astype(np.int8)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def birthdays_per_month(self) -> dict[int, int]:
+        counts = np.bincount(self.birth_month[self.has_birthday], minlength=13)
+        return {month: int(counts[month]) for month in range(1, 13)}
+
+    def without_phones(self) -> list[str]:
+        return self.names[self.phone_count == 0].tolist()
+
+    @staticmethod
+    def distribution(column) -> dict[int, int]:
+        """
+        Number of contacts per value of a count column, e.g. distribution(columns.phone_count).
+        """
+        values, counts = np.unique(column, return_counts=True)
+        return {int(value): int(count) for value, count in zip(values, counts)}
+
+    def _occurrences(self, year: int):
+        # Дата дня народження в заданому році; 29 лютого в невисокосний рік -> 28 лютого
+        month_start = np.datetime64(f"{year:04d}-01", "M") + (self.birth_month.astype(np.int64) - 1)
+        month_length = ((month_start + 1).astype("datetime64[D]") - month_start.astype("datetime64[D]")).astype(np.int64)
+        return month_start.astype("datetime64[D]") + (np.minimum(self.birth_day, month_length) - 1)
+
+    def upcoming_birthdays(self, days: int = 7, today: date | None = None) -> list[UpcomingBirthday]:
+        """
+        Same result as birthday.get_upcoming_birthdays, computed over the whole book at once.
+        """
+        if days < 1:
+            raise ValueError("Number of days must be positive")
+        today = today or date.today()
+        start = np.datetime64(today, "D")
+        end = start + days
+        this_year = self._occurrences(today.year)
+        upcoming = np.where(this_year >= start, this_year, self._occurrences(today.year + 1))
+        selected = np.flatnonzero(self.has_birthday & (upcoming <= end))
+        dates = upcoming[selected]
+        weekday = (dates.astype(np.int64) + EPOCH_WEEKDAY) % 7
+        congratulation = dates + np.select([weekday == 5, weekday == 6], [2, 1], 0)
+        # datetime64[D].tolist() повертає datetime.date
+        result = list(map(UpcomingBirthday, self.names[selected].tolist(), dates.tolist(), congratulation.tolist()))
+        result.sort(key=lambda item: (item.birthday, item.name))
+        return result
@@ -1,5 +1,6 @@
 from services.exceptions import (
     EmptyDictError,
+    ContactNotFoundError,
     PhoneAlreadyExistsError,
     BirthdayAlreadyExistsError,
     BirthdayNotSetError,
@@ -9,78 +10,83 @@ from services.exceptions import (
 )
 from models.contact import Record
 from services.address_book import AddressBook
+from services import changes
+from services.changes import Change, not_found
+from services.pagination import PageSession, DEFAULT_PAGE_SIZE, viewer
+from services.query import Plan
+from services import render
 from birthday import get_upcoming_birthdays
+from storage import migrate_data, flush_data, rebalance_data
 from colorama import Fore
+import calendar
 import re
 
+# Повертається декоратором input_error, якщо команда завершилась помилкою
+FAILED = object()
+
 # Декоратор обробки помилок
 def input_error(func):
     def inner(*args, **kwargs):
         try:
             return func(*args, **kwargs)
         except ValueError as e:
-            print(f"{Fore.RED}{e}{Fore.RESET}")
+            render.echo(f"{Fore.RED}{e}{Fore.RESET}")
+        except ContactNotFoundError as e:
+            render.echo(e)
         except KeyError:
-            print(f"{Fore.RED}Given username was not found in the contact list.{Fore.RESET}")
+            render.echo(f"{Fore.RED}Given username was not found in the contact list.{Fore.RESET}")
         except IndexError:
-            print(f"{Fore.RED}Too few arguments were given.{Fore.RESET} Use '{Fore.GREEN}help{Fore.RESET}' for additional info.")
+            render.echo(f"{Fore.RED}Too few arguments were given.{Fore.RESET} Use '{Fore.GREEN}help{Fore.RESET}' for additional info.")
         except EmptyDictError:
-            print(f"{Fore.RED} Address book is empty.{Fore.RESET} Add a contact with '{Fore.GREEN}add{Fore.RESET}' command.")
+            render.echo(f"{Fore.RED} Address book is empty.{Fore.RESET} Add a contact with '{Fore.GREEN}add{Fore.RESET}' command.")
         except (PhoneAlreadyExistsError, BirthdayAlreadyExistsError, BirthdayNotSetError, EmailAlreadyExistsError, EmailNotSetError, AddressNotSetError) as e:
-            print(e)
+            render.echo(e)
+        return FAILED
+    return inner
+
+# Зберігає змінені записи: через фонове автозбереження, якщо воно запущене, або одразу
+def save_changes(book: AddressBook) -> None:
+    if book.autosave is not None:
+        book.autosave.notify()
+    else:
+        flush_data(book)
+
+def persisted(func):
+    def inner(args, book):
+        result = func(args, book)
+        save_changes(book)
+        return result
     return inner
 
+# Виводить повідомлення зміни (services/changes.py); обробник повертає саму зміну
+def report(change: Change) -> Change:
+    for message in change.messages:
+        render.echo(message)
+    return change
+
 @input_error
-def add_contact(args: list[str], book: AddressBook) -> None:
+@persisted
+def add_contact(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
 
-    name = args[0]
-    phone = "".join(args[1:]) 
-    clean_phone = re.sub(r"[^\d+]", "", phone)
-    record = book.find(name)
-
-    if not record:
-        record_entry = Record(name)
-        record_entry.add_phone(clean_phone)
-        book.add_record(record_entry)
-        print(f"{Fore.YELLOW}Contact added.{Fore.RESET}")
-    else:
-        record.add_phone(clean_phone)
-        print(f"{Fore.YELLOW}Contact updated.{Fore.RESET}")
+    return report(changes.add_phone(book, args[0], "".join(args[1:])))
 
 @input_error
-def change_contact(args: list[str], book: AddressBook) -> None:
+@persisted
+def change_contact(args: list[str], book: AddressBook) -> Change:
     if len(args) < 3:
         raise IndexError
 
-    name, old_phone,  = args[0], args[1]
-    new_phone = "".join(args[2:])
-    clean_new_phone = re.sub(r"[^\d+]", "", new_phone)
-    record = book.find(name)
-
-    if not record:
-        raise KeyError
-    if old_phone == clean_new_phone:
-        raise ValueError("Phone numbers must be different.")
-    record.change_phone(old_phone, clean_new_phone)
-    print(f"{Fore.YELLOW}Contact updated.{Fore.RESET}")
+    return report(changes.change_phone(book, args[0], args[1], "".join(args[2:])))
 
 @input_error
-def remove_phone(args: list[str], book: AddressBook) -> None:
+@persisted
+def remove_phone(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
-    
-    name = args[0]
-    phone = "".join(args[1:]) 
-    clean_phone = re.sub(r"[^\d+]", "", phone)
-    record = book.find(name)
 
-    if not record:
-        raise KeyError
-    else:
-        record.remove_phone(clean_phone)
-        print(f"{Fore.YELLOW}Phone number removed from the record.{Fore.RESET}")
+    return report(changes.remove_phone(book, args[0], "".join(args[1:])))
 
 @input_error
 def show_phone(args: list[str], book: AddressBook) -> None:
@@ -90,87 +96,83 @@ def show_phone(args: list[str], book: AddressBook) -> None:
     name, *_ = args
     record = book.find(name)
     if record is None:
-        raise KeyError
-    print(f"{Fore.GREEN}Phone records for {name.casefold().capitalize()}:{Fore.RESET} {', '.join([str(phone) for phone in record.phones])}")
-
-def get_contacts_for_page(book: AddressBook, page, per_page):
-    # Підтримка як UserDict, так і dict
-    contacts = list(book.data.values()) if hasattr(book, "data") else list(book.values())
-    total_pages = (len(contacts) + per_page - 1) // per_page
-    start = page * per_page
-    end = start + per_page
-    return contacts[start:end], total_pages
-
-# Глобальні змінні для пагінації
-current_page = 0
-contacts_per_page = 5
+        raise not_found(name, book)
+    render.echo(f"{Fore.GREEN}Phone records for {name.casefold().capitalize()}:{Fore.RESET} {', '.join([str(phone) for phone in record.phones])}")
+
+def print_page(session: PageSession, contacts: list[Record]) -> None:
+    number, total_pages, is_first, is_last = session.position()
+    title = "Your contact list" if session.order == "name" else "Upcoming birthdays"
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}{title} (page {number} of {total_pages}):{Fore.RESET}")
+        for record in contacts:
+            out.line("-" * 30)
+            out.line(str(record))
+        out.line("-" * 30)
+        if is_first and is_last:
+            return
+        if is_first:
+            out.line(f"You're on the first page. Type {Fore.GREEN}'next'{Fore.RESET} to go forward.")
+        elif is_last:
+            out.line(f"You're on the last page. Type {Fore.GREEN}'prev'{Fore.RESET} to go back.")
+        else:
+            out.line(f"Type {Fore.GREEN}'next'{Fore.RESET} or {Fore.GREEN}'prev'{Fore.RESET} to switch pages.")
 
 @input_error
-def show_all_with_pagination(book: AddressBook):
-    global current_page, contacts_per_page
-    contacts, total_pages = get_contacts_for_page(book, current_page, contacts_per_page)
+def show_all_with_pagination(args: list[str], book: AddressBook):
+    order, page_size = "name", DEFAULT_PAGE_SIZE
+    for arg in args:
+        if arg.isdigit():
+            page_size = int(arg)
+        else:
+            order = arg
+    session = PageSession(book, order, page_size)
+    contacts = session.first_page()
+    if not contacts and order == "birthday" and len(book.data):
+        raise ValueError("No contacts with a birthday yet.")
     if not contacts:
         raise EmptyDictError
-    print(f"{Fore.GREEN}Your contact list (page {current_page + 1} of {total_pages}):{Fore.RESET}")
-    for record in contacts:
-        print("-" * 30)
-        print(record)
-    print("-" * 30)
-    if total_pages > 1:
-        if current_page == 0:
-            print(f"You're on the first page. Type {Fore.GREEN}'next'{Fore.RESET} to go forward.")
-        elif current_page == total_pages - 1:
-            print(f"You're on the last page. Type {Fore.GREEN}'prev'{Fore.RESET} to go back.")
-        else:
-            print(f"Type {Fore.GREEN}'next'{Fore.RESET} or {Fore.GREEN}'prev'{Fore.RESET} to switch pages.")
+    # Сесія перегляду живе разом із книгою (у сервері - з з'єднанням), тож next / prev продовжують саме її
+    viewer(book).pages = session
+    print_page(session, contacts)
 
 def next_page(book: AddressBook):
-    global current_page, contacts_per_page
-    _, total_pages = get_contacts_for_page(book, current_page, contacts_per_page)
-    if current_page < total_pages - 1:
-        current_page += 1
-        show_all_with_pagination(book)
+    session = viewer(book).pages
+    if session is None:
+        return show_all_with_pagination([], book)
+    contacts = session.next_page()
+    if contacts:
+        print_page(session, contacts)
     else:
-        print(f"{Fore.BLUE}You're already on the last page.{Fore.RESET}")
+        render.echo(f"{Fore.BLUE}You're already on the last page.{Fore.RESET}")
 
 def prev_page(book: AddressBook):
-    global current_page
-    if current_page > 0:
-        current_page -= 1
-        show_all_with_pagination(book)
+    session = viewer(book).pages
+    if session is None:
+        return show_all_with_pagination([], book)
+    contacts = session.prev_page()
+    if contacts:
+        print_page(session, contacts)
     else:
-        print(f"{Fore.BLUE}You're already on the first page.{Fore.RESET}")
+        render.echo(f"{Fore.BLUE}You're already on the first page.{Fore.RESET}")
 
 
 @input_error
-def add_birthday(args: list[str], book: AddressBook) -> None:
+@persisted
+def add_birthday(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
 
     name, birthday, *_ = args
-    record = book.find(name)
-    if record is None:
-        raise KeyError
-    elif record.birthday is None:
-        record.add_birthday(birthday)
-        print(f"{Fore.YELLOW}Birthday added to {name.casefold().capitalize()}'s record.{Fore.RESET}")
-    else:
-        raise BirthdayAlreadyExistsError(str(name))
+    return report(changes.add_birthday(book, name, birthday))
 
 @input_error
-def change_birthday(args: list[str], book: AddressBook) -> None:
+@persisted
+def change_birthday(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
-    
+
     name, birthday, *_ = args
-    record = book.find(name)
-    if not record:
-        raise ValueError(f"Record with name '{name}' was not found.")
-    elif birthday == record.birthday.value:
-        raise ValueError("New birthday date must differ from the old one.")
-    else:
-        record.change_birthday(birthday)
-        print(f"{Fore.YELLOW}Birthday date updated.{Fore.RESET}")
+    return report(changes.change_birthday(book, name, birthday))
 
 @input_error    
 def show_birthday(args: list[str], book: AddressBook) -> None:
@@ -180,11 +182,11 @@ def show_birthday(args: list[str], book: AddressBook) -> None:
     name, *_ = args
     record = book.find(name)
     if record is None:
-        raise KeyError
+        raise not_found(name, book)
     elif record.birthday is None:
         raise BirthdayNotSetError(name)
     else:
-        print(f"{Fore.YELLOW}{name.casefold().capitalize()}'s birthday is on {record.birthday}{Fore.RESET}")
+        render.echo(f"{Fore.YELLOW}{name.casefold().capitalize()}'s birthday is on {record.birthday}{Fore.RESET}")
 
 @input_error
 def birthdays(args: list[str], book: AddressBook) -> None:
@@ -192,39 +194,29 @@ def birthdays(args: list[str], book: AddressBook) -> None:
         raise EmptyDictError
 
     upcoming_birthdays = get_upcoming_birthdays(book) if len(args) < 1 else get_upcoming_birthdays(book, days=int(args[0]))
-    heading_message = f"{Fore.GREEN}Upcoming birthdays in your address book:{Fore.RESET}"
-    birthdays_list = [f"\n - {list(item.keys())[0]}: {list(item.values())[0]}" for item in upcoming_birthdays]
-    if not birthdays_list:
+    if not upcoming_birthdays:
         raise ValueError("There are no upcoming birthday for given number of days.")
-    final_list = [heading_message] + birthdays_list
-    print("".join(final_list))
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Upcoming birthdays in your address book:{Fore.RESET}")
+        out.lines(f" - {item.name}: {item.congratulation_date:%d.%m.%Y}" for item in upcoming_birthdays)
 
 @input_error
-def add_email(args: list[str], book: AddressBook) -> None:
+@persisted
+def add_email(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
-    
+
     name, email, *_ = args
-    record = book.find(name)
-    if record is None:
-        raise KeyError 
-    else:
-        record.add_email(email)
-        print(f"{Fore.YELLOW}Email added to {name.casefold().capitalize()}'s record.{Fore.RESET}")
+    return report(changes.add_email(book, name, email))
 
 @input_error
-def change_email(args: list[str], book: AddressBook) -> None:
+@persisted
+def change_email(args: list[str], book: AddressBook) -> Change:
     if len(args) < 3:
         raise IndexError
-    
+
     name, old_email, new_email, *_ = args
-    record = book.find(name)
-    if record is None:
-        raise KeyError
-    if old_email == new_email:
-        raise ValueError("Emails must be different.")
-    record.change_email(old_email, new_email)
-    print(f"{Fore.YELLOW}Email updated.{Fore.RESET}")
+    return report(changes.change_email(book, name, old_email, new_email))
 
 @input_error
 def show_email(args: list[str], book: AddressBook) -> None:
@@ -233,39 +225,33 @@ def show_email(args: list[str], book: AddressBook) -> None:
     name, *_ = args
     record = book.find(name)
     if record is None:
-        raise KeyError
+        raise not_found(name, book)
     elif not record.emails:
         raise EmailNotSetError(name)
     else:
         start_string = f"{Fore.GREEN}{name.casefold().capitalize()}'s emails are:{Fore.RESET}"
         emails_data = [f"\n- {email}" for email in record.emails]
         result_string = start_string + "".join(emails_data)
-        print(result_string)
+        render.echo(result_string)
     
 @input_error
-def remove_email(args: list[str], book: AddressBook) -> None:
+@persisted
+def remove_email(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
 
     name, email, *_ = args
-    record = book.find(name)
-    if record is None:
-        raise KeyError
-    elif not record.emails:
-        raise EmailNotSetError(name)
-    else:
-        record.remove_email(email)
-        print(f"{Fore.YELLOW}Email {email} was removed from {name.casefold().capitalize()}'s record.{Fore.RESET}")
+    return report(changes.remove_email(book, name, email))
 
 @input_error
 def emails(book: AddressBook):
-    result = f"{Fore.GREEN}Email addresses available:{Fore.RESET}"
-    for name, record in book.items():
-        result += (f"\n- {name}: " +  ", ".join([email.value for email in record.emails if record.emails]))
-    print(result)
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Email addresses available:{Fore.RESET}")
+        out.lines(f"- {name}: {', '.join(email.value for email in record.emails)}" for name, record in book.data.items())
 
 @input_error
-def add_note(args, book: AddressBook) -> None:
+@persisted
+def add_note(args, book: AddressBook) -> Change:
     if len(args) < 3:
         raise ValueError("Usage: add_note <name> <title> <text> [tags...]")
 
@@ -294,15 +280,7 @@ def add_note(args, book: AddressBook) -> None:
             tag_str = tag_str[1:-1]  # Remove quotes
         tags = [tag.strip().replace('"', '') for tag in tag_str.split(',')]
 
-    record = book.find(name)
-    if not record:
-        raise ValueError(f"Record with name '{name}' was not found.")
-
-    if record.note is None:
-        record.add_note(title, text, tags)
-        print(f"{Fore.YELLOW}Note added to {name.casefold().capitalize()}'s record.{Fore.RESET}")
-    else:
-        print(f"{Fore.RED}Note already exists for {name.casefold().capitalize()}.{Fore.RESET} Use {Fore.GREEN}'edit-note'{Fore.RESET} to modify it.")
+    return report(changes.add_note(book, name, title, text, tags))
     
 @input_error    
 def show_note(args, book: AddressBook) -> None:
@@ -311,27 +289,24 @@ def show_note(args, book: AddressBook) -> None:
     name, *_ = args
     record = book.find(name)
     if record is None:
-        raise KeyError
+        raise not_found(name, book)
     elif record.note is None:
         raise ValueError(f"{name.casefold().capitalize()} has no note.")
     else:
-        print(f"{Fore.GREEN}{name.casefold().capitalize()}'s note:{Fore.RESET} {record.note}")
+        render.echo(f"{Fore.GREEN}{name.casefold().capitalize()}'s note:{Fore.RESET} {record.note}")
 
 @input_error
-def remove_note(args, book: AddressBook) -> None:
+@persisted
+def remove_note(args, book: AddressBook) -> Change:
     if len(args) < 1:
         raise IndexError
 
-    name,*_ = args
-    record = book.find(name)
-    if not record:
-        raise ValueError(f"Record with name '{name}' was not found.")
-
-    record.remove_note()
-    print(f"{Fore.YELLOW}Note  removed from {name.capitalize()}'s record.{Fore.RESET}")
+    name, *_ = args
+    return report(changes.remove_note(book, name))
 
 @input_error
-def edit_note(args, book: AddressBook) -> None:
+@persisted
+def edit_note(args, book: AddressBook) -> Change:
     if len(args) < 3:
         raise ValueError("Usage: edit-note <name> <title> <text> [tags...]")
 
@@ -360,64 +335,38 @@ def edit_note(args, book: AddressBook) -> None:
             tag_str = tag_str[1:-1]  # Remove quotes
         tags = [tag.strip().replace('"', '') for tag in tag_str.split(',')]
 
-    record = book.find(name)
-    if not record:
-        raise ValueError(f"Record with name '{name}' was not found.")
-    elif record.note is None:
-        print(f"{Fore.RED}{name.casefold().capitalize()} has no note to edit.{Fore.RESET} Use {Fore.GREEN}'add-note'{Fore.RESET} to create one.")
-    else:
-        record.edit_note(title, text, tags)
-        print(f"{Fore.YELLOW}Note updated for {name.casefold().capitalize()}'s record.{Fore.RESET}")
+    return report(changes.edit_note(book, name, title, text, tags))
 
 @input_error
 def find_note(args, book: AddressBook) -> None:
     if len(args) < 1:
         raise IndexError
 
-    query, *_ = args
+    query = " ".join(args)
     matches = book.find_by_note(query)
 
     if not matches:
-        raise ValueError(f"No notes containing '{query}' were found.")
+        raise ValueError(f"No notes matching '{query}' were found.")
 
-    print(f"{Fore.GREEN}Notes containing '{query}':{Fore.RESET}")
-    for record in matches:
-        print(
-            f"- {str(record.name).capitalize()}: "
-            f"{record.note.title} — {record.note.text}"
-        )
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Notes matching '{query}' (best first):{Fore.RESET}")
+        out.lines(f"- {record.name}: {record.note.title} — {record.note.text}" for record in matches)
 
 @input_error
-def add_address(args: list[str], book: AddressBook) -> None:
+@persisted
+def add_address(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
-    
-    name = args[0]
-    address = " ".join(args[1:])
-    record = book.find(name)
 
-    if record is None:
-        raise KeyError
-    elif record.address:
-        print(f"{Fore.RED}Residential address is already set for {name.casefold().capitalize()}.{Fore.RESET} Use {Fore.GREEN}'change-address'{Fore.RESET} to change it.")
-    else:
-        record.add_address(address)
-        print(f"{Fore.YELLOW}Residential address added to {name.casefold().capitalize()}'s record.{Fore.RESET}")
+    return report(changes.add_address(book, args[0], " ".join(args[1:])))
 
 @input_error
-def change_address(args: list[str], book: AddressBook) -> None:
+@persisted
+def change_address(args: list[str], book: AddressBook) -> Change:
     if len(args) < 2:
         raise IndexError
-    
-    name = args[0]
-    address = " ".join(args[1:])
-    record = book.find(name)
 
-    if record is None:
-        raise KeyError
-    else:
-        record.change_address(address)
-        print(f"{Fore.YELLOW}Residential address updated.{Fore.RESET}")
+    return report(changes.change_address(book, args[0], " ".join(args[1:])))
 
 @input_error
 def show_address(args: list[str], book: AddressBook) -> None:
@@ -428,64 +377,65 @@ def show_address(args: list[str], book: AddressBook) -> None:
     record = book.find(name)
 
     if record is None:
-        raise KeyError
+        raise not_found(name, book)
     elif record.address is None:
         raise AddressNotSetError(name)
     else:
-        print(f"{name.casefold().capitalize()}'s residential address is {record.address}")
+        render.echo(f"{name.casefold().capitalize()}'s residential address is {record.address}")
 
 @input_error
-def delete_record(args: list[str], book: AddressBook) -> None:
+@persisted
+def delete_record(args: list[str], book: AddressBook) -> Change:
     if len(args) < 1:
         raise IndexError
-    
+
     name, *_ = args
-    deleted = book.delete(name)
-    if deleted is None:
-        raise KeyError
-    else:
-        print(f"{Fore.YELLOW}{name.casefold().capitalize()}'s record deleted.{Fore.RESET}")
+    return report(changes.delete(book, name))
 
 
 @input_error
 def find_by_tags(args, book: AddressBook) -> None:
-    if len(args) < 1:
+    match_all = "--all" in args
+    tags = [arg for arg in args if arg not in ("--all", "--any")]
+    if len(tags) < 1:
         raise IndexError
 
-    tags = args
-    matches = book.find_by_tags(tags)
+    matches = book.find_by_tags(tags, match_all=match_all)
 
     if not matches:
         raise ValueError(f"No notes with tags {tags} were found.")
 
-    print(f"Notes with tags {tags}:")
-    for record, matching_tags in matches:
-        # Handle both list format and comma-separated string format for display
-        note_tags = record.note.tags
-        if isinstance(note_tags, list):
-            # Check if it's a list of individual tags or a list with one comma-separated string
-            if len(note_tags) == 1 and ',' in note_tags[0]:
-                # Handle case like ["tag1,tag2"] - list with one comma-separated string
-                tags_str = f" [Tags: {note_tags[0]}]"
-            else:
-                # Handle case like ["tag1", "tag2"] - list of individual tags
-                tags_str = f" [Tags: {', '.join(note_tags)}]" if note_tags else ""
-        else:
-            # If tags are stored as a comma-separated string, format them properly
-            note_tags_str = str(note_tags)
-            # Handle the case where the entire string is quoted like "tag1,tag2"
-            if note_tags_str.startswith('"') and note_tags_str.endswith('"'):
-                note_tags_str = note_tags_str[1:-1]  # Remove outer quotes
-            # Also handle the case where it's in list format like ["tag1,tag2"]
-            if note_tags_str.startswith('[') and note_tags_str.endswith(']'):
-                note_tags_str = note_tags_str[1:-1]  # Remove brackets
-            tags_str = f" [Tags: {note_tags_str}]" if note_tags_str else ""
-        
-        print(
-            f"- {str(record.name).capitalize()}: "
-            f"{record.note.title} — {record.note.text}{tags_str}"
-        )
-        print(f"{Fore.GREEN}  Matching tags:{Fore.RESET} {', '.join(matching_tags)}")
+    with render.output() as out:
+        out.line(f"Notes with {'all' if match_all else 'any'} of tags {tags}:")
+        for record, matching_tags in matches:
+            if out.closed:
+                break
+            tags_str = f" [Tags: {', '.join(sorted(record.note.tags))}]" if record.note.tags else ""
+            out.line(f"- {record.name}: {record.note.title} — {record.note.text}{tags_str}")
+            out.line(f"{Fore.GREEN}  Matching tags:{Fore.RESET} {', '.join(matching_tags)}")
+
+@input_error
+def show_tags(book: AddressBook) -> None:
+    counts = book.tag_counts()
+    if not counts:
+        raise ValueError("There are no tagged notes in the address book.")
+
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Tags in your address book:{Fore.RESET}")
+        out.lines(f" - {tag}: {count}" for tag, count in counts)
+
+@input_error
+def show_names(args, book: AddressBook) -> None:
+    prefix = args[0] if args else ""
+    # Імена виводяться в міру обходу дерева, без побудови повного списку
+    names = book.names_with_prefix(prefix)
+    first = next(names, None)
+    if first is None:
+        raise ValueError(f"No contacts found starting with '{prefix}'.")
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Contacts starting with '{prefix}':{Fore.RESET}" if prefix else f"{Fore.GREEN}All contacts:{Fore.RESET}")
+        out.line(f" - {first}")
+        out.lines(f" - {name}" for name in names)
 
 @input_error
 def search_contact(args, book: AddressBook) -> None:
@@ -496,8 +446,156 @@ def search_contact(args, book: AddressBook) -> None:
     matches = book.search_by_name(query)
 
     if not matches:
-        raise ValueError(f"No contacts found containing '{query}' in their name.")
+        suggestions = book.suggest(query)
+        hint = f" Did you mean {', '.join(suggestions)}?" if suggestions else ""
+        raise ValueError(f"No contacts found containing '{query}' in their name.{hint}")
+
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Contacts found containing '{query}':{Fore.RESET}")
+        out.lines(f"- {record.name}: {record}" for record in matches)
+
+@input_error
+def query_contacts(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    query = " ".join(args)
+    records = Plan(book, query).records()
+    first = next(records, None)
+    if first is None:
+        raise ValueError(f"No contacts match '{query}'.")
+
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Contacts matching '{query}':{Fore.RESET}")
+        out.line(f"- {first.name}: {first}")
+        out.lines(f"- {record.name}: {record}" for record in records)
+
+@input_error
+def explain_query(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    query = " ".join(args)
+    plan = Plan(book, query)
+    found = sum(1 for _ in plan.records())
+    render.echo(f"{Fore.GREEN}Plan for '{query}':{Fore.RESET}")
+    for line in plan.explain():
+        render.echo(f"  {line}")
+    render.echo(f"{Fore.YELLOW}{found} contact(s) found.{Fore.RESET}")
+
+@input_error
+def fuzzy_contact(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    query = args[0]
+    try:
+        max_distance = int(args[1]) if len(args) > 1 else 2
+    except ValueError:
+        raise ValueError("Maximum distance must be a whole number.")
+    matches = book.fuzzy_search(query, max_distance)
+
+    if not matches:
+        raise ValueError(f"No contacts found within {max_distance} typo(s) of '{query}'.")
+
+    with render.output() as out:
+        out.line(f"{Fore.GREEN}Contacts found within {max_distance} typo(s) of '{query}':{Fore.RESET}")
+        out.lines(f"- {record.name} ({distance}): {record}" for record, distance in matches)
 
-    print(f"{Fore.GREEN}Contacts found containing '{query}':{Fore.RESET}")
-    for record in matches:
-        print(f"- {str(record.name).capitalize()}: {record}")
+@input_error
+def migrate(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    target, *_ = args
+    migrate_data(book, target)
+    render.echo(f"{Fore.YELLOW}Address book copied to {target}.{Fore.RESET} Set {Fore.GREEN}ADDRESSBOOK_FILE={target}{Fore.RESET} to use it.")
+
+def autosave_stats(book: AddressBook) -> None:
+    if book.autosave is None:
+        render.echo(f"{Fore.BLUE}Autosave is off, changes are saved after every command.{Fore.RESET}")
+        return
+    stats = book.autosave.stats()
+    render.echo(
+        f"{Fore.GREEN}Autosave:{Fore.RESET} every {book.autosave.interval:g}s or {book.autosave.every} change(s)\n"
+        f" - saves: {stats['saves']}, unsaved records: {stats['pending']}\n"
+        f" - bytes written: {stats['bytes_written']}, failed saves: {stats['failures']}\n"
+        f" - latency: last {stats['last_latency_ms']:.2f} ms, avg {stats['avg_latency_ms']:.2f} ms, max {stats['max_latency_ms']:.2f} ms"
+    )
+    if stats["last_error"]:
+        render.echo(f"{Fore.RED}Last failed save:{Fore.RESET} {stats['last_error']}")
+
+@input_error
+def import_contacts(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    path, *_ = args
+    try:
+        report = book.import_file(path, on_batch=lambda: save_changes(book))
+    except FileNotFoundError:
+        raise ValueError(f"File '{path}' was not found.")
+    render.echo(f"{Fore.YELLOW}{report}.{Fore.RESET}")
+    if report.rejected_path:
+        render.echo(f"Rejected rows with reasons were saved to {Fore.GREEN}{report.rejected_path}{Fore.RESET}")
+
+@input_error
+def rebalance_shards(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    count = int(args[0])
+    rebalance_data(book, count)
+    render.echo(f"{Fore.YELLOW}Address book redistributed across {count} shard(s).{Fore.RESET}")
+
+@input_error
+def who_phone(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    phone = re.sub(r"[^\d+]", "", "".join(args))
+    owners = book.find_by_phone(phone)
+    if not owners:
+        raise ValueError(f"Phone number {phone} is not saved for any contact.")
+    render.echo(f"{Fore.GREEN}Phone number {phone} belongs to:{Fore.RESET} {', '.join(str(record.name) for record in owners)}")
+
+@input_error
+def who_email(args, book: AddressBook) -> None:
+    if len(args) < 1:
+        raise IndexError
+
+    email, *_ = args
+    owners = book.find_by_email(email)
+    if not owners:
+        raise ValueError(f"Email {email} is not saved for any contact.")
+    render.echo(f"{Fore.GREEN}Email {email} belongs to:{Fore.RESET} {', '.join(str(record.name) for record in owners)}")
+
+@input_error
+def show_duplicates(book: AddressBook) -> None:
+    duplicates = book.duplicates()
+    if not duplicates["phones"] and not duplicates["emails"]:
+        render.echo(f"{Fore.YELLOW}No phone numbers or emails are shared between contacts.{Fore.RESET}")
+        return
+    with render.output() as out:
+        for title, values in (("Phone numbers", duplicates["phones"]), ("Emails", duplicates["emails"])):
+            if values:
+                out.line(f"{Fore.GREEN}{title} saved for several contacts:{Fore.RESET}")
+                out.lines(f" - {value}: {', '.join(names)}" for value, names in sorted(values.items()))
+
+@input_error
+def show_report(book: AddressBook) -> None:
+    if not book:
+        raise EmptyDictError
+    try:
+        columns = book.to_columns()
+    except ImportError as e:
+        raise ValueError(str(e))
+
+    render.echo(f"{Fore.GREEN}Address book report ({len(columns)} contacts):{Fore.RESET}")
+    render.echo(f" - with birthday: {int(columns.has_birthday.sum())}, with address: {int(columns.has_address.sum())}, with note: {int(columns.has_note.sum())}")
+    render.echo(f" - without phones: {int((columns.phone_count == 0).sum())}")
+    for title, column in (("Phones", columns.phone_count), ("Emails", columns.email_count)):
+        counts = ", ".join(f"{value}: {count}" for value, count in columns.distribution(column).items())
+        render.echo(f" - {title.casefold()} per contact: {counts}")
+    per_month = ", ".join(f"{calendar.month_abbr[month]}: {count}" for month, count in columns.birthdays_per_month().items())
+    render.echo(f" - birthdays per month: {per_month}")
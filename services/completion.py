@@ -0,0 +1,54 @@
+from itertools import islice
+from services.indexes import PrefixTrie
+
+try:
+    import readline
+except ImportError:  # Windows без pyreadline
+    readline = None
+
+# Скільки варіантів показувати на Tab: у великій книзі порожній префікс збігається з усіма іменами
+MAX_MATCHES = 50
+
+
+class Completer:
+    """
+    readline completer: the first word is completed from the command names,
+    the following words from the contact names in the book.
+    """
+
+    def __init__(self, book, commands) -> None:
+        # book - AddressBook або функція, що повертає книгу (None, поки вона ще завантажується)
+        self.book = book if callable(book) else lambda: book
+        self.commands = PrefixTrie(commands)
+        self._matches = []
+
+    def matches(self, line: str, text: str) -> list[str]:
+        if not line[:len(line) - len(text)].strip():
+            return list(islice(self.commands.iter_prefix(text), MAX_MATCHES))
+        book = self.book()
+        if book is None:
+            return []
+        with book.lock.read():
+            return list(islice(book.names_with_prefix(text), MAX_MATCHES))
+
+    def complete(self, text: str, state: int) -> str | None:
+        if state == 0:
+            self._matches = self.matches(readline.get_line_buffer()[:readline.get_endidx()], text)
+        try:
+            return self._matches[state]
+        except IndexError:
+            return None
+
+
+def setup_completion(book, commands) -> Completer | None:
+    if readline is None:
+        return None
+    completer = Completer(book, commands)
+    readline.set_completer(completer.complete)
+    # Команди містять "-", тож слова розділяються лише пробілами
+    readline.set_completer_delims(" \t\n")
+    if "libedit" in (readline.__doc__ or ""):
+        readline.parse_and_bind("bind ^I rl_complete")
+    else:
+        readline.parse_and_bind("tab: complete")
+    return completer
@@ -6,6 +6,18 @@ class ArgumentInstanceError(Exception):
 class EmptyDictError(Exception):
     pass
 
+class ContactNotFoundError(KeyError):
+    def __init__(self, name: str, suggestions: list[str] | None = None) -> None:
+        self.name = name.casefold().capitalize()
+        self.suggestions = suggestions or []
+        super().__init__(name)
+
+    def __str__(self) -> str:
+        message = f"{Fore.RED}Contact '{self.name}' was not found in the contact list.{Fore.RESET}"
+        if self.suggestions:
+            message += f" Did you mean {Fore.GREEN}{', '.join(self.suggestions)}{Fore.RESET}?"
+        return message
+
 class PhoneAlreadyExistsError(Exception):
     def __init__(self, name: str) -> None:
         self.name = name.capitalize()
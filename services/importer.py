@@ -0,0 +1,261 @@
+import csv
+import json
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from models.contact import Record
+
+# Потоковий імпорт контактів: читання рядків -> пакети -> валідація в пулі процесів -> вставка пакетами.
+# У пам'яті одночасно тримаються лише кілька пакетів, незалежно від розміру файлу.
+BATCH_SIZE = 1000
+
+
+class ImportReport:
+    def __init__(self, rejected_path: str) -> None:
+        self.imported = 0
+        self.rejected = 0
+        self.rejected_path = rejected_path
+
+    def __str__(self) -> str:
+        return f"Imported {self.imported} contact(s), rejected {self.rejected}"
+
+
+def _split(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [item.strip() for item in re.split(r"[;,]", str(value)) if item.strip()]
+
+
+def _row(line: int, name, phones=None, emails=None, birthday=None, address=None,
+         note_title=None, note_text=None, tags=None) -> dict:
+    return {
+        "line": line,
+        "name": (name or "").strip(),
+        "phones": _split(phones),
+        "emails": _split(emails),
+        "birthday": birthday.strip() if birthday else None,
+        "address": address.strip() if address else None,
+        "note_title": note_title.strip() if note_title else None,
+        "note_text": note_text.strip() if note_text else "",
+        "tags": _split(tags),
+    }
+
+
+def read_csv(path: str):
+    with open(path, newline="", encoding="utf-8") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            yield _row(
+                line, row.get("name"), row.get("phones") or row.get("phone"),
+                row.get("emails") or row.get("email"), row.get("birthday"), row.get("address"),
+                row.get("note_title"), row.get("note_text"), row.get("tags"),
+            )
+
+
+# Поля рядка JSON Lines: текстові та ті, що можуть бути рядком або списком рядків
+JSONL_TEXT_FIELDS = ("name", "birthday", "address", "note_title", "note_text")
+JSONL_LIST_FIELDS = ("phones", "phone", "emails", "email", "tags")
+
+
+def _jsonl_error(row) -> str | None:
+    if not isinstance(row, dict):
+        return "Expected a JSON object"
+    for key in JSONL_TEXT_FIELDS:
+        value = row.get(key)
+        if value is not None and not isinstance(value, str):
+            return f"Field '{key}' must be a string"
+    for key in JSONL_LIST_FIELDS:
+        value = row.get(key)
+        if value is None or isinstance(value, str):
+            continue
+        if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+            return f"Field '{key}' must be a string or a list of strings"
+    return None
+
+
+def read_jsonl(path: str):
+    with open(path, encoding="utf-8") as f:
+        for line, text in enumerate(f, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except json.JSONDecodeError as e:
+                yield {"line": line, "name": "", "error": f"Invalid JSON: {e.msg}"}
+                continue
+            error = _jsonl_error(row)
+            if error is not None:
+                name = row.get("name") if isinstance(row, dict) and isinstance(row.get("name"), str) else ""
+                yield {"line": line, "name": name, "error": error}
+                continue
+            yield _row(
+                line, row.get("name"), row.get("phones", row.get("phone")),
+                row.get("emails", row.get("email")), row.get("birthday"), row.get("address"),
+                row.get("note_title"), row.get("note_text"), row.get("tags"),
+            )
+
+
+def _vcard_lines(f):
+    # Розгортання перенесених рядків (RFC 6350, 3.2)
+    current = None
+    for text in f:
+        text = text.rstrip("\r\n")
+        if text[:1] in (" ", "\t") and current is not None:
+            current += text[1:]
+            continue
+        if current is not None:
+            yield current
+        current = text
+    if current is not None:
+        yield current
+
+
+def _vcard_birthday(value: str) -> str:
+    digits = value.replace("-", "")
+    if re.fullmatch(r"\d{8}", digits):
+        return f"{digits[6:8]}.{digits[4:6]}.{digits[0:4]}"
+    return value
+
+
+def read_vcard(path: str):
+    with open(path, encoding="utf-8") as f:
+        card, start = None, 0
+        for line, text in enumerate(_vcard_lines(f), start=1):
+            key, _, value = text.partition(":")
+            prop = key.split(";")[0].upper()
+            if prop == "BEGIN":
+                card, start = {"phones": [], "emails": [], "tags": []}, line
+            elif card is None:
+                continue
+            elif prop == "END":
+                yield _row(
+                    start, card.get("name"), card["phones"], card["emails"], card.get("birthday"),
+                    card.get("address"), "note" if card.get("note") else None, card.get("note"), card["tags"],
+                )
+                card = None
+            elif prop == "FN":
+                card["name"] = value
+            elif prop == "N" and "name" not in card:
+                card["name"] = value.split(";")[1] if ";" in value else value
+            elif prop == "TEL":
+                card["phones"].append(value)
+            elif prop == "EMAIL":
+                card["emails"].append(value)
+            elif prop == "BDAY":
+                card["birthday"] = _vcard_birthday(value)
+            elif prop == "ADR":
+                card["address"] = ", ".join(part for part in value.split(";") if part)
+            elif prop == "NOTE":
+                card["note"] = value.replace("\\n", " ")
+            elif prop == "CATEGORIES":
+                card["tags"].extend(value.split(","))
+
+
+READERS = {
+    ".csv": read_csv,
+    ".jsonl": read_jsonl,
+    ".ndjson": read_jsonl,
+    ".vcf": read_vcard,
+}
+
+
+def read_rows(path: str):
+    extension = os.path.splitext(path)[1].casefold()
+    try:
+        reader = READERS[extension]
+    except KeyError:
+        raise ValueError(f"Unsupported import format '{extension}'. Use one of: {', '.join(READERS)}")
+    return reader(path)
+
+
+def build_record(row: dict) -> Record:
+    record = Record(row["name"])
+    for phone in row["phones"]:
+        record.add_phone(re.sub(r"[^\d+]", "", phone))
+    for email in row["emails"]:
+        record.add_email(email)
+    if row["birthday"]:
+        record.add_birthday(row["birthday"])
+    if row["address"]:
+        record.add_address(row["address"])
+    if row["note_title"]:
+        record.add_note(row["note_title"], row["note_text"], row["tags"])
+    return record
+
+
+def validate_batch(rows: list[dict]) -> list[tuple[dict, Record | None, str | None]]:
+    # Виконується в процесі пулу: вся валідація полів відбувається в конструкторах моделей
+    results = []
+    for row in rows:
+        if "error" in row:
+            results.append((row, None, row["error"]))
+            continue
+        try:
+            results.append((row, build_record(row), None))
+        except Exception as e:
+            results.append((row, None, str(e)))
+    return results
+
+
+def _batches(rows, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _validated(batches, workers: int):
+    if workers <= 1:
+        for batch in batches:
+            yield validate_batch(batch)
+        return
+    # Не більше двох пакетів на процес в обробці, щоб пам'ять не росла з розміром файлу.
+    # Процеси запускаються через spawn: fork скопіював би блокування записів і файл журналу
+    # в стані, в якому їх тримають потоки автозбереження чи компактизації
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for batch in batches:
+            pending.append(pool.submit(validate_batch, batch))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def import_file(book, path: str, batch_size: int = BATCH_SIZE, workers: int | None = None, on_batch=None) -> ImportReport:
+    workers = workers or os.cpu_count() or 1
+    report = ImportReport(path + ".rejected.csv")
+    rejected_file = None
+    rejected_writer = None
+    try:
+        for results in _validated(_batches(read_rows(path), batch_size), workers):
+            rejected = []
+            # Книга блокується лише на вставку пакета: між пакетами автозбереження записує імпортоване
+            with book.lock:
+                for row, record, error in results:
+                    if record is not None:
+                        try:
+                            book.add_record(record)
+                            report.imported += 1
+                            continue
+                        except ValueError as e:
+                            error = str(e)
+                    rejected.append((row["line"], row["name"], error))
+            if rejected:
+                if rejected_writer is None:
+                    rejected_file = open(report.rejected_path, "w", newline="", encoding="utf-8")
+                    rejected_writer = csv.writer(rejected_file)
+                    rejected_writer.writerow(["line", "name", "reason"])
+                rejected_writer.writerows(rejected)
+                report.rejected += len(rejected)
+            if on_batch is not None:
+                on_batch()
+    finally:
+        if rejected_file is not None:
+            rejected_file.close()
+    if not report.rejected:
+        report.rejected_path = None
+    return report
@@ -0,0 +1,528 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from itertools import islice
+import heapq
+import math
+import re
+
+# Допоміжні індекси AddressBook. Індекси не зберігаються разом із книгою:
+# вони будуються під час першого запиту й далі оновлюються разом із книгою.
+# Індекси записів мають спільний інтерфейс: add(name, record) та discard(name).
+
+
+def normalize_phone(phone: str) -> str:
+    return re.sub(r"\D", "", phone)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().casefold()
+
+
+class TrigramIndex:
+    """
+    Inverted index from every three-character substring of a casefolded name
+    to the names containing it. A substring query is answered by intersecting
+    the posting sets of its trigrams and verifying the few candidates left.
+    """
+
+    def __init__(self, names=()) -> None:
+        self._postings = defaultdict(set)
+        for name in names:
+            self.add(name)
+
+    @staticmethod
+    def trigrams(text: str) -> set[str]:
+        folded = text.casefold()
+        return {folded[i:i + 3] for i in range(len(folded) - 2)}
+
+    def add(self, name: str) -> None:
+        for gram in self.trigrams(name):
+            self._postings[gram].add(name)
+
+    def discard(self, name: str) -> None:
+        for gram in self.trigrams(name):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.discard(name)
+                if not postings:
+                    del self._postings[gram]
+
+    def candidates(self, query: str) -> set[str]:
+        postings = sorted((self._postings.get(gram, set()) for gram in self.trigrams(query)), key=len)
+        if not postings:
+            return set()
+        result = set(postings[0])
+        for other in postings[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    def search(self, query: str) -> list[str]:
+        folded = query.casefold()
+        return sorted((name for name in self.candidates(query) if folded in name.casefold()), key=str.casefold)
+
+
+class PrefixTrie:
+    """
+    Burst trie over casefolded names: trie nodes (dicts keyed by the next
+    character) only near the root, below them sorted containers of names that
+    share the path prefix. A container that grows past BURST_LIMIT is split
+    into a node, so lookups walk a few dict levels and then bisect one small list.
+    Names come out in casefolded order, which lets prefix matches be streamed.
+    """
+
+    BURST_LIMIT = 128
+    # Ключ контейнера імен, що закінчуються саме в цьому вузлі
+    END = ""
+
+    def __init__(self, names=()) -> None:
+        self._root = {}
+        self._size = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _burst(self, container: list[str], depth: int) -> dict:
+        node = {}
+        for name in container:
+            key = name.casefold()
+            node.setdefault(key[depth] if len(key) > depth else self.END, []).append(name)
+        for char, child in node.items():
+            if char != self.END and len(child) > self.BURST_LIMIT:
+                node[char] = self._burst(child, depth + 1)
+        return node
+
+    def add(self, name: str) -> None:
+        key = name.casefold()
+        node, depth = self._root, 0
+        while True:
+            char = key[depth] if depth < len(key) else self.END
+            child = node.get(char)
+            if child is None:
+                node[char] = [name]
+                break
+            if isinstance(child, list):
+                position = bisect_left(child, key, key=str.casefold)
+                if position < len(child) and child[position] == name:
+                    return
+                child.insert(position, name)
+                if char != self.END and len(child) > self.BURST_LIMIT:
+                    node[char] = self._burst(child, depth + 1)
+                break
+            node, depth = child, depth + 1
+        self._size += 1
+
+    def discard(self, name: str) -> None:
+        key = name.casefold()
+        node, depth = self._root, 0
+        while True:
+            char = key[depth] if depth < len(key) else self.END
+            child = node.get(char)
+            if child is None:
+                return
+            if isinstance(child, list):
+                position = bisect_left(child, key, key=str.casefold)
+                if position < len(child) and child[position] == name:
+                    del child[position]
+                    self._size -= 1
+                    if not child:
+                        del node[char]
+                return
+            node, depth = child, depth + 1
+
+    def _walk(self, node: dict):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, list):
+                yield from current
+                continue
+            # END ("") іде першим, бо коротше ім'я передує довшим з тим самим префіксом
+            stack.extend(current[char] for char in sorted(current, reverse=True))
+
+    def iter_prefix(self, prefix: str):
+        """
+        Yields names starting with the prefix (case-insensitive) in sorted order.
+        """
+        key = prefix.casefold()
+        node = self._root
+        for depth, char in enumerate(key):
+            child = node.get(char)
+            if child is None:
+                return
+            if isinstance(child, list):
+                for name in islice(child, bisect_left(child, key, key=str.casefold), None):
+                    if not name.casefold().startswith(key):
+                        return
+                    yield name
+                return
+            node = child
+        yield from self._walk(node)
+
+
+def _pattern(word: str) -> dict[str, int]:
+    # Бітова маска позицій кожного символу слова
+    masks = {}
+    for i, char in enumerate(word):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def _distance(word: str, masks: dict[str, int], other: str) -> int:
+    """
+    Bit-parallel edit distance (Myers, 1999): one column of the DP table per
+    character of `other`, with all cells of the column packed into integers.
+    """
+    length = len(word)
+    if not length:
+        return len(other)
+    mask = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative, score = mask, 0, length
+    for char in other:
+        eq = masks.get(char, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | ~(xh | positive)
+        horizontal_negative = positive & xh
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+        horizontal_positive = (horizontal_positive << 1) | 1
+        positive = ((horizontal_negative << 1) | ~(xv | horizontal_positive)) & mask
+        negative = horizontal_positive & xv
+    return score
+
+
+def levenshtein(a: str, b: str) -> int:
+    return _distance(a, _pattern(a), b)
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over casefolded names for edit-distance queries. Every
+    child hangs off its parent by their distance, so by the triangle inequality
+    a query within max_distance only descends into children whose edge lies in
+    [d - max_distance, d + max_distance].
+
+    Removed names stay in the tree as tombstones and the tree is rebuilt once
+    they outnumber the live names.
+    """
+
+    def __init__(self, names=()) -> None:
+        self._build(names)
+
+    def _build(self, names) -> None:
+        # Вузол: [casefolded ім'я, ім'я, {відстань: дочірній вузол}]
+        self._root = None
+        self._nodes = {}
+        self._alive = set()
+        for name in names:
+            self.add(name)
+
+    def add(self, name: str) -> None:
+        if name in self._nodes:
+            self._alive.add(name)
+            return
+        word = name.casefold()
+        masks = _pattern(word)
+        node = [word, name, {}]
+        self._nodes[name] = node
+        self._alive.add(name)
+        if self._root is None:
+            self._root = node
+            return
+        current = self._root
+        while True:
+            distance = _distance(word, masks, current[0])
+            child = current[2].get(distance)
+            if child is None:
+                current[2][distance] = node
+                return
+            current = child
+
+    def discard(self, name: str) -> None:
+        self._alive.discard(name)
+        if len(self._nodes) - len(self._alive) > max(len(self._alive), 64):
+            self._build(list(self._alive))
+
+    def search(self, query: str, max_distance: int) -> list[tuple[str, int]]:
+        """
+        Returns (name, distance) pairs within max_distance of the query, closest first.
+        """
+        if self._root is None:
+            return []
+        word = query.casefold()
+        masks = _pattern(word)
+        found = []
+        stack = [self._root]
+        while stack:
+            node_word, name, children = stack.pop()
+            distance = _distance(word, masks, node_word)
+            if distance <= max_distance and name in self._alive:
+                found.append((name, distance))
+            for edge, child in children.items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found
+
+
+class NoteIndex:
+    """
+    Positional inverted index over note titles and texts, ranked with BM25.
+    Words in double quotes are matched as a phrase.
+    """
+
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, records=()) -> None:
+        self._postings = defaultdict(dict)  # term -> {name: [positions]}
+        self._terms = {}  # name -> terms of the note, to unindex it without scanning every term
+        self._lengths = {}
+        self._total_length = 0
+        for name, record in records:
+            self.add(name, record)
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        return re.findall(r"\w+", text.casefold())
+
+    def add(self, name: str, record) -> None:
+        note = record.note
+        if note is not None:
+            self.add_note(name, note.title, note.text)
+
+    def add_note(self, name: str, title: str, text: str) -> None:
+        # Між заголовком і текстом лишаємо проміжок, щоб фраза не "склеїла" їх
+        title = self.tokenize(title)
+        tokens = list(enumerate(title)) + [(len(title) + 1 + i, term) for i, term in enumerate(self.tokenize(text))]
+        for position, term in tokens:
+            self._postings[term].setdefault(name, []).append(position)
+        self._terms[name] = {term for _, term in tokens}
+        self._lengths[name] = len(tokens)
+        self._total_length += len(tokens)
+
+    def discard(self, name: str) -> None:
+        length = self._lengths.pop(name, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._terms.pop(name):
+            docs = self._postings[term]
+            docs.pop(name, None)
+            if not docs:
+                del self._postings[term]
+
+    def _has_phrase(self, name: str, phrase: list[str]) -> bool:
+        positions = [self._postings[term].get(name, ()) for term in phrase]
+        for start in positions[0]:
+            if all(start + i in positions[i] for i in range(1, len(phrase))):
+                return True
+        return False
+
+    def search(self, query: str, limit: int = 10) -> list[str]:
+        phrases = [self.tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+        phrases = [phrase for phrase in phrases if phrase]
+        terms = set(self.tokenize(re.sub(r'"[^"]*"', " ", query)))
+        for phrase in phrases:
+            terms.update(phrase)
+        terms = [term for term in terms if term in self._postings]
+        if not terms or not self._lengths:
+            return []
+
+        # Фрази спершу звужують коло нотаток до тих, що містять усі їхні слова
+        allowed = None
+        for phrase in phrases:
+            if not all(term in self._postings for term in phrase):
+                return []
+            for docs in sorted((self._postings[term] for term in phrase), key=len):
+                allowed = set(docs) if allowed is None else allowed & docs.keys()
+        if allowed is not None:
+            allowed = {name for name in allowed if all(self._has_phrase(name, phrase) for phrase in phrases)}
+
+        count = len(self._lengths)
+        average_length = self._total_length / count
+        scores = defaultdict(float)
+        for term in terms:
+            docs = self._postings[term]
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            names = docs if allowed is None else (name for name in allowed if name in docs)
+            for name in names:
+                tf = len(docs[name])
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[name] / average_length)
+                scores[name] += idf * tf * (self.K1 + 1) / (tf + norm)
+        candidates = ((score, name) for name, score in scores.items())
+        return [name for _, name in heapq.nlargest(limit, candidates)]
+
+
+class TagIndex:
+    """
+    Inverted index from a normalized tag to the names of records whose note has it.
+    """
+
+    def __init__(self, records=()) -> None:
+        self._postings = defaultdict(set)
+        self._tags = {}
+        for name, record in records:
+            self.add(name, record)
+
+    def add(self, name: str, record) -> None:
+        if record.note is None or not record.note.tags:
+            return
+        self._tags[name] = record.note.tags
+        for tag in record.note.tags:
+            self._postings[tag].add(name)
+
+    def discard(self, name: str) -> None:
+        for tag in self._tags.pop(name, ()):
+            postings = self._postings[tag]
+            postings.discard(name)
+            if not postings:
+                del self._postings[tag]
+
+    def tags_of(self, name: str) -> frozenset[str]:
+        return self._tags.get(name, frozenset())
+
+    def search(self, tags: list[str], match_all: bool = False) -> set[str]:
+        postings = [self._postings.get(tag, set()) for tag in tags]
+        if not postings:
+            return set()
+        if match_all:
+            postings.sort(key=len)
+            return set(postings[0]).intersection(*postings[1:])
+        return set().union(*postings)
+
+    def counts(self) -> list[tuple[str, int]]:
+        return sorted(((tag, len(names)) for tag, names in self._postings.items()), key=lambda item: (-item[1], item[0]))
+
+
+class ValueIndex:
+    """
+    Reverse index from a normalized field value (phone number, email) to the names
+    of records holding it. A value may belong to several records, which is how
+    book-wide duplicates are found.
+    """
+
+    def __init__(self, values_of, normalize, records=()) -> None:
+        self._values_of = values_of
+        self._normalize = normalize
+        self._postings = defaultdict(set)
+        self._values = {}
+        for name, record in records:
+            self.add(name, record)
+
+    def add(self, name: str, record) -> None:
+        values = {self._normalize(value) for value in self._values_of(record)}
+        if not values:
+            return
+        self._values[name] = values
+        for value in values:
+            self._postings[value].add(name)
+
+    def discard(self, name: str) -> None:
+        for value in self._values.pop(name, ()):
+            postings = self._postings[value]
+            postings.discard(name)
+            if not postings:
+                del self._postings[value]
+
+    def owners(self, value: str) -> set[str]:
+        return set(self._postings.get(self._normalize(value), ()))
+
+    def duplicates(self) -> dict[str, set[str]]:
+        return {value: set(names) for value, names in self._postings.items() if len(names) > 1}
+
+
+class SortedKeys:
+    """
+    Keys kept in sorted order for keyset pagination: a page is read by binary
+    search from the key of the previous page's last (or first) entry, so it costs
+    O(log n + page size) and stays stable while entries are added or removed.
+    """
+
+    def __init__(self, keys=()) -> None:
+        self._entries = sorted(keys)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def after(self, key, limit: int) -> list:
+        """
+        Up to `limit` keys greater than `key` (from the first key when `key` is None), ascending.
+        """
+        start = 0 if key is None else bisect_right(self._entries, key)
+        return self._entries[start:start + limit]
+
+    def before(self, key, limit: int) -> list:
+        """
+        Up to `limit` keys less than `key` (up to the last key when `key` is None), ascending.
+        """
+        end = len(self._entries) if key is None else bisect_left(self._entries, key)
+        return self._entries[max(0, end - limit):end]
+
+    def rank(self, key) -> int:
+        """
+        Number of keys less than `key`.
+        """
+        return bisect_left(self._entries, key)
+
+
+class NameOrder(SortedKeys):
+    """
+    Contact names in sorted order, for paging through the book by name.
+    """
+
+    def __init__(self, names=()) -> None:
+        super().__init__(names)
+
+    def add(self, name: str) -> None:
+        insort(self._entries, name)
+
+    def discard(self, name: str) -> None:
+        position = bisect_left(self._entries, name)
+        if position < len(self._entries) and self._entries[position] == name:
+            del self._entries[position]
+
+
+class BirthdayIndex(SortedKeys):
+    """
+    Calendar of birthdays: (month, day, name) entries kept sorted, so the birthdays
+    falling between two days of the year are found by binary search.
+    """
+
+    def __init__(self, records=()) -> None:
+        self._keys = {}
+        for name, record in records:
+            self._key(name, record)
+        super().__init__(self._keys.values())
+
+    def _key(self, name: str, record) -> tuple[int, int, str] | None:
+        if record.birthday is None:
+            return None
+        birthday = record.birthday.date
+        key = self._keys[name] = (birthday.month, birthday.day, name)
+        return key
+
+    def add(self, name: str, record) -> None:
+        key = self._key(name, record)
+        if key is not None:
+            insort(self._entries, key)
+
+    def discard(self, name: str) -> None:
+        key = self._keys.pop(name, None)
+        if key is not None:
+            del self._entries[bisect_left(self._entries, key)]
+
+    def between(self, start: tuple[int, int], end: tuple[int, int]) -> list[str]:
+        """
+        Names with a birthday from start to end inclusive, both given as (month, day).
+        """
+        lo = bisect_left(self._entries, start)
+        hi = bisect_left(self._entries, (end[0], end[1] + 1))
+        return [name for _, _, name in self._entries[lo:hi]]
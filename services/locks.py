@@ -0,0 +1,138 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+# Блокування книги для роботи з кількох потоків (серверний режим, імпорт, автозбереження).
+# Пошукові запити виконуються паралельно, зміни складу книги та її індексів - по одній.
+
+
+class ReadWriteLock:
+    """
+    Lock that lets any number of threads read at once and gives one writer
+    exclusive access. Waiting writers block new readers, so writes are not starved.
+
+    Both sides are reentrant: a thread holding the read lock may take it again,
+    and the writer may take either side again. Upgrading from read to write would
+    deadlock with another upgrading reader, so it raises RuntimeError.
+
+    `with lock:` takes the write side, so the lock can stand in for an RLock.
+    """
+
+    def __init__(self) -> None:
+        self._mutex = threading.Lock()
+        self._condition = threading.Condition(self._mutex)
+        self._readers = 0
+        self._writer = None
+        self._writer_depth = 0
+        self._waiting_writers = 0
+        # Потік -> скільки разів він узяв блокування на читання
+        self._reads = {}
+
+    def acquire_read(self) -> None:
+        me = threading.get_ident()
+        if self._writer == me:
+            # Письменник читає без окремого обліку: книга й так належить лише йому
+            self._writer_depth += 1
+            return
+        depth = self._reads.get(me)
+        if depth:
+            self._reads[me] = depth + 1
+            return
+        with self._mutex:
+            while self._writer is not None or self._waiting_writers:
+                self._condition.wait()
+            self._readers += 1
+        self._reads[me] = 1
+
+    def release_read(self) -> None:
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth -= 1
+            return
+        depth = self._reads[me] - 1
+        if depth:
+            self._reads[me] = depth
+            return
+        del self._reads[me]
+        with self._mutex:
+            self._readers -= 1
+            if not self._readers:
+                self._condition.notify_all()
+
+    def acquire_write(self) -> None:
+        me = threading.get_ident()
+        if self._writer == me:
+            self._writer_depth += 1
+            return
+        if me in self._reads:
+            raise RuntimeError("Cannot take the write lock while holding the read lock")
+        with self._mutex:
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._condition.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writer_depth = 1
+
+    def release_write(self) -> None:
+        if self._writer != threading.get_ident():
+            raise RuntimeError("Cannot release a write lock held by another thread")
+        self._writer_depth -= 1
+        if self._writer_depth:
+            return
+        with self._mutex:
+            self._writer = None
+            self._condition.notify_all()
+
+    @contextmanager
+    def read(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+    def __enter__(self) -> "ReadWriteLock":
+        self.acquire_write()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release_write()
+
+
+def reading(method):
+    """
+    Runs a book method under the shared side of the book's lock.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.lock.acquire_read()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.lock.release_read()
+    return wrapper
+
+
+def writing(method):
+    """
+    Runs a book method under the exclusive side of the book's lock.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.lock.acquire_write()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.lock.release_write()
+    return wrapper
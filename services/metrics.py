@@ -0,0 +1,167 @@
+import json
+import os
+import socket
+import threading
+from datetime import datetime
+
+# Метрики команд: кількість викликів, помилок і гістограма затримок для кожної команди.
+# Вимкнені метрики - це metrics = None у виклику команди, тож без них вимірювання не виконується взагалі.
+
+# Гістограма зберігає 4 старші біти затримки в наносекундах (провідна одиниця + 3 біти):
+# 8 кошиків на кожне подвоєння, тобто похибка перцентиля до ~6%, при сталій пам'яті
+SUB_BUCKET_BITS = 3
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+
+def bucket_of(value: int) -> int:
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def bucket_bounds(index: int) -> tuple[int, int]:
+    """
+    Returns the smallest and largest value that fall into a bucket.
+    """
+    if index < 2 * SUB_BUCKETS:
+        return index, index
+    shift = index // SUB_BUCKETS - 1
+    mantissa = index % SUB_BUCKETS + SUB_BUCKETS
+    return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value: int) -> None:
+        index = bucket_of(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction: float) -> int:
+        """
+        Value below which `fraction` of the samples fall (middle of its bucket).
+        """
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * fraction))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                low, high = bucket_bounds(index)
+                return min((low + high) // 2, self.max)
+        return self.max
+
+
+class CommandStats:
+    def __init__(self) -> None:
+        self.errors = 0
+        self.latency = Histogram()
+
+
+class Metrics:
+    """
+    Per-command call counts, errors and latency histograms. Safe to record from
+    several threads (server mode).
+    """
+
+    def __init__(self) -> None:
+        self.started = datetime.now()
+        self._commands = {}
+        self._lock = threading.Lock()
+
+    def record(self, command: str, elapsed_ns: int, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._commands.get(command)
+            if stats is None:
+                stats = self._commands[command] = CommandStats()
+            stats.latency.add(elapsed_ns)
+            stats.errors += failed
+
+    def snapshot(self) -> list[dict]:
+        """
+        Returns one dict per command, most called first; latencies in milliseconds,
+        the histogram as {upper bound in ns: samples}.
+        """
+        with self._lock:
+            items = [(command, stats.errors, stats.latency) for command, stats in self._commands.items()]
+            rows = []
+            for command, errors, latency in items:
+                rows.append({
+                    "command": command,
+                    "count": latency.count,
+                    "errors": errors,
+                    "mean_ms": latency.total / latency.count / 1e6,
+                    "p50_ms": latency.percentile(0.50) / 1e6,
+                    "p95_ms": latency.percentile(0.95) / 1e6,
+                    "p99_ms": latency.percentile(0.99) / 1e6,
+                    "max_ms": latency.max / 1e6,
+                    "histogram": {bucket_bounds(index)[1]: count for index, count in sorted(latency.buckets.items())},
+                })
+        rows.sort(key=lambda row: (-row["count"], row["command"]))
+        return rows
+
+    def json_lines(self) -> str:
+        now = datetime.now().isoformat(timespec="seconds")
+        started = self.started.isoformat(timespec="seconds")
+        return "".join(
+            json.dumps({"time": now, "since": started, **row}) + "\n" for row in self.snapshot()
+        )
+
+    def dump(self, path: str) -> None:
+        """
+        Appends the current metrics to a JSON Lines file, one line per command.
+        """
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.json_lines())
+
+
+class MetricsExporter:
+    """
+    Serves the metrics on a local socket (HOST:PORT or unix:PATH): every
+    connection receives the current JSON Lines snapshot and is closed.
+    """
+
+    def __init__(self, metrics: Metrics, address: str) -> None:
+        self.metrics = metrics
+        self.address = address
+        if address.startswith("unix:"):
+            self.path = address[len("unix:"):]
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(self.path)
+        else:
+            self.path = None
+            host, _, port = address.rpartition(":")
+            self._socket = socket.create_server((host or "127.0.0.1", int(port)))
+        self._socket.listen()
+        self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+
+    def start(self) -> "MetricsExporter":
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while True:
+            try:
+                connection, _ = self._socket.accept()
+            except OSError:
+                return
+            with connection:
+                try:
+                    connection.sendall(self.metrics.json_lines().encode("utf-8"))
+                except OSError:
+                    pass
+
+    def stop(self) -> None:
+        self._socket.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
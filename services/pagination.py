@@ -0,0 +1,127 @@
+from contextvars import ContextVar
+from datetime import date
+from models.contact import Record
+from services.address_book import AddressBook
+
+# Посторінковий перегляд книги. Сесія пам'ятає не номер сторінки, а ключі першого й останнього
+# запису на ній, тож наступна сторінка читається з відсортованого індексу від останнього ключа
+# і не "з'їжджає", коли між переглядами контакти додаються чи видаляються.
+ORDERS = ("name", "birthday")
+DEFAULT_PAGE_SIZE = 5
+
+
+class PageSession:
+    """
+    Browses an address book page by page in a stable sorted order:
+    "name" - alphabetically, "birthday" - contacts with a birthday in calendar order
+    starting from today (the order wraps around the end of the year).
+
+    Each page is read from the book's sorted index (AddressBook.order_index) starting
+    at the key of the previous page's last entry, so a page costs O(log n + page size).
+    """
+
+    def __init__(self, book: AddressBook, order: str = "name", page_size: int = DEFAULT_PAGE_SIZE,
+                 today: date | None = None) -> None:
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order '{order}'. Use one of: {', '.join(ORDERS)}.")
+        if page_size < 1:
+            raise ValueError("Page size must be positive.")
+        self.book = book
+        self.order = order
+        self.page_size = page_size
+        # Календар днів народження починається з сьогоднішнього дня; ім'я "" менше за будь-яке ім'я
+        today = today or date.today()
+        self.origin = (today.month, today.day, "") if order == "birthday" else None
+        # Ключі першого та останнього запису поточної сторінки
+        self.first = None
+        self.last = None
+
+    # Порядок "birthday" - це календар, зсунутий до сьогоднішнього дня: спершу ключі від origin
+    # до кінця року, потім з початку року до origin
+
+    def _after(self, index, key, limit: int) -> list:
+        if self.origin is None:
+            return index.after(key, limit)
+        if key is not None and key < self.origin:
+            return [entry for entry in index.after(key, limit) if entry < self.origin]
+        keys = index.after(self.origin if key is None else key, limit)
+        if len(keys) < limit:
+            keys += [entry for entry in index.after(None, limit - len(keys)) if entry < self.origin]
+        return keys
+
+    def _before(self, index, key, limit: int) -> list:
+        if self.origin is None:
+            return index.before(key, limit)
+        if key is not None and key >= self.origin:
+            return [entry for entry in index.before(key, limit) if entry >= self.origin]
+        keys = index.before(self.origin if key is None else key, limit)
+        if len(keys) < limit:
+            keys = [entry for entry in index.before(None, limit - len(keys)) if entry >= self.origin] + keys
+        return keys
+
+    def _rank(self, index, key) -> int:
+        if self.origin is None:
+            return index.rank(key)
+        start = index.rank(self.origin)
+        position = index.rank(key)
+        return position - start if key >= self.origin else len(index) - start + position
+
+    def _page(self, keys: list) -> list[Record]:
+        if keys:
+            self.first, self.last = keys[0], keys[-1]
+        return [self.book.data[key if isinstance(key, str) else key[-1]] for key in keys]
+
+    def first_page(self) -> list[Record]:
+        with self.book.lock.read():
+            return self._page(self._after(self.book.order_index(self.order), None, self.page_size))
+
+    def next_page(self) -> list[Record]:
+        """
+        Returns the page after the current one, or an empty list (keeping the current page) at the end.
+        """
+        with self.book.lock.read():
+            return self._page(self._after(self.book.order_index(self.order), self.last, self.page_size))
+
+    def prev_page(self) -> list[Record]:
+        """
+        Returns the page before the current one, or an empty list (keeping the current page) at the start.
+        """
+        with self.book.lock.read():
+            return self._page(self._before(self.book.order_index(self.order), self.first, self.page_size))
+
+    def position(self) -> tuple[int, int, bool, bool]:
+        """
+        Returns (page number, number of pages, is first page, is last page) for the current page.
+        """
+        with self.book.lock.read():
+            index = self.book.order_index(self.order)
+            total = max(1, -(-len(index) // self.page_size))
+            if self.first is None:
+                return 1, total, True, True
+            number = min(total, self._rank(index, self.first) // self.page_size + 1)
+            is_first = not self._before(index, self.first, 1)
+            is_last = not self._after(index, self.last, 1)
+            return number, total, is_first, is_last
+
+
+class Viewer:
+    """
+    Browsing state of one client: the page session that 'next' / 'prev' continue.
+    The CLI has a single client and keeps its session in the book (book.pages);
+    the server gives every connection its own Viewer.
+    """
+
+    def __init__(self) -> None:
+        self.pages = None
+
+
+# Переглядач поточного з'єднання сервера; None - CLI, сесія живе в самій книзі
+current_viewer = ContextVar("viewer", default=None)
+
+
+def viewer(book: AddressBook):
+    """
+    Returns the object whose `pages` holds the current client's PageSession.
+    """
+    current = current_viewer.get()
+    return book if current is None else current
@@ -0,0 +1,406 @@
+import re
+from abc import ABC, abstractmethod
+from datetime import date, timedelta
+from itertools import islice
+from birthday import birthday_in_year, _calendar_ranges
+from models.contact import Record, normalize_tags
+from services.address_book import AddressBook
+from services.indexes import normalize_phone, normalize_email
+
+# Складені запити: умови, об'єднані AND, наприклад
+#   name~ann AND tag:work AND birthday<30d AND has:email
+# Планувальник починає з умови, для якої є найвибірковіший індекс (ім'я, теги, календар днів
+# народження, телефони, email, нотатки), а решту умов перевіряє по черзі на кандидатах-генераторі.
+# Працює лише через публічні методи книги, тож однаково для pickle- та SQLite-книг.
+HAS_FIELDS = ("phone", "email", "birthday", "address", "note", "tag")
+TERM = re.compile(r"(\w+)(:|~|\^|<)(.+)")
+# Значення з пробілами беруться в лапки: address~"lesi ukrainky"
+TOKEN = re.compile(r'(?:[^\s"]+|"[^"]*")+')
+
+
+class Term(ABC):
+    """
+    One condition of a query. `matches` tests a record; terms backed by an index
+    (`index` is set) also estimate how many contacts they select and yield those
+    contacts as a plan source. A term without an index is a filter only.
+    """
+    # Назва структури, з якої умова може видати кандидатів; None - лише фільтр
+    index = None
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        # Умова з індексом без власних estimate / candidates помітна одразу, а не посеред запиту
+        if cls.index is not None and (cls.estimate is Term.estimate or cls.candidates is Term.candidates):
+            raise TypeError(f"{cls.__name__} declares index '{cls.index}' but does not override estimate() and candidates()")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    @abstractmethod
+    def matches(self, record: Record) -> bool:
+        ...
+
+    def estimate(self, book: AddressBook) -> int | None:
+        # Без індексу оцінки немає
+        return None
+
+    def candidates(self, book: AddressBook):
+        # Без індексу - усі контакти в порядку імен, відібрані фільтром
+        order = book.order_index("name")
+        return (book.data[name] for name in order.after(None, len(order)) if self.matches(book.data[name]))
+
+
+class MaterializedTerm(Term):
+    # Умова, для якої оцінка - це сам результат пошуку в індексі: він обчислюється один раз
+    _found = None
+
+    @abstractmethod
+    def lookup(self, book: AddressBook) -> list[Record]:
+        ...
+
+    def estimate(self, book: AddressBook) -> int:
+        self._found = self.lookup(book)
+        return len(self._found)
+
+    def candidates(self, book: AddressBook):
+        return iter(self._found if self._found is not None else self.lookup(book))
+
+
+class NameIs(Term):
+    index = "name dict"
+
+    def __init__(self, text: str, name: str) -> None:
+        super().__init__(text)
+        self.name = name.casefold().capitalize()
+
+    def matches(self, record: Record) -> bool:
+        return record.name.value == self.name
+
+    def estimate(self, book: AddressBook) -> int:
+        return 1
+
+    def candidates(self, book: AddressBook):
+        record = book.find(self.name)
+        return iter([record] if record is not None else [])
+
+
+class NameContains(MaterializedTerm):
+    index = "name trigrams"
+
+    def __init__(self, text: str, fragment: str) -> None:
+        super().__init__(text)
+        self.fragment = fragment.casefold()
+
+    def matches(self, record: Record) -> bool:
+        return self.fragment in record.name.value.casefold()
+
+    def lookup(self, book: AddressBook) -> list[Record]:
+        return book.search_by_name(self.fragment)
+
+
+class NamePrefix(Term):
+    index = "name order"
+
+    def __init__(self, text: str, prefix: str) -> None:
+        super().__init__(text)
+        self.prefix = prefix.casefold()
+
+    def matches(self, record: Record) -> bool:
+        return record.name.value.casefold().startswith(self.prefix)
+
+    def estimate(self, book: AddressBook) -> int:
+        # Імена зберігаються як "Ann", тож усі імена з префіксом лежать між "An" та "An\U0010ffff"
+        start = self.prefix.capitalize()
+        order = book.order_index("name")
+        return order.rank(start + "\U0010ffff") - order.rank(start)
+
+    def candidates(self, book: AddressBook):
+        return (book.data[name] for name in book.names_with_prefix(self.prefix))
+
+
+class TagIs(Term):
+    index = "tags"
+
+    def __init__(self, text: str, tag: str) -> None:
+        super().__init__(text)
+        self.tag = next(iter(normalize_tags([tag])), "")
+
+    def matches(self, record: Record) -> bool:
+        return record.note is not None and self.tag in record.note.tags
+
+    def estimate(self, book: AddressBook) -> int:
+        return dict(book.tag_counts()).get(self.tag, 0)
+
+    def candidates(self, book: AddressBook):
+        return (record for record, _ in book.find_by_tags([self.tag]))
+
+
+class BirthdayWithin(Term):
+    index = "birthday calendar"
+
+    def __init__(self, text: str, days: int, today: date) -> None:
+        super().__init__(text)
+        if days < 0:
+            raise ValueError("Number of days must not be negative.")
+        self.days = days
+        self.today = today
+        self.ranges = _calendar_ranges(today, today + timedelta(days=days))
+
+    def matches(self, record: Record) -> bool:
+        if record.birthday is None:
+            return False
+        upcoming = birthday_in_year(record.birthday.date, self.today.year)
+        if upcoming < self.today:
+            upcoming = birthday_in_year(record.birthday.date, self.today.year + 1)
+        return (upcoming - self.today).days <= self.days
+
+    def estimate(self, book: AddressBook) -> int:
+        order = book.order_index("birthday")
+        return sum(order.rank((end[0], end[1] + 1, "")) - order.rank((*start, "")) for start, end in self.ranges)
+
+    def candidates(self, book: AddressBook):
+        # Найближчі дні народження першими
+        for start, end in self.ranges:
+            yield from book.birthdays_between(start, end)
+
+
+class BirthdayMonth(BirthdayWithin):
+    def __init__(self, text: str, month: int) -> None:
+        Term.__init__(self, text)
+        if not 1 <= month <= 12:
+            raise ValueError("Month must be a number from 1 to 12.")
+        self.month = month
+        self.ranges = [((month, 1), (month, 31))]
+
+    def matches(self, record: Record) -> bool:
+        return record.birthday is not None and record.birthday.date.month == self.month
+
+
+class PhoneIs(MaterializedTerm):
+    index = "phones"
+
+    def __init__(self, text: str, phone: str) -> None:
+        super().__init__(text)
+        self.phone = normalize_phone(phone)
+
+    def matches(self, record: Record) -> bool:
+        return any(normalize_phone(phone.value) == self.phone for phone in record.phones)
+
+    def lookup(self, book: AddressBook) -> list[Record]:
+        return book.find_by_phone(self.phone)
+
+
+class EmailIs(MaterializedTerm):
+    index = "emails"
+
+    def __init__(self, text: str, email: str) -> None:
+        super().__init__(text)
+        self.email = normalize_email(email)
+
+    def matches(self, record: Record) -> bool:
+        return any(normalize_email(email.value) == self.email for email in record.emails)
+
+    def lookup(self, book: AddressBook) -> list[Record]:
+        return book.find_by_email(self.email)
+
+
+class NoteHasWord(MaterializedTerm):
+    index = "note words"
+
+    def __init__(self, text: str, word: str) -> None:
+        super().__init__(text)
+        self.words = re.findall(r"\w+", word.casefold())
+        if not self.words:
+            raise ValueError(f"'{text}' has no words to look for.")
+
+    def matches(self, record: Record) -> bool:
+        if record.note is None:
+            return False
+        words = set(re.findall(r"\w+", f"{record.note.title} {record.note.text}".casefold()))
+        return all(word in words for word in self.words)
+
+    def lookup(self, book: AddressBook) -> list[Record]:
+        # Кожне слово в лапках, тож індекс нотаток видає лише нотатки з усіма словами, а не
+        # найкращі за рангом з будь-яким із них; matches лишається остаточною перевіркою
+        query = " ".join(f'"{word}"' for word in self.words)
+        return [record for record in book.find_by_note(query, len(book)) if self.matches(record)]
+
+
+class FieldContains(Term):
+    def __init__(self, text: str, field: str, fragment: str) -> None:
+        super().__init__(text)
+        self.field = field
+        self.fragment = fragment.casefold()
+
+    def values(self, record: Record) -> list[str]:
+        if self.field == "phone":
+            return [phone.value for phone in record.phones]
+        if self.field == "email":
+            return [email.value for email in record.emails]
+        if self.field == "address":
+            return [record.address.value] if record.address else []
+        return [f"{record.note.title} {record.note.text}"] if record.note else []
+
+    def matches(self, record: Record) -> bool:
+        return any(self.fragment in value.casefold() for value in self.values(record))
+
+
+class Has(Term):
+    def __init__(self, text: str, field: str) -> None:
+        super().__init__(text)
+        if field not in HAS_FIELDS:
+            raise ValueError(f"Unknown field '{field}' in '{text}'. Use one of: {', '.join(HAS_FIELDS)}.")
+        self.field = field
+
+    def matches(self, record: Record) -> bool:
+        if self.field == "phone":
+            return bool(record.phones)
+        if self.field == "email":
+            return bool(record.emails)
+        if self.field == "tag":
+            return record.note is not None and bool(record.note.tags)
+        return getattr(record, self.field) is not None
+
+
+class Not(Term):
+    def __init__(self, text: str, term: Term) -> None:
+        super().__init__(text)
+        self.term = term
+
+    def matches(self, record: Record) -> bool:
+        return not self.term.matches(record)
+
+
+def parse_term(text: str, today: date) -> Term:
+    match = TERM.fullmatch(text.replace('"', ""))
+    if match is None:
+        raise ValueError(f"Cannot understand '{text}'. Conditions look like field:value, field~text or birthday<30d.")
+    field, op, value = match.groups()
+    if field == "name" and op in ":~^":
+        return {":": NameIs, "~": NameContains, "^": NamePrefix}[op](text, value)
+    if field == "tag" and op == ":":
+        return TagIs(text, value)
+    if field == "birthday" and op == "<" and re.fullmatch(r"\d+d?", value):
+        return BirthdayWithin(text, int(value.rstrip("d")), today)
+    if field == "birthday" and op == ":" and value.isdigit():
+        return BirthdayMonth(text, int(value))
+    if field == "phone" and op == ":":
+        return PhoneIs(text, value)
+    if field == "email" and op == ":":
+        return EmailIs(text, value)
+    if field == "note" and op == ":":
+        return NoteHasWord(text, value)
+    if field in ("phone", "email", "address", "note") and op == "~":
+        return FieldContains(text, field, value)
+    if field == "has" and op == ":":
+        return Has(text, value)
+    raise ValueError(f"Unsupported condition '{text}'. Use 'help' for the query syntax.")
+
+
+def parse_query(query: str, today: date | None = None) -> list[Term]:
+    """
+    Splits a query into terms joined by AND; a term may be negated with NOT.
+    Values with spaces go in double quotes: address~"lesi ukrainky".
+    """
+    today = today or date.today()
+    tokens = TOKEN.findall(query)
+    terms = []
+    expect_term = True
+    negate = False
+    for token in tokens:
+        keyword = token.casefold()
+        if not expect_term:
+            if keyword != "and":
+                raise ValueError(f"Expected AND before '{token}'.")
+            expect_term = True
+        elif keyword == "not" and not negate:
+            negate = True
+        else:
+            term = parse_term(token, today)
+            terms.append(Not(f"not {token}", term) if negate else term)
+            negate = False
+            expect_term = False
+    if not terms or expect_term:
+        raise ValueError("The query is empty or ends with AND / NOT.")
+    return terms
+
+
+class Step:
+    def __init__(self, term: Term | None, source: str | None, estimate: int | None) -> None:
+        self.term = term
+        # Структура, з якої беруться кандидати (лише для першого кроку)
+        self.source = source
+        self.estimate = estimate
+        self.scanned = 0
+        self.passed = 0
+
+    @property
+    def label(self) -> str:
+        return self.term.text if self.term is not None else "all contacts"
+
+
+class Plan:
+    """
+    Execution plan of a query: the first step produces candidates from the most
+    selective index (or from all contacts in name order when no term has one),
+    every other term filters them lazily. Steps count the candidates they scanned.
+    Hold book.lock.read() while iterating `records()`.
+    """
+
+    def __init__(self, book: AddressBook, query: str, today: date | None = None) -> None:
+        self.book = book
+        self.query = query
+        terms = parse_query(query, today)
+        estimates = {}
+        for term in terms:
+            if term.index is not None:
+                estimates[term] = term.estimate(book)
+        # Вибірковіші умови перевіряються раніше; умови без індексу - в кінці, у порядку запиту
+        ordered = sorted(terms, key=lambda term: (term not in estimates, estimates.get(term, 0)))
+        if estimates:
+            source = ordered.pop(0)
+            self.steps = [Step(source, source.index, estimates[source])]
+        else:
+            self.steps = [Step(None, "name order", len(book))]
+        self.steps += [Step(term, None, estimates.get(term)) for term in ordered]
+
+    def _all_records(self):
+        order = self.book.order_index("name")
+        return (self.book.data[name] for name in order.after(None, len(order)))
+
+    def _produce(self, step: Step):
+        records = step.term.candidates(self.book) if step.term is not None else self._all_records()
+        for record in records:
+            step.scanned += 1
+            step.passed += 1
+            yield record
+
+    @staticmethod
+    def _filter(step: Step, records):
+        matches = step.term.matches
+        for record in records:
+            step.scanned += 1
+            if matches(record):
+                step.passed += 1
+                yield record
+
+    def records(self, limit: int | None = None):
+        """
+        Yields the matching Records in the order of the first step's source.
+        """
+        records = self._produce(self.steps[0])
+        for step in self.steps[1:]:
+            records = self._filter(step, records)
+        return records if limit is None else islice(records, limit)
+
+    def explain(self) -> list[str]:
+        """
+        Describes the plan, one line per step; run records() first to fill in the counts.
+        """
+        lines = []
+        for number, step in enumerate(self.steps, start=1):
+            role = f"scan {step.source}" if step.source else "filter"
+            estimate = f"~{step.estimate}" if step.estimate is not None else "-"
+            lines.append(f"{number}. {step.label:<28} {role:<24} estimated {estimate:<8} "
+                         f"scanned {step.scanned} -> {step.passed}")
+        return lines
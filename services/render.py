@@ -0,0 +1,143 @@
+import io
+import os
+import re
+import shlex
+import subprocess
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Вивід довгих списків: рядки з генераторів збираються в буфер і виводяться великими
+# шматками, а не окремим print на кожен рядок. Пам'ять - не більше одного буфера,
+# скільки б рядків не було у відповіді.
+BUFFER_SIZE = 1 << 16
+ANSI_CODES = re.compile(r"\x1b\[[0-9;]*m")
+# -F: не вмикати пейджер, якщо все вміщується на екран; -R: зберегти кольори; -X: не чистити екран
+DEFAULT_PAGER = "less -FRX"
+# Потік виводу поточної команди; None - sys.stdout. Сервер підставляє окремий буфер для кожного
+# виклику (capture), не чіпаючи sys.stdout, у який водночас пишуть інші потоки
+_stream = ContextVar("stream", default=None)
+
+
+class Settings:
+    """
+    Output options set once at startup (main.py --pager / --no-color).
+    """
+    pager = os.environ.get("ADDRESSBOOK_PAGER", "") not in ("", "0")
+    color = "NO_COLOR" not in os.environ
+
+
+def configure(pager: bool | None = None, color: bool | None = None) -> None:
+    if pager is not None:
+        Settings.pager = pager
+    if color is not None:
+        Settings.color = color
+
+
+class Writer:
+    """
+    Buffered line writer over a text stream. Stops accepting lines once the
+    reader has gone away (e.g. the pager was closed), so listings end early.
+    """
+
+    def __init__(self, stream, color: bool = True) -> None:
+        self.stream = stream
+        self.color = color
+        self.closed = False
+        self._lines = []
+        self._size = 0
+
+    def line(self, text: str = "") -> None:
+        if self.closed:
+            return
+        self._lines.append(text)
+        self._size += len(text) + 1
+        if self._size >= BUFFER_SIZE:
+            self.flush()
+
+    def lines(self, rows) -> int:
+        """
+        Writes every row of an iterable; returns how many were written.
+        """
+        count = 0
+        buffered = self._lines
+        for row in rows:
+            if self.closed:
+                break
+            buffered.append(row)
+            self._size += len(row) + 1
+            count += 1
+            if self._size >= BUFFER_SIZE:
+                self.flush()
+        return count
+
+    def flush(self) -> None:
+        if not self._lines or self.closed:
+            return
+        data = "\n".join(self._lines) + "\n"
+        self._lines.clear()
+        self._size = 0
+        if not self.color:
+            data = ANSI_CODES.sub("", data)
+        try:
+            self.stream.write(data)
+            self.stream.flush()
+        except BrokenPipeError:
+            self.closed = True
+
+
+def stream():
+    current = _stream.get()
+    return sys.stdout if current is None else current
+
+
+def echo(*values, sep: str = " ", end: str = "\n") -> None:
+    """
+    print() into the current command's stream.
+    """
+    print(*values, sep=sep, end=end, file=stream())
+
+
+@contextmanager
+def capture():
+    """
+    Collects everything the commands run inside the block write through echo() and
+    output() into a StringIO. Only the current context (thread or task) is affected.
+    """
+    buffer = io.StringIO()
+    token = _stream.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _stream.reset(token)
+
+
+def _pager_process():
+    command = os.environ.get("PAGER") or DEFAULT_PAGER
+    try:
+        return subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE, text=True, encoding="utf-8")
+    except OSError:
+        return None
+
+
+@contextmanager
+def output(pager: bool | None = None):
+    """
+    Opens a buffered Writer for one command's output. With the pager enabled and
+    an interactive terminal, the output is piped through $PAGER (less by default).
+    The target stream is looked up on every call, so capture() keeps working.
+    """
+    target = stream()
+    use_pager = Settings.pager if pager is None else pager
+    process = _pager_process() if use_pager and target.isatty() else None
+    writer = Writer(process.stdin if process else target, Settings.color)
+    try:
+        yield writer
+        writer.flush()
+    finally:
+        if process is not None:
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            process.wait()
@@ -0,0 +1,62 @@
+from collections.abc import Mapping
+from models.contact import Record
+
+# Знімок книги з копіюванням під час запису. Створення знімка - O(1): він ділить із книгою
+# словник записів і самі записи. Книга бере собі копію словника перед першим додаванням
+# чи видаленням контакту, а запис перед першою зміною зберігає свій попередній стан у кожному
+# відкритому знімку (models.contact.mutator -> AddressBook._preserve).
+
+
+class BookSnapshot(Mapping):
+    """
+    Frozen view of an address book (name -> Record) as it was when AddressBook.snapshot()
+    was called. Reading it takes no book lock, so it can be serialized on another thread
+    while commands keep changing the book. Records are returned as detached copies.
+
+    Release the snapshot when done (or use it as a context manager): until then the
+    book keeps the previous state of every record changed after the snapshot.
+    """
+
+    def __init__(self, book, data: dict, generation: int) -> None:
+        self._book = book
+        # Словник книги на момент знімка; книга більше його не змінює
+        self._data = data
+        # Ім'я -> копія запису, зроблена перед його першою зміною після знімка
+        self._saved = {}
+        self.generation = generation
+
+    def __getitem__(self, name: str) -> Record:
+        record = self._data[name]
+        # Під блокуванням запису: або зміна ще не почалася, або попередній стан уже збережено
+        with record.lock:
+            saved = self._saved.get(name)
+            return saved if saved is not None else record.copy()
+
+    def __contains__(self, name) -> bool:
+        return name in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def to_book(self):
+        """
+        Returns a plain AddressBook with the snapshot's records, ready to be pickled.
+        """
+        from services.address_book import AddressBook
+        book = AddressBook()
+        book.data = {name: self[name] for name in self._data}
+        return book
+
+    def release(self) -> None:
+        book, self._book = self._book, None
+        if book is not None:
+            book._release(self)
+
+    def __enter__(self) -> "BookSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
@@ -0,0 +1,68 @@
+import os
+from storage import pickle_backend, sqlite_backend, binary_backend, shard_backend
+from storage.autosave import AutoSaver, BatchSaver, DEFAULT_INTERVAL, DEFAULT_EVERY
+
+DEFAULT_FILENAME = os.environ.get("ADDRESSBOOK_FILE", "user_data/addressbook.pkl")
+
+# Формат сховища визначається розширенням файлу
+BACKENDS = {
+    ".pkl": pickle_backend,
+    ".db": sqlite_backend,
+    ".sqlite": sqlite_backend,
+    ".abk": binary_backend,
+    ".shards": shard_backend,
+}
+
+def get_backend(filename):
+    extension = os.path.splitext(filename)[1].casefold()
+    try:
+        return BACKENDS[extension]
+    except KeyError:
+        raise ValueError(f"Unsupported storage format '{extension}'. Use one of: {', '.join(BACKENDS)}")
+
+def load_data(filename=DEFAULT_FILENAME):
+    return get_backend(filename).load(filename)
+
+def flush_data(book):
+    with book.lock:
+        names = book.take_dirty()
+    if book.store is None or not names:
+        # SQLite записує зміни одразу
+        return 0
+    try:
+        return book.store.flush(book, names)
+    except BaseException:
+        # Запис не вдався (диск заповнений, немає доступу): імена повертаються до книги,
+        # щоб їх записало наступне збереження
+        with book.lock:
+            book.dirty |= names
+        raise
+
+def start_autosave(book, interval=DEFAULT_INTERVAL, every=DEFAULT_EVERY):
+    if interval <= 0:
+        return None
+    book.autosave = AutoSaver(book, flush_data, interval, every).start()
+    return book.autosave
+
+def start_batch_save(book, every=0):
+    # Пакетний режим: зберігаємо кожні `every` змін у тому ж потоці (0 - лише в кінці)
+    book.autosave = BatchSaver(book, flush_data, every).start()
+    return book.autosave
+
+def save_data(book, filename=DEFAULT_FILENAME):
+    if book.autosave is not None:
+        book.autosave.stop()
+        book.autosave = None
+    flush_data(book)
+    get_backend(filename).save(book, filename)
+
+def rebalance_data(book, count):
+    if not isinstance(book.store, shard_backend.ShardStore):
+        raise ValueError("Shards can only be rebalanced for a '.shards' address book.")
+    flush_data(book)
+    book.store.rebalance(book, count)
+
+def migrate_data(book, target):
+    if os.path.exists(target):
+        raise ValueError(f"File '{target}' already exists.")
+    get_backend(target).export(book, target)
@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+# Налаштування автозбереження через змінні середовища
+DEFAULT_INTERVAL = float(os.environ.get("ADDRESSBOOK_AUTOSAVE_INTERVAL", "5"))  # seconds, 0 вимикає потік
+DEFAULT_EVERY = int(os.environ.get("ADDRESSBOOK_AUTOSAVE_EVERY", "1"))  # mutations
+
+
+class AutoSaver:
+    """
+    Background thread that flushes the book's dirty records every `interval`
+    seconds or as soon as `every` mutations have been reported via notify().
+    """
+
+    def __init__(self, book, flush, interval: float = DEFAULT_INTERVAL, every: int = DEFAULT_EVERY) -> None:
+        self.book = book
+        self.flush = flush
+        self.interval = interval
+        self.every = max(every, 1)
+        self.pending = 0
+        self.saves = 0
+        self.bytes_written = 0
+        self.last_latency = 0.0
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.failures = 0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+
+    def start(self) -> "AutoSaver":
+        self._thread.start()
+        return self
+
+    def notify(self) -> None:
+        self.pending += 1
+        if self.pending >= self.every:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.save()
+            except Exception as e:
+                # Невдале збереження не зупиняє потік: незаписані імена лишилися в book.dirty
+                self.failures += 1
+                self.last_error = e
+
+    def save(self) -> None:
+        if not self.book.dirty:
+            return
+        self.pending = 0
+        start = time.perf_counter()
+        written = self.flush(self.book)
+        latency = time.perf_counter() - start
+        self.saves += 1
+        self.bytes_written += written
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_latency += latency
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.save()
+
+    def stats(self) -> dict:
+        return {
+            "saves": self.saves,
+            "pending": len(self.book.dirty),
+            "bytes_written": self.bytes_written,
+            "failures": self.failures,
+            "last_error": str(self.last_error) if self.last_error is not None else None,
+            "last_latency_ms": self.last_latency * 1000,
+            "avg_latency_ms": self.total_latency / self.saves * 1000 if self.saves else 0.0,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+class BatchSaver(AutoSaver):
+    """
+    Synchronous saver for scripted runs: flushes in the caller's thread after
+    every `every` mutations, or only on stop() when `every` is 0.
+    """
+
+    def __init__(self, book, flush, every: int = 0) -> None:
+        super().__init__(book, flush, 0, every)
+        self.every = every
+
+    def start(self) -> "BatchSaver":
+        return self
+
+    def notify(self) -> None:
+        self.pending += 1
+        if self.every and self.pending >= self.every:
+            self.save()
+
+    def stop(self) -> None:
+        self.save()
@@ -0,0 +1,311 @@
+import json
+import mmap
+import os
+import struct
+from collections.abc import MutableMapping
+from models.contact import Record, Phone, Email, Birthday, Address, Note
+from services.address_book import AddressBook
+from services.locks import writing
+from storage.journal import Journal
+
+# Формат файлу .abk:
+#   заголовок | блоки записів | імена | індекс (відсортовані за іменем пари ім'я -> зміщення блоку)
+# Файл відображається в пам'ять (mmap), запис декодується лише під час першого звернення.
+MAGIC = b"ABK\x00"
+VERSION = 1
+HEADER = struct.Struct("<4sHIQ")  # magic, version, count, index offset
+ENTRY = struct.Struct("<QHQI")  # name offset, name length, blob offset, blob length
+LENGTH = struct.Struct("<I")
+NONE_LENGTH = 0xFFFFFFFF
+
+
+def _pack_str(value: str | None) -> bytes:
+    if value is None:
+        return LENGTH.pack(NONE_LENGTH)
+    raw = value.encode("utf-8")
+    return LENGTH.pack(len(raw)) + raw
+
+
+def _unpack_str(buffer, offset: int) -> tuple[str | None, int]:
+    (length,) = LENGTH.unpack_from(buffer, offset)
+    offset += LENGTH.size
+    if length == NONE_LENGTH:
+        return None, offset
+    return bytes(buffer[offset:offset + length]).decode("utf-8"), offset + length
+
+
+def encode_record(record: Record) -> bytes:
+    note = record.note
+    parts = [
+        LENGTH.pack(len(record.phones)),
+        *(_pack_str(phone.value) for phone in record.phones),
+        LENGTH.pack(len(record.emails)),
+        *(_pack_str(email.value) for email in record.emails),
+        _pack_str(record.birthday.value if record.birthday else None),
+        _pack_str(record.address.value if record.address else None),
+        _pack_str(note.title if note else None),
+        _pack_str(note.text if note else None),
+        _pack_str(json.dumps(sorted(note.tags)) if note else None),
+    ]
+    return b"".join(parts)
+
+
+def decode_record(name: str, blob) -> Record:
+    record = Record(name)
+    offset = 0
+    for attr, field in (("phones", Phone), ("emails", Email)):
+        (count,) = LENGTH.unpack_from(blob, offset)
+        offset += LENGTH.size
+        values = []
+        for _ in range(count):
+            value, offset = _unpack_str(blob, offset)
+            values.append(field(value))
+        setattr(record, attr, values)
+    birthday, offset = _unpack_str(blob, offset)
+    address, offset = _unpack_str(blob, offset)
+    title, offset = _unpack_str(blob, offset)
+    text, offset = _unpack_str(blob, offset)
+    tags, offset = _unpack_str(blob, offset)
+    record.birthday = Birthday(birthday) if birthday is not None else None
+    record.address = Address(address) if address is not None else None
+    record.note = Note(title, text, json.loads(tags)) if title is not None else None
+    return record
+
+
+def encode_snapshot(items) -> bytes:
+    """
+    Builds a snapshot from (name, blob) pairs.
+    """
+    items = sorted((name.encode("utf-8"), blob) for name, blob in items)
+    chunks = []
+    offset = HEADER.size
+    blob_offsets = []
+    for _, blob in items:
+        blob_offsets.append(offset)
+        chunks.append(blob)
+        offset += len(blob)
+    name_offsets = []
+    for name, _ in items:
+        name_offsets.append(offset)
+        chunks.append(name)
+        offset += len(name)
+    index_offset = offset
+    for (name, blob), name_offset, blob_offset in zip(items, name_offsets, blob_offsets):
+        chunks.append(ENTRY.pack(name_offset, len(name), blob_offset, len(blob)))
+    header = HEADER.pack(MAGIC, VERSION, len(items), index_offset)
+    return header + b"".join(chunks)
+
+
+class SnapshotRecords(MutableMapping):
+    """
+    Dict-like view over a memory-mapped snapshot with an in-memory overlay for
+    records added, changed or deleted since the snapshot was written.
+    """
+
+    def __init__(self, path: str, book: AddressBook) -> None:
+        self._book = book
+        self._mmap = None
+        self._count = 0
+        self._index_offset = 0
+        self._cache = {}
+        self._dirty = set()
+        self._deleted = set()
+        self._added = {}
+        # Імена, змінені після серіалізації книги для компактизації (None - не відстежуються)
+        self._changed = None
+        self._open(path)
+
+    def _open(self, path: str) -> None:
+        self._count = 0
+        self._index_offset = 0
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return
+        if self._mmap is not None:
+            magic, version, self._count, self._index_offset = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"'{path}' is not an address book snapshot.")
+
+    def _entry(self, i: int) -> tuple[int, int, int, int]:
+        return ENTRY.unpack_from(self._mmap, self._index_offset + i * ENTRY.size)
+
+    def _name(self, i: int) -> str:
+        name_offset, name_length, _, _ = self._entry(i)
+        return self._mmap[name_offset:name_offset + name_length].decode("utf-8")
+
+    def _blob(self, i: int):
+        _, _, blob_offset, blob_length = self._entry(i)
+        return self._mmap[blob_offset:blob_offset + blob_length]
+
+    def _position(self, name: str) -> int | None:
+        key = name.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            name_offset, name_length, _, _ = self._entry(mid)
+            current = self._mmap[name_offset:name_offset + name_length]
+            if current < key:
+                lo = mid + 1
+            elif current > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _in_snapshot(self, name: str) -> bool:
+        return name not in self._deleted and self._position(name) is not None
+
+    def __getitem__(self, name: str) -> Record:
+        record = self._cache.get(name)
+        if record is not None:
+            return record
+        if name in self._deleted:
+            raise KeyError(name)
+        position = self._position(name)
+        if position is None:
+            raise KeyError(name)
+        record = decode_record(name, self._blob(position))
+        record._owner = self._book
+        self._cache[name] = record
+        return record
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        if name in self._deleted:
+            self._deleted.discard(name)
+        elif name not in self._added and self._position(name) is None:
+            self._added[name] = None
+        self._cache[name] = record
+        self._dirty.add(name)
+        self._track(name)
+
+    def __delitem__(self, name: str) -> None:
+        if name in self._added:
+            del self._added[name]
+        elif self._in_snapshot(name):
+            self._deleted.add(name)
+        else:
+            raise KeyError(name)
+        self._cache.pop(name, None)
+        self._dirty.discard(name)
+        self._track(name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._added or self._in_snapshot(name)
+
+    def __iter__(self):
+        for i in range(self._count):
+            name = self._name(i)
+            if name not in self._deleted:
+                yield name
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return self._count - len(self._deleted) + len(self._added)
+
+    def mark_dirty(self, record: Record) -> None:
+        name = str(record.name)
+        self._dirty.add(name)
+        self._track(name)
+
+    def _track(self, name: str) -> None:
+        if self._changed is not None:
+            self._changed.add(name)
+
+    def compaction_blobs(self):
+        # Після цієї серіалізації накладки мають пережити встановлення нового знімка
+        # лише для записів, змінених уже після неї
+        self._changed = set()
+        return self.blobs()
+
+    def reopen(self, tmp_path: str, path: str) -> None:
+        """
+        Replaces the mapped snapshot with the compacted one written to `tmp_path`.
+        The new file holds the book as it was when compaction_blobs() ran, so only
+        records changed since then stay in the overlay. Cached records are kept,
+        so references held elsewhere stay valid.
+        """
+        changed, self._changed = self._changed or set(), None
+        current = {name for name in changed if name in self}
+        # Старий mmap закривається до заміни файлу (у Windows відображений файл не замінити)
+        self.close()
+        try:
+            os.replace(tmp_path, path)
+        finally:
+            self._open(path)
+        self._added = {name: None for name in current if self._position(name) is None}
+        self._dirty = {name for name in current if name not in self._added}
+        self._deleted = {name for name in changed - current if self._position(name) is not None}
+
+    def blobs(self):
+        # Незмінені записи копіюються зі знімка без декодування
+        for i in range(self._count):
+            name = self._name(i)
+            if name in self._deleted:
+                continue
+            if name in self._dirty:
+                yield name, encode_record(self._cache[name])
+            else:
+                yield name, bytes(self._blob(i))
+        for name in self._added:
+            yield name, encode_record(self._cache[name])
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class SnapshotAddressBook(AddressBook):
+    # Записи декодуються з mmap-файлу на вимогу, а не лежать у звичайному словнику
+    supports_snapshots = False
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.data = SnapshotRecords(path, self)
+
+    @writing
+    def _record_changed(self, record: Record, field: str) -> None:
+        super()._record_changed(record, field)
+        self.data.mark_dirty(record)
+
+    @writing
+    def install_snapshot(self, tmp_path: str, path: str) -> None:
+        self.data.reopen(tmp_path, path)
+
+    def __getstate__(self) -> dict:
+        raise TypeError("Snapshot address book cannot be pickled; use storage.migrate_data() instead")
+
+
+def dumps(book: AddressBook) -> bytes:
+    if isinstance(book.data, SnapshotRecords):
+        return encode_snapshot(book.data.blobs())
+    return encode_snapshot((name, encode_record(record)) for name, record in book.data.items())
+
+
+def compaction_dumps(book: SnapshotAddressBook) -> bytes:
+    return encode_snapshot(book.data.compaction_blobs())
+
+
+def load(filename: str) -> SnapshotAddressBook:
+    book = SnapshotAddressBook(filename)
+    journal = Journal(filename, dump=compaction_dumps, install=book.install_snapshot)
+    journal.replay(book)
+    book.store = journal
+    return book
+
+
+def save(book: AddressBook, filename: str) -> None:
+    journal = book.store
+    if isinstance(journal, Journal) and journal.snapshot_path == filename:
+        journal.close(book)
+        return
+    export(book, filename)
+
+
+def export(book: AddressBook, filename: str) -> None:
+    with open(filename, "wb") as f:
+        f.write(dumps(book))
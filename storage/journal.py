@@ -0,0 +1,179 @@
+import os
+import pickle
+import threading
+from functools import partial
+
+# Журнал змін: змінені записи книги дописуються в кінець файлу
+# невеликими записами ("put", ім'я, Record) або ("del", ім'я, None).
+# Повний знімок книги перезаписується лише під час компактизації.
+COMPACT_THRESHOLD = 1024 * 1024  # bytes
+
+
+def journal_path(snapshot_path: str) -> str:
+    return snapshot_path + ".journal"
+
+
+def _read_entries(path: str):
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+            except (pickle.UnpicklingError, AttributeError, ValueError):
+                # Обірваний останній запис (наприклад, після аварійного завершення)
+                return
+
+
+def _apply(book, entry) -> None:
+    op, name, record = entry
+    if op == "put":
+        book.data[name] = record
+        record._owner = book
+    elif op == "del":
+        book.data.pop(name, None)
+
+
+class Journal:
+    def __init__(self, snapshot_path: str, threshold: int = COMPACT_THRESHOLD, dump=pickle.dumps,
+                 install=None) -> None:
+        self.snapshot_path = snapshot_path
+        self.dump = dump
+        # install(tmp_path, snapshot_path) ставить записаний знімок на місце старого, якщо книга
+        # читає з файлу знімка (mmap). Викликається в потоці команд під блокуванням книги,
+        # під час наступного flush / compact / close, а не у фоновому потоці
+        self.install = install
+        self._written = None  # записаний знімок, що чекає на install
+        self.path = journal_path(snapshot_path)
+        self.old_path = self.path + ".old"
+        self.threshold = threshold
+        self._file = None
+        self._compaction = None
+        # Захищає файл журналу: дописування, закриття й ротацію під час компактизації.
+        # Порядок блокувань завжди: спершу книга, потім журнал
+        self._lock = threading.Lock()
+
+    def replay(self, book) -> int:
+        # Спочатку записи з незавершеної компактизації, потім поточні
+        count = 0
+        for path in (self.old_path, self.path):
+            for entry in _read_entries(path):
+                _apply(book, entry)
+                count += 1
+        return count
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def flush(self, book, names: set[str]) -> int:
+        if self._written is not None:
+            self._install_written(book)
+        # Під блокуванням лише серіалізуємо змінені записи,
+        # запис на диск відбувається вже без блокування книги; пошук при цьому не зупиняється
+        with book.lock.read():
+            entries = []
+            for name in names:
+                record = book.data.get(name)
+                entry = ("del", name, None) if record is None else ("put", name, record)
+                entries.append(pickle.dumps(entry))
+            # Журнал береться ще під блокуванням книги, тож записи потрапляють у файл
+            # у тому ж порядку, в якому серіалізовані, навіть коли ручне save збігається з автозбереженням
+            self._lock.acquire()
+        try:
+            if self._file is None:
+                self._file = open(self.path, "ab")
+            data = b"".join(entries)
+            self._file.write(data)
+            self._file.flush()
+        finally:
+            self._lock.release()
+        if self.size() >= self.threshold:
+            with book.lock:
+                self.compact(book)
+        return len(data)
+
+    def compact(self, book, background: bool = True) -> None:
+        # Викликається під блокуванням книги
+        with self._lock:
+            self._compact(book, background)
+
+    def _compact(self, book, background: bool) -> None:
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._finish_written()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.old_path):
+            # Залишок попередньої компактизації: дописуємо до нього поточні записи
+            with open(self.path, "rb") as src, open(self.old_path, "ab") as dst:
+                dst.write(src.read())
+            os.remove(self.path)
+        else:
+            os.replace(self.path, self.old_path)
+
+        if book.supports_snapshots:
+            # Знімок книги береться за O(1) під тим самим блокуванням, що й ротація журналу,
+            # а серіалізується вже у фоні, поки команди продовжують змінювати книгу
+            task = partial(self._save_snapshot, book.snapshot())
+        else:
+            # Серіалізуємо тут, щоб знімок був узгодженим; на диск пишемо у фоні
+            task = partial(self._write_snapshot, self.dump(book))
+        if background:
+            self._compaction = threading.Thread(target=task, daemon=True)
+            self._compaction.start()
+        else:
+            task()
+            self._finish_written()
+
+    def _save_snapshot(self, snapshot) -> None:
+        try:
+            data = self.dump(snapshot.to_book())
+        finally:
+            snapshot.release()
+        self._write_snapshot(data)
+
+    def _write_snapshot(self, data: bytes) -> None:
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if self.install is not None:
+            self._written = tmp_path
+            return
+        os.replace(tmp_path, self.snapshot_path)
+        os.remove(self.old_path)
+
+    def _install_written(self, book) -> None:
+        with book.lock, self._lock:
+            self._finish_written()
+
+    def _finish_written(self) -> None:
+        # Під блокуванням книги й журналу; лише після завершення фонового запису
+        if self._written is None or (self._compaction is not None and self._compaction.is_alive()):
+            return
+        tmp_path, self._written = self._written, None
+        self.install(tmp_path, self.snapshot_path)
+        # Записи старого журналу вже в новому знімку
+        os.remove(self.old_path)
+
+    def close(self, book=None) -> None:
+        if self._compaction is not None:
+            self._compaction.join()
+            self._compaction = None
+        if self._written is not None and book is not None:
+            self._install_written(book)
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,36 @@
+import pickle
+from services.address_book import AddressBook
+from storage.journal import Journal
+
+
+def load(filename: str) -> AddressBook:
+    try:
+        with open(filename, "rb") as f:
+            book = pickle.load(f)
+    except FileNotFoundError:
+        book = AddressBook()
+    journal = Journal(filename)
+    journal.replay(book)
+    book.store = journal
+    return book
+
+
+def save(book: AddressBook, filename: str) -> None:
+    journal = book.store
+    if isinstance(journal, Journal) and journal.snapshot_path == filename:
+        # Усі зміни вже в журналі, повний перезапис не потрібен
+        journal.close(book)
+        return
+    export(book, filename)
+
+
+def export(book: AddressBook, filename: str) -> None:
+    # Копія у звичайний словник, щоб зберегти книгу з будь-якого сховища; книгу зі звичайним
+    # словником копіюємо через знімок, тож її можна змінювати під час збереження
+    if book.supports_snapshots:
+        with book.snapshot() as snapshot:
+            plain = snapshot.to_book()
+    else:
+        plain = AddressBook(dict(book.data.items()))
+    with open(filename, "wb") as f:
+        pickle.dump(plain, f)
@@ -0,0 +1,202 @@
+import json
+import os
+import pickle
+import re
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from services.address_book import AddressBook
+
+# Книга розбивається на кілька файлів-шардів у каталозі *.shards за хешем імені.
+# Шарди завантажуються паралельно, а під час збереження перезаписуються лише змінені.
+# Повний перезапис (збереження в новий каталог, rebalance) пише нове покоління файлів
+# shard-<покоління>-<номер>.pkl, а маніфест, що вказує на покоління, замінюється останнім:
+# до цього моменту завантаження бачить попереднє покоління цілим.
+DEFAULT_SHARDS = int(os.environ.get("ADDRESSBOOK_SHARDS", "16"))
+MANIFEST = "manifest.json"
+SHARD_FILE = re.compile(r"shard-(?:(\d+)-)?\d{3}\.pkl(?:\.tmp)?")
+
+
+def shard_of(name: str, count: int) -> int:
+    # crc32 замість hash(), бо hash() для рядків змінюється між запусками
+    return zlib.crc32(name.encode("utf-8")) % count
+
+
+class ShardStore:
+    def __init__(self, path: str, count: int, generation: int = 0) -> None:
+        self.path = path
+        self.count = count
+        # Покоління 0 - файли shard-<номер>.pkl, як до появи поколінь
+        self.generation = generation
+        # Імена записів у кожному шарді, щоб не переглядати всю книгу під час збереження
+        self.members = [set() for _ in range(count)]
+        # Упорядковує записи на диск: спершу блокування книги, потім сховища
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "ShardStore":
+        try:
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return cls(path, DEFAULT_SHARDS)
+        return cls(path, manifest["shards"], manifest.get("generation", 0))
+
+    def shard_path(self, i: int, generation: int | None = None) -> str:
+        generation = self.generation if generation is None else generation
+        if generation == 0:
+            return os.path.join(self.path, f"shard-{i:03d}.pkl")
+        return os.path.join(self.path, f"shard-{generation}-{i:03d}.pkl")
+
+    def _read_shard(self, i: int) -> dict:
+        try:
+            with open(self.shard_path(i), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_shard(self, path: str, data: bytes, sync: bool = False) -> int:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def _write_manifest(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        manifest = json.dumps({"shards": self.count, "generation": self.generation}).encode("utf-8")
+        self._write_shard(os.path.join(self.path, MANIFEST), manifest, sync=True)
+
+    def _remove_stale(self) -> None:
+        # Файли інших поколінь: попереднього або недописаного через аварійне завершення
+        current = {os.path.basename(self.shard_path(i)) for i in range(self.count)}
+        for entry in os.listdir(self.path):
+            if SHARD_FILE.fullmatch(entry) and entry not in current:
+                os.remove(os.path.join(self.path, entry))
+
+    def load(self, book: AddressBook) -> None:
+        with ThreadPoolExecutor(max_workers=min(self.count, os.cpu_count() or 1)) as pool:
+            shards = list(pool.map(self._read_shard, range(self.count)))
+        for i, records in enumerate(shards):
+            for name, record in records.items():
+                book.data[name] = record
+                record._owner = book
+            self.members[i] = set(records)
+
+    def _dump_shards(self, records, members: dict[int, set[str]]) -> dict[int, bytes]:
+        return {i: pickle.dumps({name: records[name] for name in names}) for i, names in members.items()}
+
+    def _capture(self, book: AddressBook, shards, layout: list[set[str]] | None = None):
+        # Викликається під блокуванням книги. Книга зі звичайним словником серіалізується зі знімка
+        # вже після звільнення блокування, тож команди не чекають на pickle;
+        # повертає (імена шардів, знімок або вже готові дані)
+        layout = self.members if layout is None else layout
+        members = {i: set(layout[i]) for i in shards}
+        if book.supports_snapshots:
+            return members, book.snapshot()
+        return members, self._dump_shards(book.data, members)
+
+    def _payloads(self, members: dict[int, set[str]], captured) -> dict[int, bytes]:
+        if isinstance(captured, dict):
+            return captured
+        with captured:
+            return self._dump_shards(captured, members)
+
+    def _write_shards(self, payloads: dict[int, bytes], generation: int | None = None, sync: bool = False) -> int:
+        os.makedirs(self.path, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=min(len(payloads), os.cpu_count() or 1) or 1) as pool:
+            return sum(pool.map(
+                lambda item: self._write_shard(self.shard_path(item[0], generation), item[1], sync),
+                payloads.items(),
+            ))
+
+    def flush(self, book: AddressBook, names: set[str]) -> int:
+        # Під блокуванням визначаємо лише шарди зі зміненими записами. Сховище блокується ще під
+        # блокуванням книги, тож шарди потрапляють на диск у тому ж порядку, в якому захоплені
+        with book.lock:
+            changed = set()
+            for name in names:
+                i = shard_of(name, self.count)
+                if name in book.data:
+                    self.members[i].add(name)
+                else:
+                    self.members[i].discard(name)
+                changed.add(i)
+            generation = self.generation
+            members, captured = self._capture(book, changed)
+            self._lock.acquire()
+        try:
+            written = self._write_shards(self._payloads(members, captured), generation)
+            if not os.path.exists(os.path.join(self.path, MANIFEST)):
+                self._write_manifest()
+            return written
+        finally:
+            self._lock.release()
+
+    def save_all(self, book: AddressBook, count: int | None = None) -> int:
+        """
+        Rewrites the whole book as a new generation of `count` shards (the current
+        count by default). The manifest is replaced last, so a crash at any point
+        leaves either the previous generation or the new one, never a mix.
+        """
+        with book.lock:
+            previous = (self.count, self.generation, self.members)
+            count = count or self.count
+            members = [set() for _ in range(count)]
+            for name in book.data:
+                members[shard_of(name, count)].add(name)
+            shard_members, captured = self._capture(book, range(count), members)
+            # Подальші flush уже розкладають записи й пишуть за новим поколінням
+            self.count, self.generation, self.members = count, self.generation + 1, members
+            generation = self.generation
+            self._lock.acquire()
+        committed = False
+        try:
+            payloads = self._payloads(shard_members, captured)
+            written = self._write_shards(payloads, generation, sync=True)
+            self._write_manifest()
+            committed = True
+            self._remove_stale()
+            return written
+        finally:
+            self._lock.release()
+            if not committed:
+                self._rollback(book, previous)
+
+    def _rollback(self, book: AddressBook, previous: tuple) -> None:
+        # Нове покоління не зафіксоване: повертаємо попереднє, а всі записи, які могли потрапити
+        # лише в недописані файли, позначаємо зміненими, щоб наступний flush переписав їх
+        with book.lock:
+            self.count, self.generation, self.members = previous
+            book.dirty.update(*self.members, book.data)
+
+    def rebalance(self, book: AddressBook, count: int) -> None:
+        if count < 1:
+            raise ValueError("Number of shards must be positive")
+        self.save_all(book, count)
+
+    def close(self) -> None:
+        pass
+
+
+def load(path: str) -> AddressBook:
+    book = AddressBook()
+    store = ShardStore.open(path)
+    store.load(book)
+    book.store = store
+    return book
+
+
+def save(book: AddressBook, path: str) -> None:
+    store = book.store
+    if isinstance(store, ShardStore) and store.path == path:
+        # Змінені шарди вже перезаписані під час flush_data
+        return
+    export(book, path)
+
+
+def export(book: AddressBook, path: str) -> None:
+    ShardStore(path, DEFAULT_SHARDS).save_all(book)
@@ -0,0 +1,379 @@
+import json
+import sqlite3
+import weakref
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from models.contact import Record, Phone, Email, Birthday, Address, Note, normalize_tags
+from services.address_book import AddressBook
+from services.indexes import NoteIndex, normalize_phone
+from services.locks import reading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    name TEXT PRIMARY KEY,
+    birthday TEXT,
+    address TEXT,
+    note_title TEXT,
+    note_text TEXT,
+    note_tags TEXT
+);
+CREATE INDEX IF NOT EXISTS records_by_birthday ON records(substr(birthday, 4, 2) || substr(birthday, 1, 2));
+CREATE TABLE IF NOT EXISTS phones (
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    phone TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS phones_by_name ON phones(name);
+CREATE INDEX IF NOT EXISTS phones_by_phone ON phones(phone);
+CREATE TABLE IF NOT EXISTS emails (
+    name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    email TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS emails_by_name ON emails(name);
+CREATE INDEX IF NOT EXISTS emails_by_email ON emails(email);
+CREATE INDEX IF NOT EXISTS emails_by_email_nocase ON emails(email COLLATE NOCASE);
+CREATE TABLE IF NOT EXISTS note_tags (
+    name TEXT NOT NULL,
+    tag TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS note_tags_by_name ON note_tags(name);
+CREATE INDEX IF NOT EXISTS note_tags_by_tag ON note_tags(tag);
+"""
+
+CHILD_TABLES = ("phones", "emails", "note_tags")
+CACHE_SIZE = 4096  # записів, що тримаються в пам'яті після останнього звернення
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    # З'єднання використовується з потоків сервера, але завжди під блокуванням книги
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.create_function("casefold", 1, str.casefold, deterministic=True)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SQLiteRecords(MutableMapping):
+    """
+    Dict-like view over the records table. A Record is built from its rows only
+    when it is first accessed. The last `cache_size` records stay cached; beyond
+    that a record lives only while something references it, and while it does,
+    every lookup returns the same object, so changes made through Record methods
+    reach it. Changes are written to the database at once, so an evicted record
+    never holds unsaved state.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, book: AddressBook, cache_size: int = CACHE_SIZE) -> None:
+        self._conn = conn
+        self._book = book
+        self.cache_size = cache_size
+        # Останні використані записи (LRU) і всі записи, на які ще є посилання
+        self._cache = OrderedDict()
+        self._live = weakref.WeakValueDictionary()
+
+    def _cached(self, name: str) -> Record | None:
+        record = self._cache.get(name)
+        if record is not None:
+            self._cache.move_to_end(name)
+            return record
+        record = self._live.get(name)
+        if record is not None:
+            self._remember(name, record)
+        return record
+
+    def _remember(self, name: str, record: Record) -> None:
+        self._cache[name] = record
+        self._cache.move_to_end(name)
+        self._live[name] = record
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _forget(self, name: str) -> None:
+        self._cache.pop(name, None)
+        self._live.pop(name, None)
+
+    def __getitem__(self, name: str) -> Record:
+        record = self._cached(name)
+        if record is not None:
+            return record
+        row = self._conn.execute(
+            "SELECT name, birthday, address, note_title, note_text, note_tags FROM records WHERE name = ?",
+            (name,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        record = self._materialize(row)
+        record._owner = self._book
+        self._remember(name, record)
+        return record
+
+    def __setitem__(self, name: str, record: Record) -> None:
+        self.write(record)
+        self._remember(name, record)
+
+    def __delitem__(self, name: str) -> None:
+        with self._conn:
+            deleted = self._conn.execute("DELETE FROM records WHERE name = ?", (name,)).rowcount
+            for table in CHILD_TABLES:
+                self._conn.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+        self._forget(name)
+        if not deleted:
+            raise KeyError(name)
+
+    def __contains__(self, name) -> bool:
+        if name in self._cache or name in self._live:
+            return True
+        return self._conn.execute("SELECT 1 FROM records WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self):
+        names = [name for (name,) in self._conn.execute("SELECT name FROM records ORDER BY rowid")]
+        return iter(names)
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def names(self, query: str, params: tuple = ()) -> list[str]:
+        return [name for (name,) in self._conn.execute(query, params)]
+
+    def write(self, record: Record) -> None:
+        with self._conn:
+            self.write_rows(record)
+
+    def write_rows(self, record: Record) -> None:
+        name = str(record.name)
+        note = record.note
+        self._conn.execute(
+            "INSERT OR REPLACE INTO records (name, birthday, address, note_title, note_text, note_tags) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                name,
+                record.birthday.value if record.birthday else None,
+                record.address.value if record.address else None,
+                note.title if note else None,
+                note.text if note else None,
+                json.dumps(sorted(note.tags)) if note else None,
+            ),
+        )
+        for table in CHILD_TABLES:
+            self._conn.execute(f"DELETE FROM {table} WHERE name = ?", (name,))
+        self._conn.executemany(
+            "INSERT INTO phones (name, position, phone) VALUES (?, ?, ?)",
+            [(name, i, phone.value) for i, phone in enumerate(record.phones)],
+        )
+        self._conn.executemany(
+            "INSERT INTO emails (name, position, email) VALUES (?, ?, ?)",
+            [(name, i, email.value) for i, email in enumerate(record.emails)],
+        )
+        if note and note.tags:
+            self._conn.executemany(
+                "INSERT INTO note_tags (name, tag) VALUES (?, ?)",
+                [(name, tag) for tag in note.tags],
+            )
+
+    def _materialize(self, row: tuple) -> Record:
+        name, birthday, address, note_title, note_text, note_tags = row
+        record = Record(name)
+        record.phones = [
+            Phone(phone) for (phone,) in
+            self._conn.execute("SELECT phone FROM phones WHERE name = ? ORDER BY position", (name,))
+        ]
+        record.emails = [
+            Email(email) for (email,) in
+            self._conn.execute("SELECT email FROM emails WHERE name = ? ORDER BY position", (name,))
+        ]
+        record.birthday = Birthday(birthday) if birthday else None
+        record.address = Address(address) if address else None
+        record.note = Note(note_title, note_text, json.loads(note_tags)) if note_title else None
+        return record
+
+
+class SQLiteOrder:
+    """
+    Keyset pagination over the records table with the interface of
+    services.indexes.SortedKeys: names for "name", (month, day, name) keys for "birthday".
+    Pages come from the primary key or the birthday expression index.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, order: str) -> None:
+        self._conn = conn
+        if order == "birthday":
+            self._columns = ("substr(birthday, 4, 2) || substr(birthday, 1, 2)", "name")
+            self._where = "birthday IS NOT NULL"
+        else:
+            self._columns = ("name",)
+            self._where = "1"
+        self._key = ", ".join(self._columns)
+        self._birthday = order == "birthday"
+        self._placeholders = "?, ?" if self._birthday else "?"
+
+    def _params(self, key) -> tuple:
+        return (f"{key[0]:02d}{key[1]:02d}", key[2]) if self._birthday else (key,)
+
+    def _keys(self, rows) -> list:
+        if self._birthday:
+            return [(int(mmdd[:2]), int(mmdd[2:]), name) for mmdd, name in rows]
+        return [name for (name,) in rows]
+
+    def _select(self, condition: str, params: tuple, descending: bool, limit: int) -> list:
+        direction = " DESC" if descending else ""
+        order = ", ".join(column + direction for column in self._columns)
+        rows = self._conn.execute(
+            f"SELECT {self._key} FROM records WHERE {self._where} AND {condition} ORDER BY {order} LIMIT ?",
+            (*params, limit),
+        )
+        return self._keys(rows)
+
+    def __len__(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM records WHERE {self._where}").fetchone()[0]
+
+    def after(self, key, limit: int) -> list:
+        if key is None:
+            return self._select("1", (), False, limit)
+        return self._select(f"({self._key}) > ({self._placeholders})", self._params(key), False, limit)
+
+    def before(self, key, limit: int) -> list:
+        if key is None:
+            keys = self._select("1", (), True, limit)
+        else:
+            keys = self._select(f"({self._key}) < ({self._placeholders})", self._params(key), True, limit)
+        keys.reverse()
+        return keys
+
+    def rank(self, key) -> int:
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM records WHERE {self._where} AND ({self._key}) < ({self._placeholders})",
+            self._params(key),
+        ).fetchone()[0]
+
+
+class SQLiteAddressBook(AddressBook):
+    concurrent_reads = False
+    # Зміни записуються в базу одразу, знімок для збереження не потрібен
+    supports_snapshots = False
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self.conn = _connect(path)
+        self.data = SQLiteRecords(self.conn, self)
+
+    def _record_changed(self, record: Record, field: str) -> None:
+        with self.lock:
+            super()._record_changed(record, field)
+            self.data.write(record)
+
+    def _records(self, names: list[str]) -> list[Record]:
+        return [self.data[name] for name in names]
+
+    def search_by_name(self, query: str) -> list[Record]:
+        return self._records(self.data.names(
+            "SELECT name FROM records WHERE instr(casefold(name), ?) > 0 ORDER BY casefold(name)",
+            (query.casefold(),),
+        ))
+
+    def names_with_prefix(self, prefix: str):
+        # Імена зберігаються як "Ім'я", тож префікс шукається діапазоном по первинному ключу
+        start = prefix.casefold().capitalize()
+        rows = self.conn.execute(
+            "SELECT name FROM records WHERE name >= ? AND name < ? ORDER BY name", (start, start + "\U0010ffff"),
+        )
+        return (name for (name,) in rows)
+
+    @reading
+    def find_by_note(self, query: str, limit: int = 10) -> list[Record]:
+        # Той самий BM25-індекс, що й у книзі в пам'яті, але будується з колонок нотаток
+        # одним запитом, без матеріалізації записів; далі його оновлюють add_record/delete/_record_changed
+        if self._notes is None:
+            index = NoteIndex()
+            rows = self.conn.execute(
+                "SELECT name, note_title, note_text FROM records WHERE note_title IS NOT NULL ORDER BY rowid"
+            )
+            for name, title, text in rows:
+                index.add_note(name, title, text)
+            self._notes = index
+        return self._records(self._notes.search(query, limit))
+
+    def find_by_tags(self, tags: list[str], match_all: bool = False) -> list[tuple[Record, list[str]]]:
+        search_tags = sorted(normalize_tags(tags))
+        placeholders = ", ".join("?" for _ in search_tags)
+        found = {}
+        rows = self.conn.execute(
+            f"SELECT name, tag FROM note_tags WHERE tag IN ({placeholders}) ORDER BY name",
+            search_tags,
+        )
+        for name, tag in rows:
+            found.setdefault(name, set()).add(tag)
+        return [
+            (self.data[name], sorted(note_tags))
+            for name, note_tags in found.items()
+            if not match_all or len(note_tags) == len(search_tags)
+        ]
+
+    def find_by_phone(self, phone: str) -> list[Record]:
+        # Номери зберігаються з "+" або без нього, тож перевіряємо обидва варіанти
+        digits = normalize_phone(phone)
+        return self._records(self.data.names(
+            "SELECT DISTINCT name FROM phones WHERE phone IN (?, ?) ORDER BY name", (digits, "+" + digits),
+        ))
+
+    def find_by_email(self, email: str) -> list[Record]:
+        return self._records(self.data.names(
+            "SELECT DISTINCT name FROM emails WHERE email = ? COLLATE NOCASE ORDER BY name", (email.strip(),),
+        ))
+
+    def duplicates(self) -> dict[str, dict[str, list[str]]]:
+        result = {"phones": {}, "emails": {}}
+        queries = (
+            ("phones", "SELECT replace(phone, '+', ''), name FROM phones"),
+            ("emails", "SELECT casefold(email), name FROM emails"),
+        )
+        for key, query in queries:
+            owners = {}
+            for value, name in self.conn.execute(query):
+                owners.setdefault(value, set()).add(name)
+            result[key] = {value: sorted(names) for value, names in owners.items() if len(names) > 1}
+        return result
+
+    def birthdays_between(self, start: tuple[int, int], end: tuple[int, int]) -> list[Record]:
+        # Дата зберігається як DD.MM.YYYY, тож (місяць, день) порівнюються як рядки MMDD
+        return self._records(self.data.names(
+            "SELECT name FROM records WHERE substr(birthday, 4, 2) || substr(birthday, 1, 2) BETWEEN ? AND ? "
+            "ORDER BY substr(birthday, 4, 2) || substr(birthday, 1, 2), name",
+            (f"{start[0]:02d}{start[1]:02d}", f"{end[0]:02d}{end[1]:02d}"),
+        ))
+
+    def order_index(self, order: str) -> SQLiteOrder:
+        if order not in ("name", "birthday"):
+            return super().order_index(order)
+        return SQLiteOrder(self.conn, order)
+
+    def tag_counts(self) -> list[tuple[str, int]]:
+        return self.conn.execute(
+            "SELECT tag, COUNT(*) AS uses FROM note_tags GROUP BY tag ORDER BY uses DESC, tag"
+        ).fetchall()
+
+    def __getstate__(self) -> dict:
+        raise TypeError("SQLite address book cannot be pickled; use storage.migrate_data() instead")
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def load(filename: str) -> SQLiteAddressBook:
+    return SQLiteAddressBook(filename)
+
+
+def save(book: AddressBook, filename: str) -> None:
+    if isinstance(book, SQLiteAddressBook) and book.path == filename:
+        # Зміни записуються одразу, лишається тільки зафіксувати транзакцію
+        book.conn.commit()
+        return
+    export(book, filename)
+
+
+def export(book: AddressBook, filename: str) -> None:
+    target = SQLiteAddressBook(filename)
+    with target.conn:
+        for record in book.data.values():
+            target.data.write_rows(record)
+    target.close()
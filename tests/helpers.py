@@ -0,0 +1,49 @@
+import calendar
+from datetime import date, timedelta
+
+from birthday import UpcomingBirthday
+from models.contact import Record
+
+
+def book_state(records) -> dict:
+    """
+    Comparable state of every record in a mapping of name -> Record (a book's data or a snapshot).
+    """
+    state = {}
+    for name in records:
+        record = records[name]
+        state[name] = (
+            tuple(phone.value for phone in record.phones),
+            str(record.birthday) if record.birthday else None,
+            tuple(str(email) for email in record.emails),
+            str(record.address) if record.address else None,
+            (record.note.title, record.note.text, tuple(sorted(record.note.tags))) if record.note else None,
+        )
+    return state
+
+
+def make_record(name: str, phone: str) -> Record:
+    record = Record(name)
+    record.add_phone(phone)
+    return record
+
+
+def scan_upcoming_birthdays(book, days: int, today: date) -> list[UpcomingBirthday]:
+    """
+    Reference for get_upcoming_birthdays: walks every day of the period and checks every record.
+    Periods must be shorter than a year.
+    """
+    result = []
+    for offset in range(days + 1):
+        day = today + timedelta(days=offset)
+        for name, record in book.data.items():
+            if record.birthday is None:
+                continue
+            born = record.birthday.date
+            # 29 лютого в невисокосний рік відзначається 28 лютого
+            leap_day = (born.month, born.day) == (2, 29) and (day.month, day.day) == (2, 28) and not calendar.isleap(day.year)
+            if (born.month, born.day) == (day.month, day.day) or leap_day:
+                congratulation = day + timedelta(days={5: 2, 6: 1}.get(day.weekday(), 0))
+                result.append(UpcomingBirthday(name, day, congratulation))
+    result.sort(key=lambda item: (item.birthday, item.name))
+    return result
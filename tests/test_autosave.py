@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+from benchmarks.datagen import generate_book
+from services.commands import save_changes
+from storage import flush_data, load_data, save_data, start_autosave
+from tests.helpers import book_state
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "book.pkl")
+    save_data(generate_book(20), path)
+    return path
+
+
+def fail_flushes(monkeypatch, book, times: int) -> list:
+    # Перші `times` записів журналу падають, як на заповненому диску
+    flush = book.store.flush
+    calls = []
+
+    def failing_flush(target, names):
+        calls.append(set(names))
+        if len(calls) <= times:
+            raise OSError("No space left on device")
+        return flush(target, names)
+
+    monkeypatch.setattr(book.store, "flush", failing_flush)
+    return calls
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_failed_flush_keeps_the_names_dirty(path, monkeypatch):
+    book = load_data(path)
+    names = sorted(book.data)[:2]
+    for name in names:
+        book.find(name).add_phone("0990000001")
+    fail_flushes(monkeypatch, book, times=1)
+
+    with pytest.raises(OSError):
+        flush_data(book)
+    assert book.dirty == set(names)
+
+    flush_data(book)
+    assert book.dirty == set()
+    assert book_state(load_data(path).data) == book_state(book.data)
+
+
+def test_autosave_flushes_after_every_changes(path):
+    book = load_data(path)
+    saver = start_autosave(book, interval=60, every=2)
+    names = sorted(book.data)
+
+    book.find(names[0]).add_phone("0990000001")
+    save_changes(book)
+    assert not wait_for(lambda: saver.saves, timeout=0.2)
+    book.find(names[1]).add_phone("0990000002")
+    save_changes(book)
+    assert wait_for(lambda: saver.saves == 1)
+
+    assert book_state(load_data(path).data) == book_state(book.data)
+    assert saver.stats()["pending"] == 0 and saver.stats()["bytes_written"] > 0
+    saver.stop()
+
+
+def test_autosave_retries_after_a_failed_flush(path, monkeypatch):
+    book = load_data(path)
+    calls = fail_flushes(monkeypatch, book, times=1)
+    saver = start_autosave(book, interval=60, every=1)
+    names = sorted(book.data)
+
+    book.find(names[0]).add_phone("0990000001")
+    save_changes(book)
+    assert wait_for(lambda: saver.failures == 1)
+    assert saver.stats()["last_error"] == "No space left on device"
+    assert book.dirty == {names[0]}
+
+    # Потік автозбереження живий, а наступне збереження записує й імена з невдалого
+    book.find(names[1]).add_phone("0990000002")
+    save_changes(book)
+    assert wait_for(lambda: saver.saves == 1)
+    assert calls[1] == {names[0], names[1]}
+    saver.stop()
+    assert book_state(load_data(path).data) == book_state(book.data)
@@ -0,0 +1,110 @@
+import pytest
+
+from benchmarks.datagen import generate_book
+from cli import execute
+from services.query import Plan
+from storage import load_data, save_data
+from tests.helpers import make_record
+
+# Кожен тест виконується на книзі в пам'яті (.pkl) і на SQLite-книзі (.db) з тими самими контактами
+BACKENDS = [".pkl", ".db"]
+
+
+def open_book(tmp_path, extension, source):
+    path = str(tmp_path / f"book{extension}")
+    save_data(source, path)
+    return load_data(path)
+
+
+@pytest.fixture(params=BACKENDS)
+def extension(request):
+    return request.param
+
+
+def names(records):
+    return [record.name.value for record in records]
+
+
+def test_search_by_name_orders_by_casefolded_name(tmp_path, extension):
+    source = generate_book(0)
+    # Порядок вставки, порядок рядків і порядок за casefold тут різні
+    for name, phone in (("Ÿanna", "0501111111"), ("Banna", "0502222222"), ("Āanna", "0503333333")):
+        source.add_record(make_record(name, phone))
+    book = open_book(tmp_path, extension, source)
+
+    assert names(book.search_by_name("anna")) == ["Banna", "Ÿanna", "Āanna"]
+    assert names(book.search_by_name("an")) == ["Banna", "Ÿanna", "Āanna"]
+
+
+def test_search_by_name_matches_across_backends(tmp_path):
+    source = generate_book(500)
+    memory, sqlite = (open_book(tmp_path, extension, source) for extension in BACKENDS)
+    for query in ("ol", "ko", "enko", "andrii", "ivanmel", "zzz"):
+        assert names(memory.search_by_name(query)) == names(sqlite.search_by_name(query))
+
+
+NOTE_QUERIES = ("budget", "budget project", '"the budget of"', '"book club" tickets', "wedding photos monday",
+                '"monday budget"', "zzz")
+
+
+def test_find_by_note_matches_across_backends(tmp_path):
+    source = generate_book(500)
+    memory, sqlite = (open_book(tmp_path, extension, source) for extension in BACKENDS)
+    for query in NOTE_QUERIES:
+        assert names(memory.find_by_note(query, limit=20)) == names(sqlite.find_by_note(query, limit=20))
+
+
+def test_find_by_note_ranks_words_and_phrases(tmp_path, extension):
+    source = generate_book(0)
+    for name, title, text in (("Olena", "Budget", "quarter budget review"),
+                              ("Ivan", "Quarter", "budget for the next quarter"),
+                              ("Taras", "Trip", "tickets for the trip")):
+        record = make_record(name, "0501111111")
+        record.add_note(title, text)
+        source.add_record(record)
+    book = open_book(tmp_path, extension, source)
+
+    assert names(book.find_by_note("quarter budget")) == ["Olena", "Ivan"]
+    assert names(book.find_by_note('"quarter budget"')) == ["Olena"]
+    assert names(book.find_by_note('"budget quarter"')) == []
+
+    # Уже побудований індекс бачить зміни, додавання й видалення
+    book.find("Taras").edit_note("Trip", "quarter budget trip")
+    record = make_record("Petro", "0502222222")
+    record.add_note("Plans", "budget")
+    book.add_record(record)
+    book.delete("Olena")
+    assert sorted(names(book.find_by_note('"quarter budget"'))) == ["Taras"]
+    assert "Petro" in names(book.find_by_note("budget"))
+
+
+def test_note_query_matches_across_backends(tmp_path):
+    source = generate_book(500)
+    for name, text in (("Olena", "quarter budget review"), ("Ivan", "budget for the next quarter")):
+        record = make_record(name, "0501111111")
+        record.add_note("Plans", text)
+        source.add_record(record)
+    memory, sqlite = (open_book(tmp_path, extension, source) for extension in BACKENDS)
+    for query in ('note:"quarter budget"', "note:budget", 'note:"budget monday" AND has:email', "note:zzz"):
+        found = []
+        for book in (memory, sqlite):
+            with book.lock.read():
+                found.append(sorted(names(Plan(book, query).records())))
+        assert found[0] == found[1], query
+    with memory.lock.read():
+        assert sorted(names(Plan(memory, 'note:"quarter budget"').records())) == ["Ivan", "Olena"]
+
+
+def test_migrate_command_keeps_the_case_of_the_target(tmp_path, capsys):
+    folder = tmp_path / "Books"
+    folder.mkdir()
+    target = folder / "Book.db"
+    book = generate_book(20)
+
+    assert execute(f"migrate {target}", book)
+    assert sorted(path.name for path in folder.iterdir()) == ["Book.db"]
+    assert names(load_data(str(target)).search_by_name("")) == names(book.search_by_name(""))
+
+    # Повторне копіювання перевіряє саме цей файл і відмовляє
+    assert execute(f"migrate {target}", book) is False
+    assert f"File '{target}' already exists." in capsys.readouterr().out
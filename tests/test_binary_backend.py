@@ -0,0 +1,57 @@
+import os
+
+from benchmarks.datagen import generate_book
+from storage import flush_data, load_data, save_data
+from tests.helpers import book_state, make_record
+
+
+def abk_book(tmp_path, count=200):
+    path = str(tmp_path / "book.abk")
+    save_data(generate_book(count), path)
+    return load_data(path), path
+
+
+def test_compaction_installs_the_new_snapshot_and_clears_overlays(tmp_path):
+    book, path = abk_book(tmp_path)
+    names = sorted(book.data)
+    book.find(names[0]).add_phone("0501112233")
+    book.delete(names[1])
+    book.add_record(make_record("Newcontact", "0504445566"))
+    flush_data(book)
+    old_mmap = book.data._mmap
+
+    with book.lock:
+        book.store.compact(book, background=False)
+
+    records = book.data
+    assert old_mmap.closed
+    assert (records._dirty, records._added, records._deleted) == (set(), {}, set())
+    assert not os.path.exists(book.store.old_path)
+    expected = book_state(book.data)
+    save_data(book, path)
+    assert book_state(load_data(path).data) == expected
+
+
+def test_changes_during_background_compaction_stay_in_the_overlay(tmp_path):
+    book, path = abk_book(tmp_path)
+    names = sorted(book.data)
+    book.find(names[0]).add_phone("0501112233")
+    flush_data(book)
+    with book.lock:
+        book.store.compact(book)
+    book.store._compaction.join()
+    # Знімок уже записаний, але ще не встановлений: ці зміни в нього не потрапили
+    book.find(names[2]).add_phone("0507778899")
+    book.delete(names[3])
+    book.add_record(make_record("Latecomer", "0501234567"))
+
+    flush_data(book)
+
+    records = book.data
+    assert book.store._written is None
+    assert records._dirty == {names[2]}
+    assert set(records._added) == {"Latecomer"}
+    assert records._deleted == {names[3]}
+    expected = book_state(book.data)
+    save_data(book, path)
+    assert book_state(load_data(path).data) == expected
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.datagen import generate_book
+from birthday import UpcomingBirthday, get_upcoming_birthdays
+from services.address_book import AddressBook
+from tests.helpers import make_record, scan_upcoming_birthdays
+
+
+def birthday_book(*birthdays: tuple[str, str]) -> AddressBook:
+    book = AddressBook()
+    for i, (name, birthday) in enumerate(birthdays):
+        record = make_record(name, f"050{i:07d}")
+        record.add_birthday(birthday)
+        book.add_record(record)
+    return book
+
+
+def test_period_across_the_new_year():
+    book = birthday_book(("Ann", "30.12.1990"), ("Bob", "02.01.1985"), ("Carl", "04.01.2001"), ("Dan", "27.12.1999"))
+    today = date(2026, 12, 28)
+
+    result = get_upcoming_birthdays(book, 7, today)
+
+    # 02.01.2027 - субота, привітання переноситься на понеділок
+    assert result == [
+        UpcomingBirthday("Ann", date(2026, 12, 30), date(2026, 12, 30)),
+        UpcomingBirthday("Bob", date(2027, 1, 2), date(2027, 1, 4)),
+        UpcomingBirthday("Carl", date(2027, 1, 4), date(2027, 1, 4)),
+    ]
+    assert result == scan_upcoming_birthdays(book, 7, today)
+
+
+@pytest.mark.parametrize("today, expected", [
+    # 28.02.2027 - неділя: привітання в понеділок 1 березня
+    (date(2027, 2, 24), [UpcomingBirthday("Ann", date(2027, 2, 28), date(2027, 3, 1))]),
+    # Період закінчується саме 28 лютого невисокосного року
+    (date(2027, 2, 21), [UpcomingBirthday("Ann", date(2027, 2, 28), date(2027, 3, 1))]),
+    (date(2027, 3, 1), []),
+    (date(2028, 2, 25), [UpcomingBirthday("Ann", date(2028, 2, 29), date(2028, 2, 29))]),
+])
+def test_leap_day_birthdays(today, expected):
+    book = birthday_book(("Ann", "29.02.2000"), ("Bob", "01.03.2000"))
+
+    result = [item for item in get_upcoming_birthdays(book, 7, today) if item.name == "Ann"]
+
+    assert result == expected
+    assert get_upcoming_birthdays(book, 7, today) == scan_upcoming_birthdays(book, 7, today)
+
+
+def test_weekend_birthday_moves_to_monday():
+    book = birthday_book(("Ann", "16.01.1990"), ("Bob", "17.01.1990"), ("Carl", "18.01.1990"))
+
+    result = get_upcoming_birthdays(book, 7, date(2027, 1, 14))
+
+    # 16 і 17 січня 2027 - субота й неділя
+    assert [(item.name, item.congratulation_date) for item in result] == [
+        ("Ann", date(2027, 1, 18)), ("Bob", date(2027, 1, 18)), ("Carl", date(2027, 1, 18)),
+    ]
+
+
+def test_every_start_day_matches_the_scan():
+    book = generate_book(300)
+    for letter in "abcde":
+        record = make_record("Leap" + letter, "0509999999")
+        record.add_birthday("29.02.1996")
+        book.add_record(record)
+    # Кінець невисокосного 2026 року і початок високосного 2028-го
+    for start in (date(2026, 12, 20), date(2027, 12, 20)):
+        for offset in range(80):
+            today = start + timedelta(days=offset)
+            for days in (1, 7, 30):
+                assert get_upcoming_birthdays(book, days, today) == scan_upcoming_birthdays(book, days, today), (today, days)
@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+import storage
+from cli import BookLoader, execute
+from services.address_book import AddressBook
+from storage import load_data
+from tests.helpers import make_record
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_main(tmp_path, *args, stdin: str = "") -> subprocess.CompletedProcess:
+    # Окремий процес з власним файлом книги: main.py бере його з ADDRESSBOOK_FILE
+    env = {**os.environ, "ADDRESSBOOK_FILE": str(tmp_path / "book.pkl"), "PYTHONPATH": str(ROOT), "NO_COLOR": "1"}
+    return subprocess.run([sys.executable, str(ROOT / "main.py"), *args], input=stdin, capture_output=True,
+                          text=True, cwd=tmp_path, env=env, timeout=60)
+
+
+SCRIPT = """add ann 0501234567
+# коментар і порожній рядок пропускаються
+
+add bob 0502222222
+phone zed
+add-email ann ann@example.com
+add carl 0503333333
+add dan 0504444444
+"""
+
+
+@pytest.mark.parametrize("save_every, saves", [(0, 1), (2, 3)])
+def test_batch_mode_summary_and_saves(tmp_path, save_every, saves):
+    (tmp_path / "script.txt").write_text(SCRIPT, encoding="utf-8")
+
+    result = run_main(tmp_path, "--batch", "script.txt", "--save-every", str(save_every))
+
+    assert result.returncode == 1
+    summary = result.stderr.strip().splitlines()[-1]
+    assert summary.startswith("Processed 6 command(s) in ")
+    assert summary.endswith(f"saves: {saves}, errors: 1 (line 5)")
+    assert "Contact 'Zed' was not found" in result.stdout
+    book = load_data(str(tmp_path / "book.pkl"))
+    assert sorted(book.data) == ["Ann", "Bob", "Carl", "Dan"]
+    assert book.find("ann").emails[0].value == "ann@example.com"
+
+
+def test_batch_mode_reads_stdin_and_stops_at_exit(tmp_path):
+    result = run_main(tmp_path, "--batch", stdin="add ann 0501234567\nexit\nadd bob 0502222222\n")
+
+    assert result.returncode == 0
+    assert result.stderr.strip().endswith("saves: 1, errors: 0")
+    assert list(load_data(str(tmp_path / "book.pkl")).data) == ["Ann"]
+
+
+def test_commands_module_is_imported_on_first_book_command():
+    # Чистий інтерпретатор: у процесі тестів services.commands уже імпортовано
+    code = (
+        "import sys, cli\n"
+        "from services.address_book import AddressBook\n"
+        "loaded = lambda: 'services.commands' in sys.modules\n"
+        "print(loaded())\n"
+        "cli.execute('help', None)\n"
+        "print(loaded(), 'phone' in cli.COMMANDS)\n"
+        "cli.execute('search ann', AddressBook())\n"
+        "print(loaded())\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, timeout=60,
+                            env={**os.environ, "PYTHONPATH": str(ROOT)})
+
+    lines = result.stdout.strip().splitlines()
+    assert [lines[0], lines[-3], lines[-1]] == ["False", "False True", "True"]
+
+
+def test_book_loader_lets_builtins_run_while_loading(monkeypatch, capsys):
+    release = threading.Event()
+    book = AddressBook()
+    book.add_record(make_record("Ann", "0501234567"))
+
+    def slow_load():
+        release.wait(5)
+        return book
+
+    monkeypatch.setattr(storage, "load_data", slow_load)
+    monkeypatch.setattr(storage, "start_autosave", lambda book: None)
+    loader = BookLoader()
+
+    # Поки книга вантажиться, вбудовані команди не чекають на неї
+    assert execute("hello", loader)
+    assert loader.peek() is None
+    release.set()
+    assert execute("phone ann", loader)
+    assert loader.peek() is book
+    assert "How can I help you?" in capsys.readouterr().out
+
+
+def test_book_loader_reraises_the_load_error(monkeypatch):
+    def broken_load():
+        raise ValueError("Unsupported storage format '.txt'.")
+
+    monkeypatch.setattr(storage, "load_data", broken_load)
+    loader = BookLoader()
+
+    assert execute("hello", loader)
+    with pytest.raises(ValueError, match="Unsupported storage format"):
+        execute("phone ann", loader)
@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+
+import pytest
+
+from benchmarks.datagen import generate_book
+from birthday import get_upcoming_birthdays
+from tests.helpers import make_record, scan_upcoming_birthdays
+
+pytest.importorskip("numpy")
+
+
+@pytest.fixture(scope="module")
+def book():
+    book = generate_book(500)
+    for name, birthday in (("Leapa", "29.02.1996"), ("Leapb", "29.02.2000"), ("Yearend", "31.12.1990"),
+                           ("Yearstart", "01.01.1991"), ("Marchfirst", "01.03.1992")):
+        record = make_record(name, "0509999999")
+        record.add_birthday(birthday)
+        book.add_record(record)
+    return book
+
+
+@pytest.mark.parametrize("start", [date(2026, 12, 15), date(2027, 2, 15), date(2027, 12, 15), date(2028, 2, 15)])
+def test_columns_upcoming_birthdays_match_the_index(book, start):
+    columns = book.to_columns()
+    for offset in range(30):
+        today = start + timedelta(days=offset)
+        for days in (1, 7, 30, 364):
+            assert columns.upcoming_birthdays(days, today) == get_upcoming_birthdays(book, days, today), (today, days)
+    assert columns.upcoming_birthdays(7, date(2027, 2, 24)) == scan_upcoming_birthdays(book, 7, date(2027, 2, 24))
+
+
+def test_columns_follow_book_changes():
+    book = generate_book(50)
+    columns = book.to_columns()
+    assert book.to_columns() is columns
+    record = make_record("Leap", "0509999999")
+    record.add_birthday("29.02.2000")
+    book.add_record(record)
+
+    refreshed = book.to_columns()
+    assert refreshed is not columns and len(refreshed) == 51
+    today = date(2027, 2, 25)
+    assert refreshed.upcoming_birthdays(7, today) == get_upcoming_birthdays(book, 7, today)
+    assert any(item.name == "Leap" for item in refreshed.upcoming_birthdays(7, today))
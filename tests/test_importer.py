@@ -0,0 +1,95 @@
+import csv
+import json
+import threading
+
+from cli import execute
+from services.address_book import AddressBook
+
+
+def write_jsonl(path, rows):
+    path.write_text("\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows) + "\n", encoding="utf-8")
+
+
+def test_jsonl_rows_with_wrong_types_are_rejected(tmp_path):
+    path = tmp_path / "contacts.jsonl"
+    write_jsonl(path, [
+        {"name": 123},
+        {"name": "Ann", "birthday": 5},
+        [1, 2],
+        "\"just a string\"",
+        {"name": "Bob", "phones": [380501234567]},
+        {"name": "Dan", "tags": {"a": 1}},
+        {"name": "Carl", "phones": ["0501234567"], "tags": "work"},
+    ])
+    book = AddressBook()
+
+    report = book.import_file(str(path), workers=1)
+
+    assert (report.imported, report.rejected) == (1, 6)
+    assert list(book.data) == ["Carl"]
+    with open(report.rejected_path, newline="", encoding="utf-8") as f:
+        rejected = list(csv.DictReader(f))
+    assert [row["line"] for row in rejected] == ["1", "2", "3", "4", "5", "6"]
+    assert rejected[1]["name"] == "Ann"
+    assert rejected[1]["reason"] == "Field 'birthday' must be a string"
+    assert rejected[2]["reason"] == "Expected a JSON object"
+    assert rejected[4]["reason"] == "Field 'phones' must be a string or a list of strings"
+
+
+def test_import_validates_in_spawned_worker_processes(tmp_path):
+    path = tmp_path / "contacts.jsonl"
+    write_jsonl(path, [{"name": f"contact{chr(97 + i // 26)}{chr(97 + i % 26)}", "phone": f"050{i:07d}"}
+                       for i in range(300)] + [{"name": "broken", "phone": "12"}])
+    book = AddressBook()
+
+    report = book.import_file(str(path), batch_size=50, workers=2)
+
+    assert (report.imported, report.rejected) == (300, 1)
+    assert book.find("contactaa").phones[0].value == "0500000000"
+
+
+class LockProbe:
+    """
+    Stands in for the autosaver: on every batch checks from another thread
+    whether the book lock can be taken.
+    """
+
+    def __init__(self, book) -> None:
+        self.book = book
+        self.results = []
+
+    def notify(self) -> None:
+        acquired = threading.Event()
+
+        def probe():
+            with self.book.lock:
+                acquired.set()
+
+        # Не приєднуємося до потоку: якщо книга заблокована, він дочекається кінця імпорту
+        threading.Thread(target=probe, daemon=True).start()
+        self.results.append(acquired.wait(2))
+
+
+def test_import_command_releases_the_book_between_batches(tmp_path):
+    path = tmp_path / "contacts.jsonl"
+    write_jsonl(path, [{"name": f"person{chr(97 + i // 676)}{chr(97 + i // 26 % 26)}{chr(97 + i % 26)}",
+                        "phone": f"050{i:07d}"} for i in range(2500)])
+    book = AddressBook()
+    book.autosave = LockProbe(book)
+
+    assert execute(f"import {path}", book)
+
+    assert len(book.data) == 2500
+    assert book.autosave.results == [True, True, True]
+
+
+def test_import_command_keeps_the_case_of_the_path(tmp_path):
+    folder = tmp_path / "Import"
+    folder.mkdir()
+    path = folder / "Contacts.jsonl"
+    write_jsonl(path, [{"name": "Ann", "phone": "0501234567"}])
+    book = AddressBook()
+
+    assert execute(f"IMPORT {path}", book)
+
+    assert book.find("ann").phones[0].value == "0501234567"
@@ -0,0 +1,254 @@
+import random
+import re
+from collections import Counter
+
+import pytest
+
+from benchmarks.datagen import NOTE_TOPICS, TAGS, generate_book
+from cli import execute
+from server import ANSI_CODES
+from services import changes
+from services.indexes import BKTree, PrefixTrie, levenshtein
+
+
+def naive_levenshtein(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, start=1):
+        current = [i]
+        for j, other in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+
+def random_word(rng: random.Random, alphabet: str, low: int, high: int) -> str:
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(low, high)))
+
+
+def test_levenshtein_matches_the_table():
+    rng = random.Random(12)
+    pairs = [("", ""), ("", "abc"), ("abc", ""), ("kitten", "sitting"), ("ярослав", "ярослава")]
+    # Малий алфавіт дає близькі слова; слова довші за 64 символи перевіряють маски з кількох машинних слів
+    pairs += [(random_word(rng, "abc", 0, 12), random_word(rng, "abc", 0, 12)) for _ in range(500)]
+    pairs += [(random_word(rng, "abcd", 60, 90), random_word(rng, "abcd", 60, 90)) for _ in range(20)]
+    for a, b in pairs:
+        assert levenshtein(a, b) == naive_levenshtein(a, b), (a, b)
+
+
+def test_bk_search_matches_a_full_scan():
+    rng = random.Random(12)
+    names = sorted({random_word(rng, "abcdeo", 3, 9).capitalize() for _ in range(2000)})
+    tree = BKTree(names)
+    alive = set(names)
+    # Видалення накопичують надгробки, доки дерево не перебудується; частину імен додаємо знову
+    discarded = rng.sample(names, 1400)
+    for name in discarded:
+        tree.discard(name)
+        alive.discard(name)
+    assert len(tree._nodes) < len(names)
+    for name in discarded[:200]:
+        tree.add(name)
+        alive.add(name)
+
+    queries = [random_word(rng, "abcdeo", 2, 10) for _ in range(60)] + rng.sample(sorted(alive), 20)
+    for query in queries:
+        distances = {name: naive_levenshtein(query.casefold(), name.casefold()) for name in alive}
+        for max_distance in range(4):
+            expected = sorted(((name, distance) for name, distance in distances.items() if distance <= max_distance),
+                              key=lambda item: (item[1], item[0]))
+            assert tree.search(query, max_distance) == expected, (query, max_distance)
+
+
+@pytest.mark.parametrize("names", [[], ["Ann"]])
+def test_bk_search_after_discarding_everything(names):
+    tree = BKTree(names)
+    for name in names:
+        tree.discard(name)
+    assert tree.search("ann", 2) == []
+
+
+def prefix_matches(names, prefix: str) -> list[str]:
+    return sorted((name for name in names if name.casefold().startswith(prefix.casefold())), key=str.casefold)
+
+
+def test_iter_prefix_keeps_order_after_bursts():
+    rng = random.Random(13)
+    # Спільні префікси переповнюють контейнери (BURST_LIMIT) на кількох рівнях; є й імена,
+    # що є префіксами інших, і літери, порядок яких змінюється після casefold
+    names = {random_word(rng, "ab", 1, 3) + random_word(rng, "abcz", 0, 6) for _ in range(3000)}
+    names |= {"Ÿanna", "Āanna", "Straße", "Ab", "A"}
+    names = [name.capitalize() for name in names]
+    rng.shuffle(names)
+    trie = PrefixTrie(names)
+    assert isinstance(trie._root["a"], dict) and isinstance(trie._root["a"]["b"], dict)
+
+    removed = set(rng.sample(names, 800))
+    for name in removed:
+        trie.discard(name)
+    trie.discard("Missing")
+    alive = set(names) - removed
+    for name in rng.sample(sorted(alive), 100):
+        trie.add(name)
+
+    assert len(trie) == len(alive)
+    prefixes = ["", "a", "A", "ab", "aB", "aba", "abab", "b", "bz", "strasse", "stra", "ÿ", "x"]
+    prefixes += [name[:rng.randint(1, len(name))] for name in rng.sample(sorted(alive), 100)]
+    for prefix in prefixes:
+        assert list(trie.iter_prefix(prefix)) == prefix_matches(alive, prefix), prefix
+
+
+def change_notes(book, rng: random.Random, steps: int) -> None:
+    # Додавання, редагування (з тегами й без) і видалення нотаток та контактів
+    for step in range(steps):
+        name = rng.choice(sorted(book.data))
+        roll = rng.random()
+        title, text = f"Plan {step}", f"{rng.choice(NOTE_TOPICS)} and {rng.choice(NOTE_TOPICS)}"
+        if book.data[name].note is None:
+            changes.add_note(book, name, title, text, rng.sample(TAGS, rng.randint(0, 3)))
+        elif roll < 0.3:
+            changes.edit_note(book, name, title, text, rng.sample(TAGS, rng.randint(0, 3)))
+        elif roll < 0.5:
+            changes.edit_note(book, name, title, text)
+        elif roll < 0.7:
+            changes.remove_note(book, name)
+        else:
+            changes.delete(book, name)
+
+
+def naive_tags(book, tags: list[str], match_all: bool) -> list[tuple[str, list[str]]]:
+    result = []
+    for name in sorted(book.data):
+        note = book.data[name].note
+        matching = sorted(tag for tag in tags if note is not None and tag in note.tags)
+        if matching and (not match_all or len(matching) == len(tags)):
+            result.append((name, matching))
+    return result
+
+
+def test_tag_and_note_indexes_follow_changes():
+    rng = random.Random(9)
+    book = generate_book(300)
+    # Індекси будуються першим запитом і далі мають оновлюватися разом із записами
+    book.find_by_tags(["work"])
+    book.find_by_note("meeting")
+    change_notes(book, rng, 400)
+
+    for _ in range(50):
+        tags = rng.sample(TAGS, rng.randint(1, 3))
+        for match_all in (False, True):
+            found = [(str(record.name), matching) for record, matching in book.find_by_tags(tags, match_all)]
+            assert found == naive_tags(book, tags, match_all), (tags, match_all)
+    counts = Counter(tag for record in book.data.values() if record.note for tag in record.note.tags)
+    assert book.tag_counts() == sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    for word in {word for topic in NOTE_TOPICS for word in topic.split()} | {"plan", "missing"}:
+        expected = {name for name, record in book.data.items() if record.note is not None
+                    and word in re.findall(r"\w+", f"{record.note.title} {record.note.text}".casefold())}
+        assert {str(record.name) for record in book.find_by_note(word, len(book.data))} == expected, word
+
+
+def test_find_by_tags_command_any_and_all(capsys):
+    book = generate_book(0)
+    for name, tags in (("Ann", ["work", "gym"]), ("Bob", ["work"]), ("Carl", ["gym", "music"]), ("Dan", [])):
+        changes.add_phone(book, name, f"050{len(book.data):07d}")
+        changes.add_note(book, name, "Plans", "text", tags)
+    changes.edit_note(book, "bob", "Plans", "text", ["work", "Gym"])
+    changes.remove_note(book, "carl")
+    capsys.readouterr()
+
+    def listed(line):
+        assert execute(line, book)
+        return re.findall(r"^- (\w+):", ANSI_CODES.sub("", capsys.readouterr().out), re.MULTILINE)
+
+    assert listed("find-by-tags --all work gym") == ["Ann", "Bob"]
+    assert listed("find-by-tags --any gym music") == ["Ann", "Bob"]
+    assert listed("find-by-tags music work") == ["Ann", "Bob"]
+    assert execute("find-by-tags --all gym music", book) is False
+
+
+PHONES = [f"050{i:07d}" for i in range(40)] + [f"+38067{i:07d}" for i in range(10)]
+EMAILS = [f"user{i}@example.com" for i in range(30)]
+
+
+def change_contacts(book, rng: random.Random, steps: int) -> None:
+    # Зміни, після яких телефони й email спільні для кількох контактів або зникають
+    for _ in range(steps):
+        name = rng.choice(sorted(book.data))
+        record = book.data[name]
+        phones = [phone.value for phone in record.phones]
+        emails = [email.value for email in record.emails]
+        phone = rng.choice([phone for phone in PHONES if phone not in phones])
+        email = rng.choice([email for email in EMAILS if email not in emails])
+        # Той самий email, записаний іншими літерами, - та сама адреса
+        email = email.upper() if rng.random() < 0.2 else email
+        roll = rng.random()
+        if roll < 0.25:
+            changes.add_phone(book, name, phone)
+        elif roll < 0.4 and phones:
+            changes.change_phone(book, name, rng.choice(phones), phone)
+        elif roll < 0.5 and len(phones) > 1:
+            changes.remove_phone(book, name, rng.choice(phones))
+        elif roll < 0.7 and email.casefold() not in map(str.casefold, emails):
+            changes.add_email(book, name, email)
+        elif roll < 0.8 and emails and email.casefold() not in map(str.casefold, emails):
+            changes.change_email(book, name, rng.choice(emails), email)
+        elif roll < 0.9 and emails:
+            changes.remove_email(book, name, rng.choice(emails))
+        elif len(book.data) > 10:
+            changes.delete(book, name)
+
+
+def owners(book, values_of, value: str) -> list[str]:
+    return sorted(name for name, record in book.data.items() if value in values_of(record))
+
+
+def phones_of(record) -> set[str]:
+    return {re.sub(r"\D", "", phone.value) for phone in record.phones}
+
+
+def emails_of(record) -> set[str]:
+    return {email.value.casefold() for email in record.emails}
+
+
+def test_phone_and_email_indexes_follow_changes():
+    rng = random.Random(10)
+    book = generate_book(0)
+    for i in range(60):
+        changes.add_phone(book, "contact" + chr(97 + i // 26) + chr(97 + i % 26), rng.choice(PHONES))
+    book.find_by_phone(PHONES[0])
+    book.find_by_email(EMAILS[0])
+    change_contacts(book, rng, 600)
+
+    for phone in PHONES:
+        assert [str(record.name) for record in book.find_by_phone(phone)] == owners(book, phones_of, re.sub(r"\D", "", phone))
+    for email in EMAILS:
+        expected = owners(book, emails_of, email)
+        assert [str(record.name) for record in book.find_by_email(email.title())] == expected
+    duplicates = book.duplicates()
+    for key, values_of in (("phones", phones_of), ("emails", emails_of)):
+        values = {value for record in book.data.values() for value in values_of(record)}
+        expected = {value: owners(book, values_of, value) for value in values}
+        assert duplicates[key] == {value: names for value, names in expected.items() if len(names) > 1}
+    assert duplicates["phones"] and duplicates["emails"]
+
+
+def test_reverse_lookup_commands(capsys):
+    book = generate_book(0)
+    changes.add_phone(book, "ann", "050-123-45-67")
+    changes.add_phone(book, "bob", "0501234567")
+    changes.add_phone(book, "carl", "0507654321")
+    changes.add_email(book, "ann", "Team@Example.com")
+    changes.add_email(book, "carl", "team@example.com")
+    changes.change_phone(book, "bob", "0501234567", "0509999999")
+    capsys.readouterr()
+
+    def output(line):
+        result = execute(line, book)
+        return result, ANSI_CODES.sub("", capsys.readouterr().out).strip()
+
+    assert output("who-phone 050 123 45 67") == (True, "Phone number 0501234567 belongs to: Ann")
+    assert output("who-phone 0501111111") == (False, "Phone number 0501111111 is not saved for any contact.")
+    assert output("who-email TEAM@example.com") == (True, "Email team@example.com belongs to: Ann, Carl")
+    assert output("duplicates") == (True, "Emails saved for several contacts:\n - team@example.com: Ann, Carl")
+    changes.remove_email(book, "carl", "team@example.com")
+    capsys.readouterr()
+    assert output("duplicates") == (True, "No phone numbers or emails are shared between contacts.")
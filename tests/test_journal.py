@@ -0,0 +1,44 @@
+import sys
+import threading
+
+from benchmarks.datagen import generate_book
+from storage import flush_data, load_data, save_data
+from tests.helpers import book_state
+
+
+def test_concurrent_flushes_survive_compaction(tmp_path):
+    # Ручне збереження й автозбереження дописують журнал одночасно, а маленький поріг
+    # змушує компактизацію постійно закривати й ротувати файл
+    path = str(tmp_path / "book.pkl")
+    save_data(generate_book(300), path)
+    book = load_data(path)
+    book.store.threshold = 4096
+    names = sorted(book.data)
+    errors = []
+    done = threading.Event()
+
+    def saver():
+        try:
+            while not done.is_set():
+                flush_data(book)
+        except Exception as e:
+            errors.append(e)
+
+    # Часте перемикання потоків, щоб гонка проявлялася стабільно
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        savers = [threading.Thread(target=saver) for _ in range(3)]
+        for thread in savers:
+            thread.start()
+        for i in range(3000):
+            book.find(names[i % len(names)]).add_phone(f"050{i:07d}")
+        done.set()
+        for thread in savers:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    save_data(book, path)
+
+    assert errors == []
+    assert book_state(load_data(path).data) == book_state(book.data)
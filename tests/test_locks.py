@@ -0,0 +1,65 @@
+import sys
+import threading
+
+import pytest
+
+from benchmarks.thread_stress import stress
+from services.address_book import AddressBook
+from services.locks import ReadWriteLock
+from tests.helpers import make_record
+
+
+def test_threads_keep_the_book_and_its_indexes_consistent():
+    # Мало контактів і часте перемикання потоків, щоб потоки частіше зустрічалися на тих самих записах
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers, errors, _ = stress(contacts=100, threads=4, operations=2000, write_ratio=0.5)
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert all(worker.reads and worker.mutations for worker in workers)
+
+
+def test_upgrading_read_to_write_raises():
+    lock = ReadWriteLock()
+    with lock.read():
+        with pytest.raises(RuntimeError):
+            lock.acquire_write()
+        with pytest.raises(RuntimeError):
+            with lock:
+                pass
+
+    # Невдала спроба не лишає блокування зайнятим
+    acquired = threading.Event()
+
+    def writer():
+        with lock:
+            acquired.set()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    assert acquired.wait(5)
+    thread.join()
+
+
+def test_book_change_while_reading_raises():
+    book = AddressBook()
+    with book.lock.read():
+        with pytest.raises(RuntimeError):
+            book.add_record(make_record("Ann", "0501234567"))
+    assert len(book.data) == 0
+
+
+def test_writer_may_read_and_write_again():
+    lock = ReadWriteLock()
+    with lock:
+        with lock.read():
+            with lock:
+                pass
+    with lock.read():
+        with lock.read():
+            pass
+    # Обидві сторони повністю звільнені
+    assert lock._writer is None and lock._readers == 0 and lock._reads == {}
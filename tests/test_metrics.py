@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from cli import COMMANDS, execute
+from server import ANSI_CODES
+from services.address_book import AddressBook
+from services.metrics import Histogram, Metrics, SUB_BUCKETS, bucket_bounds, bucket_of
+from tests.helpers import make_record
+
+# Кошик ширший за одиницю має нижню межу щонайменше в SUB_BUCKETS разів більшу за свою ширину,
+# тож середина кошика відрізняється від будь-якого його значення не більше ніж на 1 / (2 * SUB_BUCKETS)
+RELATIVE_ERROR = 1 / (2 * SUB_BUCKETS)
+
+
+def edges(limit: int):
+    # Межі кожного кошика до limit та сусідні з ними значення
+    for power in range(limit.bit_length()):
+        for mantissa in range(SUB_BUCKETS, 2 * SUB_BUCKETS + 1):
+            value = mantissa << power
+            yield from (value - 1, value, value + 1)
+
+
+def test_bucket_bounds_contain_their_values():
+    for value in [*range(64), *edges(10**12)]:
+        low, high = bucket_bounds(bucket_of(value))
+        assert low <= value <= high, value
+        assert bucket_of(low) == bucket_of(high) == bucket_of(value)
+        # Наступний кошик починається одразу після цього
+        assert bucket_bounds(bucket_of(value) + 1)[0] == high + 1
+        assert high - low <= low * 2 * RELATIVE_ERROR
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_percentile_within_relative_error(seed):
+    rng = random.Random(seed)
+    # Затримки від мікросекунд до секунд з довгим хвостом
+    values = [int(rng.lognormvariate(13, 2)) for _ in range(5000)]
+    histogram = Histogram()
+    for value in values:
+        histogram.add(value)
+    ordered = sorted(values)
+
+    for fraction in (0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 0.999, 1.0):
+        exact = ordered[max(1, round(len(ordered) * fraction)) - 1]
+        assert abs(histogram.percentile(fraction) - exact) <= exact * RELATIVE_ERROR, fraction
+    assert histogram.percentile(1.0) <= histogram.max == ordered[-1]
+    assert Histogram().percentile(0.5) == 0
+
+
+def test_stats_command_reports_calls_errors_and_latency(monkeypatch, capsys):
+    book = AddressBook()
+    book.add_record(make_record("Ann", "0501234567"))
+    monkeypatch.setattr(COMMANDS, "metrics", Metrics())
+    for _ in range(3):
+        execute("phone ann", book)
+    execute("phone bob", book)
+    execute("search an", book)
+    capsys.readouterr()
+
+    execute("stats", book)
+
+    lines = ANSI_CODES.sub("", capsys.readouterr().out).splitlines()
+    assert lines[0].split() == ["command", "calls", "errors", "p50", "ms", "p95", "ms", "p99", "ms", "max", "ms"]
+    rows = {line.split()[0]: line.split()[1:] for line in lines[1:]}
+    assert list(rows) == ["phone", "search"]
+    assert rows["phone"][:2] == ["4", "1"] and rows["search"][:2] == ["1", "0"]
+    p50, p95, p99, slowest = map(float, rows["phone"][2:])
+    assert p50 <= p95 <= p99 <= slowest and slowest > 0
+
+
+def test_stats_command_without_metrics(monkeypatch, capsys):
+    monkeypatch.setattr(COMMANDS, "metrics", None)
+
+    execute("stats", AddressBook())
+
+    assert "Metrics are off." in ANSI_CODES.sub("", capsys.readouterr().out)
@@ -0,0 +1,43 @@
+import pickle
+import shutil
+from pathlib import Path
+
+from storage import load_data
+from tests.helpers import book_state
+
+# Книга, збережена кодом до переходу моделей на __slots__: стан полів - словники __dict__,
+# день народження - {"birthday": datetime, "value": ...}, теги - як їх передав користувач
+BASELINE_BOOK = Path(__file__).parent / "fixtures" / "baseline_book.pkl"
+
+EXPECTED = {
+    "Ann": (("0501234567", "0677654321"), "29.02.2000", ("ann@example.com",), "Kyiv, Khreshchatyk 1",
+            ("Plans", "quarter budget", ("family", "work"))),
+    "Bob": (("0502222222",), "31.12.1985", (), None, ("Gym", "monday", ("gym", "travel"))),
+    "Carl": (("0503333333",), None, (), None, ("Books", "read more", ("books", "music"))),
+    "Dan": (("0504444444",), None, (), None, None),
+}
+
+
+def test_baseline_pickle_loads(tmp_path):
+    path = tmp_path / "book.pkl"
+    shutil.copy(BASELINE_BOOK, path)
+
+    book = load_data(str(path))
+
+    assert book_state(book.data) == EXPECTED
+    assert book.find("ann").birthday.date.isoformat() == "2000-02-29"
+    assert [str(record.name) for record, _ in book.find_by_tags(["travel"])] == ["Bob"]
+    assert book.find_by_phone("0677654321")[0] is book.find("ann")
+
+
+def test_baseline_pickle_round_trips(tmp_path):
+    with open(BASELINE_BOOK, "rb") as f:
+        book = pickle.load(f)
+
+    restored = pickle.loads(pickle.dumps(book))
+
+    assert book_state(restored.data) == EXPECTED
+    # Новий формат уже без старих ключів: день народження - порядковий номер дня
+    assert restored.find("bob").birthday.__getstate__() == {"ordinal": book.find("bob").birthday.ordinal}
+    restored.find("bob").note.tags = ["Gym"]
+    assert restored.find("bob").note.tags == frozenset({"gym"})
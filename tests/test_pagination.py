@@ -0,0 +1,107 @@
+import random
+from datetime import date
+
+import pytest
+
+from benchmarks.datagen import generate_book
+from services.address_book import AddressBook
+from services.pagination import PageSession
+from tests.helpers import make_record
+
+
+def names(records):
+    return [record.name.value for record in records]
+
+
+def book_with(*contacts: tuple[str, str | None]) -> AddressBook:
+    book = AddressBook()
+    for i, (name, birthday) in enumerate(contacts):
+        book.add_record(contact(name, birthday, i))
+    return book
+
+
+def contact(name: str, birthday: str | None = None, number: int = 0):
+    record = make_record(name, f"050{number:07d}")
+    if birthday is not None:
+        record.add_birthday(birthday)
+    return record
+
+
+def test_name_cursor_survives_deletes_and_adds():
+    book = book_with(*((name, None) for name in ("Ann", "Bob", "Carl", "Dan", "Eve", "Fay", "Gus")))
+    session = PageSession(book, "name", 3)
+    assert names(session.first_page()) == ["Ann", "Bob", "Carl"]
+
+    # Видалено запис поточної сторінки й перший запис наступної; додано один перед курсором і один після
+    book.delete("bob")
+    book.delete("dan")
+    book.add_record(contact("Ben", number=10))
+    book.add_record(contact("Cora", number=11))
+
+    assert names(session.next_page()) == ["Cora", "Eve", "Fay"]
+    assert names(session.prev_page()) == ["Ann", "Ben", "Carl"]
+    assert names(session.next_page()) == ["Cora", "Eve", "Fay"]
+    book.delete("gus")
+    assert session.next_page() == []
+    assert session.position()[3]
+
+
+def test_birthday_cursor_wraps_over_the_new_year():
+    book = book_with(("Ann", "28.12.1990"), ("Bob", "29.12.1985"), ("Carl", "31.12.2001"),
+                     ("Dan", "01.01.1999"), ("Eve", "03.01.1970"), ("Fay", "27.12.1980"), ("Gus", None))
+    session = PageSession(book, "birthday", 2, today=date(2026, 12, 28))
+    assert names(session.first_page()) == ["Ann", "Bob"]
+
+    book.delete("carl")
+    book.add_record(contact("Zed", "30.12.1995", 10))
+    assert names(session.next_page()) == ["Zed", "Dan"]
+
+    # Позаду курсора (29 грудня) - не з'являється; попереду після переходу року - з'являється
+    book.add_record(contact("Abe", "29.12.2000", 11))
+    book.add_record(contact("Ida", "02.01.2000", 12))
+    assert names(session.next_page()) == ["Ida", "Eve"]
+    assert names(session.next_page()) == ["Fay"]
+    assert session.next_page() == []
+    assert session.position()[1:] == (4, False, True)
+
+    assert names(session.prev_page()) == ["Ida", "Eve"]
+    assert names(session.prev_page()) == ["Zed", "Dan"]
+    assert names(session.prev_page()) == ["Abe", "Bob"]
+    assert names(session.prev_page()) == ["Ann"]
+    assert session.prev_page() == []
+    assert session.position()[2]
+
+
+@pytest.mark.parametrize("order", ["name", "birthday"])
+def test_every_unchanged_contact_is_seen_once(order):
+    book = generate_book(400)
+    rng = random.Random(19)
+    today = date(2026, 12, 20)
+    session = PageSession(book, order, 7, today=today)
+    original = {name for name, record in book.data.items() if order == "name" or record.birthday}
+    deleted, seen, last_keys = set(), [], []
+
+    def position(key):
+        # Місце ключа в порядку перегляду: календар днів народження зсунуто до сьогоднішнього дня
+        return key if order == "name" else (key < (today.month, today.day, ""), key)
+
+    page = session.first_page()
+    added = 0
+    while page:
+        seen += names(page)
+        last_keys.append(position(session.last))
+        # Між сторінками видаляємо випадкові контакти й додаємо нові з випадковими датами
+        for name in rng.sample(sorted(book.data), 3):
+            book.delete(name)
+            deleted.add(name)
+        for _ in range(2):
+            added += 1
+            name = "New" + "".join(chr(97 + int(digit)) for digit in f"{added:04d}")
+            book.add_record(contact(name, f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.1990", added))
+        page = session.next_page()
+
+    assert len(seen) == len(set(seen))
+    # Кожен контакт, що був від початку й не видалявся, показано рівно один раз
+    assert original - deleted <= set(seen)
+    # Сторінки йдуть уперед без повернень назад
+    assert last_keys == sorted(set(last_keys))
@@ -0,0 +1,45 @@
+import pytest
+
+from models.contact import Record
+from services.address_book import AddressBook
+from services.query import MaterializedTerm, Plan, Term, parse_query
+from tests.helpers import make_record
+
+
+def test_indexed_term_without_its_own_lookup_fails_at_definition():
+    with pytest.raises(TypeError, match="does not override estimate"):
+        class Broken(Term):
+            index = "phones"
+
+            def matches(self, record: Record) -> bool:
+                return True
+
+
+def test_terms_without_matches_or_lookup_cannot_be_created():
+    class NoMatches(Term):
+        pass
+
+    class NoLookup(MaterializedTerm):
+        index = "phones"
+
+        def matches(self, record: Record) -> bool:
+            return True
+
+    with pytest.raises(TypeError):
+        NoMatches("x")
+    with pytest.raises(TypeError):
+        NoLookup("x")
+
+
+def test_filter_only_terms_scan_every_contact():
+    book = AddressBook()
+    for name, phone in (("Carl", "0503333333"), ("Ann", "0501111111"), ("Bob", "0502222222")):
+        book.add_record(make_record(name, phone))
+    book.find("bob").add_email("bob@example.com")
+    term, = parse_query("has:email")
+
+    assert term.index is None and term.estimate(book) is None
+    assert [str(record.name) for record in term.candidates(book)] == ["Bob"]
+    plan = Plan(book, "not has:email AND phone~050")
+    assert [str(record.name) for record in plan.records()] == ["Ann", "Carl"]
+    assert plan.steps[0].source == "name order"
@@ -0,0 +1,77 @@
+import io
+import threading
+
+from colorama import Fore
+
+from services import render
+
+
+class CountingStream(io.StringIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data: str) -> int:
+        self.writes += 1
+        return super().write(data)
+
+
+class ClosedPipe(CountingStream):
+    def write(self, data: str) -> int:
+        super().write(data)
+        raise BrokenPipeError
+
+
+def test_writer_buffers_lines_into_large_writes():
+    stream = CountingStream()
+    writer = render.Writer(stream, color=False)
+    rows = [f"{Fore.GREEN}- contact {i:05d}{Fore.RESET}" for i in range(20000)]
+
+    writer.line("header")
+    assert writer.lines(iter(rows)) == len(rows)
+    writer.flush()
+
+    expected = "header\n" + "".join(f"- contact {i:05d}\n" for i in range(20000))
+    assert stream.getvalue() == expected
+    # Кожен запис, крім останнього, - повний буфер (розмір рахується до вилучення кольорів)
+    buffered = len("header\n") + sum(len(row) + 1 for row in rows)
+    assert 1 < stream.writes <= buffered // render.BUFFER_SIZE + 1
+
+
+def test_writer_stops_when_the_reader_goes_away():
+    stream = ClosedPipe()
+    writer = render.Writer(stream)
+
+    written = writer.lines(f"row {i}" for i in range(100000))
+
+    assert writer.closed
+    assert stream.writes == 1
+    assert written < 100000
+    writer.line("more")
+    writer.flush()
+    assert stream.writes == 1
+
+
+def test_capture_keeps_each_thread_output_apart():
+    barrier = threading.Barrier(2)
+    outputs = {}
+
+    def command(name: str) -> None:
+        with render.capture() as buffer:
+            for i in range(3):
+                # Обидва потоки пишуть по черзі, кожен у свій буфер
+                barrier.wait()
+                render.echo(f"{name} {i}")
+            with render.output(pager=False) as out:
+                out.lines(f"{name} row {i}" for i in range(2))
+        outputs[name] = buffer.getvalue()
+
+    threads = [threading.Thread(target=command, args=(name,)) for name in ("ann", "bob")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for name in ("ann", "bob"):
+        assert outputs[name] == f"{name} 0\n{name} 1\n{name} 2\n{name} row 0\n{name} row 1\n"
+    assert render.stream() is not None and render._stream.get() is None
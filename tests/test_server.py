@@ -0,0 +1,159 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from cli import execute
+from server import ANSI_CODES, BookServer
+from services.address_book import AddressBook
+from tests.helpers import book_state, make_record
+
+
+def request(server, op, args):
+    return asyncio.run(server.dispatch({"id": 1, "op": op, "args": args}))
+
+
+@pytest.fixture
+def book():
+    book = AddressBook()
+    record = make_record("Ann", "0501234567")
+    record.add_birthday("01.02.1990")
+    record.add_address("Kyiv")
+    record.add_note("Plans", "quarter budget")
+    book.add_record(record)
+    return book
+
+
+# Одна й та сама зміна через сервер і через команду CLI: обидва входи мають відмовити однаково
+@pytest.mark.parametrize("op, args, line, error", [
+    ("add-note", {"name": "ann", "title": "Other", "text": "text"}, "add-note ann other text",
+     "Note already exists for Ann. Use 'edit-note' to modify it."),
+    ("add-address", {"name": "ann", "address": "Lviv"}, "add-address ann lviv",
+     "Residential address is already set for Ann. Use 'change-address' to change it."),
+    ("change-birthday", {"name": "ann", "birthday": "01.02.1990"}, "change-birthday ann 01.02.1990",
+     "New birthday date must differ from the old one."),
+    ("change", {"name": "ann", "old_phone": "0501234567", "new_phone": "050-123-45-67"},
+     "change ann 0501234567 0501234567", "Phone numbers must be different."),
+])
+def test_api_and_cli_refuse_the_same_changes(book, capsys, op, args, line, error):
+    before = book_state(book.data)
+
+    response = request(BookServer(book), op, args)
+    cli_result = execute(line, book)
+
+    assert response == {"id": 1, "ok": False, "error": error}
+    assert cli_result is False
+    assert error in ANSI_CODES.sub("", capsys.readouterr().out)
+    assert book_state(book.data) == before
+
+
+def test_api_returns_the_changed_record(book):
+    response = request(BookServer(book), "edit-note", {"name": "ann", "title": "Trip", "text": "tickets"})
+
+    assert response["ok"]
+    assert response["result"]["note"] == {"title": "Trip", "text": "tickets", "tags": []}
+    assert book.find("Ann").note.title == "Trip"
+
+
+@pytest.mark.parametrize("args, error", [
+    ("ann", "Arguments must be a JSON object."),
+    (["ann"], "Arguments must be a JSON object."),
+    ({}, "Missing argument 'name'."),
+    ({"name": "ann", "colour": "red"}, "Unknown argument 'colour'."),
+    ({"name": 5}, "Argument 'name' has the wrong type."),
+])
+def test_api_validates_arguments_before_running(book, args, error):
+    assert request(BookServer(book), "show", args) == {"id": 1, "ok": False, "error": error}
+
+
+def test_api_checks_argument_types_of_lists_and_numbers(book):
+    server = BookServer(book)
+
+    assert request(server, "find-by-tags", {"tags": "work"})["error"] == "Argument 'tags' has the wrong type."
+    assert request(server, "find-by-tags", {"tags": [1]})["error"] == "Argument 'tags' has the wrong type."
+    assert request(server, "names", {"limit": True})["error"] == "Argument 'limit' has the wrong type."
+    assert request(server, "names", {"limit": 1}) == {"id": 1, "ok": True, "result": ["Ann"]}
+
+
+def test_operations_run_under_the_book_lock(book, monkeypatch):
+    # Сервер не має власного блокування: поки триває читання, зміна книги в іншому потоці чекає
+    server = BookServer(book)
+    reading, release, written = threading.Event(), threading.Event(), threading.Event()
+
+    def slow_search(query):
+        reading.set()
+        release.wait(5)
+        return []
+
+    def write():
+        with book.lock:
+            written.set()
+
+    monkeypatch.setattr(book, "search_by_name", slow_search)
+    reader = threading.Thread(target=request, args=(server, "search", {"query": "ann"}))
+    reader.start()
+    assert reading.wait(5)
+    writer = threading.Thread(target=write)
+    writer.start()
+    assert not written.wait(0.2)
+    release.set()
+    assert written.wait(5)
+    reader.join()
+    writer.join()
+
+
+def test_command_output_is_captured_per_call(book, capsys, monkeypatch):
+    # Поки команда виконується, інший потік процесу пише в sys.stdout - це не потрапляє у вивід команди
+    find = book.find
+
+    def find_while_another_thread_prints(name):
+        thread = threading.Thread(target=print, args=("bystander",))
+        thread.start()
+        thread.join()
+        return find(name)
+
+    monkeypatch.setattr(book, "find", find_while_another_thread_prints)
+    response = request(BookServer(book), "command", {"line": "phone ann"})
+
+    assert response["result"] == {"success": True, "output": "Phone records for Ann: 0501234567\n"}
+    assert capsys.readouterr().out == "bystander\n"
+
+
+def test_every_connection_browses_its_own_pages(book):
+    for name, phone in (("Bob", "0502222222"), ("Carl", "0503333333")):
+        book.add_record(make_record(name, phone))
+
+    async def scenario():
+        listener = await asyncio.start_server(BookServer(book).handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            connections = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+
+            async def command(connection, line):
+                reader, writer = connection
+                writer.write(json.dumps({"op": "command", "args": {"line": line}}).encode("utf-8") + b"\n")
+                await writer.drain()
+                return json.loads(await reader.readline())["result"]["output"]
+
+            for connection in connections:
+                await command(connection, "all 1")
+            pages = [await command(connection, "next") for connection in connections]
+            for _, writer in connections:
+                writer.close()
+            return pages
+
+    first, second = asyncio.run(scenario())
+    assert "page 2 of 3" in first and "Bob" in first
+    assert "page 2 of 3" in second and "Bob" in second
+    assert book.pages is None
+
+
+@pytest.mark.parametrize("line", ["import /etc/passwd.csv", "MIGRATE /tmp/copy.pkl", " rebalance 4"])
+def test_commands_with_server_files_are_refused(book, tmp_path, line):
+    line = line.replace("/tmp", str(tmp_path))
+    response = request(BookServer(book), "command", {"line": line})
+
+    command = line.split()[0].casefold()
+    assert response == {"id": 1, "ok": False, "error": f"Command '{command}' is only available in the local command line."}
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from benchmarks.datagen import generate_book
+from storage import flush_data, load_data, rebalance_data, save_data
+from storage.shard_backend import ShardStore
+from tests.helpers import book_state
+
+
+@pytest.fixture
+def shard_book(tmp_path):
+    path = str(tmp_path / "book.shards")
+    save_data(generate_book(200), path)
+    book = load_data(path)
+    # Видалені контакти не мають повернутися, хоч би де обірвався rebalance
+    for name in sorted(book.data)[:20]:
+        book.delete(name)
+    flush_data(book)
+    return book, path
+
+
+def fail_after(monkeypatch, method: str, calls: int) -> None:
+    original = getattr(ShardStore, method)
+    count = [0]
+
+    def failing(self, *args, **kwargs):
+        count[0] += 1
+        if count[0] > calls:
+            raise OSError("disk is gone")
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(ShardStore, method, failing)
+
+
+@pytest.mark.parametrize("method, calls", [("_write_shard", 3), ("_write_manifest", 0)])
+def test_interrupted_rebalance_leaves_the_previous_generation(shard_book, monkeypatch, method, calls):
+    book, path = shard_book
+    before = book_state(book.data)
+    fail_after(monkeypatch, method, calls)
+
+    with pytest.raises(OSError):
+        rebalance_data(book, 5)
+
+    assert book_state(load_data(path).data) == before
+    monkeypatch.undo()
+    # Після відкату книга далі зберігається в попередньому поколінні
+    book.find(sorted(book.data)[0]).add_phone("0501112233")
+    flush_data(book)
+    assert book_state(load_data(path).data) == book_state(book.data)
+
+
+def test_rebalance_commits_a_new_generation(shard_book):
+    book, path = shard_book
+    rebalance_data(book, 5)
+    name = sorted(book.data)[0]
+    book.find(name).add_phone("0501112233")
+    flush_data(book)
+
+    with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+        assert json.load(f) == {"shards": 5, "generation": 2}
+    assert sorted(entry for entry in os.listdir(path) if entry.startswith("shard-")) == [
+        f"shard-2-{i:03d}.pkl" for i in range(5)
+    ]
+    assert book_state(load_data(path).data) == book_state(book.data)
+
+
+def test_legacy_layout_is_read_and_replaced(tmp_path):
+    path = str(tmp_path / "old.shards")
+    source = generate_book(100)
+    store = ShardStore(path, 4)
+    store.members = [set() for _ in range(4)]
+    store.flush(source, set(source.data))
+    assert sorted(os.listdir(path)) == ["manifest.json", *(f"shard-{i:03d}.pkl" for i in range(4))]
+
+    book = load_data(path)
+    assert book_state(book.data) == book_state(source.data)
+    rebalance_data(book, 2)
+    assert sorted(os.listdir(path)) == ["manifest.json", "shard-1-000.pkl", "shard-1-001.pkl"]
+    assert book_state(load_data(path).data) == book_state(source.data)
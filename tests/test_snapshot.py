@@ -0,0 +1,121 @@
+import sys
+
+import pytest
+
+from benchmarks.datagen import generate_book
+from benchmarks.snapshot_stress import stress
+from services.address_book import AddressBook
+from storage import flush_data, load_data, save_data
+from tests.helpers import book_state, make_record
+
+
+def change_book(book: AddressBook, names: list[str]) -> None:
+    # Зміни після знімка: записи, нотатки, додавання, видалення й зміна вже видаленого запису
+    book.find(names[0]).add_phone("0990000001")
+    book.find(names[1]).add_note("Later", "written after the snapshot")
+    detached = book.delete(names[2])
+    detached.add_phone("0990000002")
+    book.delete(names[3])
+    book.add_record(make_record(names[3], "0990000003"))
+    book.add_record(make_record("Zed", "0990000004"))
+
+
+def test_writers_see_consistent_snapshots():
+    # Записувачі змінюють записи, додають і видаляють контакти, поки інший потік читає знімки
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        book, observations, errors, _, _, _ = stress(contacts=200, writers=3, operations=1500, keep_open=3)
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert errors == []
+    assert observations
+    assert book._snapshots == ()
+
+
+def test_snapshot_keeps_its_state_while_the_book_changes():
+    book = generate_book(50)
+    names = sorted(book.data)
+    expected = book_state(book.data)
+
+    with book.snapshot() as snapshot:
+        change_book(book, names)
+
+        assert book_state(snapshot) == expected
+        assert len(snapshot) == len(expected)
+        assert names[2] in snapshot and "Zed" not in snapshot
+        assert book_state(snapshot.to_book().data) == expected
+    assert book_state(book.data) != expected
+    assert book._snapshots == ()
+
+
+def test_dict_is_copied_once_per_open_snapshot():
+    book = generate_book(50)
+    data = book.data
+
+    # Знімок уже звільнено: додавання не копіює словник
+    book.snapshot().release()
+    book.add_record(make_record("Ann", "0501234567"))
+    assert book.data is data
+
+    with book.snapshot() as snapshot:
+        book.add_record(make_record("Bob", "0502222222"))
+        copied = book.data
+        book.delete("ann")
+        book.add_record(make_record("Carl", "0503333333"))
+        assert copied is not data and book.data is copied
+        assert snapshot._data is data and "Ann" in snapshot
+    book.add_record(make_record("Dan", "0504444444"))
+    assert book.data is copied
+
+
+@pytest.mark.parametrize("target", ["copy.pkl", "copy.shards"])
+def test_save_from_a_snapshot_reloads_to_the_snapshot(tmp_path, monkeypatch, target):
+    path = str(tmp_path / "book.pkl")
+    save_data(generate_book(50), path)
+    book = load_data(path)
+    names = sorted(book.data)
+    expected = {}
+    snapshot = AddressBook.snapshot
+
+    def snapshot_then_change(self):
+        # Книга змінюється одразу після знімка, поки збереження ще серіалізує його
+        taken = snapshot(self)
+        expected.update(book_state(taken))
+        change_book(self, names)
+        return taken
+
+    monkeypatch.setattr(AddressBook, "snapshot", snapshot_then_change)
+    save_data(book, str(tmp_path / target))
+
+    assert expected
+    assert book_state(load_data(str(tmp_path / target)).data) == expected
+    assert book_state(book.data) != expected
+    assert book._snapshots == ()
+
+
+def test_compaction_reloads_to_the_snapshot(tmp_path, monkeypatch):
+    path = str(tmp_path / "book.pkl")
+    save_data(generate_book(50), path)
+    book = load_data(path)
+    names = sorted(book.data)
+    book.find(names[4]).add_email("before@example.com")
+    flush_data(book)
+    expected = {}
+    snapshot = AddressBook.snapshot
+
+    def snapshot_then_change(self):
+        taken = snapshot(self)
+        expected.update(book_state(taken))
+        change_book(self, names)
+        return taken
+
+    monkeypatch.setattr(AddressBook, "snapshot", snapshot_then_change)
+    with book.lock:
+        book.store.compact(book, background=False)
+
+    # Зміни після знімка ще не в журналі, тож перечитаний файл - рівно стан знімка
+    assert "before@example.com" in expected[names[4]][2]
+    assert book_state(load_data(path).data) == expected
+    assert book._snapshots == ()
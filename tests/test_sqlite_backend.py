@@ -0,0 +1,42 @@
+import gc
+
+from benchmarks.datagen import generate_book
+from storage import load_data, save_data
+from tests.helpers import book_state
+
+
+def sqlite_book(tmp_path, count=300):
+    path = str(tmp_path / "book.db")
+    source = generate_book(count)
+    save_data(source, path)
+    return load_data(path), source
+
+
+def test_record_cache_is_bounded(tmp_path):
+    book, source = sqlite_book(tmp_path)
+    book.data.cache_size = 50
+    # Повний перегляд не тримає в пам'яті всю таблицю
+    assert book_state(book.data) == book_state(source.data)
+    gc.collect()
+    assert len(book.data._cache) == 50
+    assert len(book.data._live) == 50
+    book.close()
+
+
+def test_referenced_record_keeps_its_identity(tmp_path):
+    book, _ = sqlite_book(tmp_path)
+    book.data.cache_size = 10
+    names = sorted(book.data)
+    held = book.data[names[0]]
+    for name in names[1:]:
+        book.data[name]
+    assert names[0] not in book.data._cache
+    # Витіснений, але досі використовуваний запис не підміняється новим об'єктом
+    assert book.data[names[0]] is held
+    held.add_phone("0501112233")
+    assert book.find(names[0]) is held
+    path = book.path
+    book.close()
+    reopened = load_data(path)
+    assert "0501112233" in [phone.value for phone in reopened.find(names[0]).phones]
+    reopened.close()